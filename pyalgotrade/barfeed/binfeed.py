@@ -0,0 +1,266 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import hashlib
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+import pytz
+import six
+
+from pyalgotrade.barfeed import columnar
+
+
+######################################################################
+# Binary bar files
+#
+# Each file holds the bars for a single instrument:
+# 1. MAGIC.
+# 2. The header size as a little-endian uint32.
+# 3. The header, a JSON object with the instrument, frequency, timezone, bar count and available columns, padded with
+#    spaces so columns are 8 byte aligned.
+# 4. The columns, one after the other. Timestamps are stored as little-endian int64 and the rest as little-endian
+#    float64.
+#
+# Files are memory-mapped when loaded, so multiple processes loading the same file share the same pages.
+
+MAGIC = b"PYALGOTRADE-BARS"
+VERSION = 1
+TIMESTAMPS_DTYPE = np.dtype("<i8")
+VALUES_DTYPE = np.dtype("<f8")
+
+
+def _get_zone(timezone):
+    ret = None
+    if timezone is not None:
+        ret = getattr(timezone, "zone", None)
+        if ret is None:
+            raise Exception("Only pytz timezones are supported")
+    return ret
+
+
+def can_write(barArrays):
+    """Returns True if the bars can be stored in a binary file. Only pytz timezones and numeric extra columns are
+    supported."""
+    timezone = barArrays.getTimeZone()
+    if timezone is not None and getattr(timezone, "zone", None) is None:
+        return False
+    for values in barArrays.getExtraColumns().values():
+        if values.dtype == object:
+            return False
+    return True
+
+
+def write_bar_arrays(barArrays, path):
+    """Writes a :class:`pyalgotrade.barfeed.columnar.BarArrays` into a binary file.
+
+    :param barArrays: The bars to write.
+    :type barArrays: :class:`pyalgotrade.barfeed.columnar.BarArrays`.
+    :param path: The path to the file.
+    :type path: string.
+    """
+
+    if not can_write(barArrays):
+        raise Exception("Only pytz timezones and numeric extra columns are supported")
+
+    extraNames = sorted(barArrays.getExtraColumns().keys())
+    header = {
+        "version": VERSION,
+        "instrument": str(barArrays.getInstrument()),
+        "frequency": barArrays.getFrequency(),
+        "timezone": _get_zone(barArrays.getTimeZone()),
+        "count": len(barArrays),
+        "adjClose": barArrays.hasAdjClose(),
+        "extra": extraNames,
+    }
+    header = json.dumps(header, sort_keys=True).encode("utf-8")
+    # Pad the header so columns are 8 byte aligned.
+    padding = -(len(MAGIC) + 4 + len(header)) % 8
+    header += b" " * padding
+
+    columns = [
+        np.asarray(barArrays.getTimestamps(), dtype=TIMESTAMPS_DTYPE),
+        np.asarray(barArrays.getOpen(), dtype=VALUES_DTYPE),
+        np.asarray(barArrays.getHigh(), dtype=VALUES_DTYPE),
+        np.asarray(barArrays.getLow(), dtype=VALUES_DTYPE),
+        np.asarray(barArrays.getClose(), dtype=VALUES_DTYPE),
+        np.asarray(barArrays.getVolume(), dtype=VALUES_DTYPE),
+    ]
+    if barArrays.hasAdjClose():
+        columns.append(np.asarray(barArrays.getAdjClose(), dtype=VALUES_DTYPE))
+    for name in extraNames:
+        columns.append(np.asarray(barArrays.getExtraColumns()[name], dtype=VALUES_DTYPE))
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        for column in columns:
+            f.write(column.tobytes())
+
+
+def read_bar_arrays(path):
+    """Loads a :class:`pyalgotrade.barfeed.columnar.BarArrays` from a binary file. The file is memory-mapped, so
+    values are read from disk as they are used.
+
+    :param path: The path to the file.
+    :type path: string.
+    """
+
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise Exception("%s is not a bar file" % path)
+        headerSize = struct.unpack("<I", f.read(4))[0]
+        header = json.loads(f.read(headerSize).decode("utf-8"))
+    if header["version"] != VERSION:
+        raise Exception("Unsupported bar file version %s" % header["version"])
+
+    count = header["count"]
+    offset = len(MAGIC) + 4 + headerSize
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+
+    def next_column(dtype):
+        ret = data[next_column.offset:next_column.offset + count * dtype.itemsize].view(dtype)
+        next_column.offset += count * dtype.itemsize
+        return ret
+    next_column.offset = offset
+
+    timestamps = next_column(TIMESTAMPS_DTYPE)
+    open_ = next_column(VALUES_DTYPE)
+    high = next_column(VALUES_DTYPE)
+    low = next_column(VALUES_DTYPE)
+    close = next_column(VALUES_DTYPE)
+    volume = next_column(VALUES_DTYPE)
+    adjClose = None
+    if header["adjClose"]:
+        adjClose = next_column(VALUES_DTYPE)
+    extra = {}
+    for name in header["extra"]:
+        extra[name] = next_column(VALUES_DTYPE)
+
+    timezone = None
+    if header["timezone"] is not None:
+        timezone = pytz.timezone(header["timezone"])
+
+    # Bars were validated before being written.
+    return columnar.BarArrays(
+        header["instrument"], header["frequency"], timestamps, open_, high, low, close, volume, adjClose=adjClose,
+        timezone=timezone, extra=extra, validate=False
+    )
+
+
+def write_barfeed(barFeed, directory):
+    """Consumes a :class:`pyalgotrade.barfeed.BaseBarFeed` and writes the bars for each instrument into a binary file.
+
+    :param barFeed: The bar feed to convert.
+    :type barFeed: :class:`pyalgotrade.barfeed.BaseBarFeed`.
+    :param directory: The directory where files will be written. File names are built using the instrument.
+    :type directory: string.
+    :rtype: A dictionary that maps instruments to file paths.
+    """
+
+    bars = {}
+    for dateTime, currentBars in barFeed:
+        for instrument, bar_ in currentBars.items():
+            bars.setdefault(instrument, []).append(bar_)
+
+    ret = {}
+    for instrument, instrumentBars in six.iteritems(bars):
+        path = os.path.join(directory, "%s.bars" % str(instrument).replace("/", "-"))
+        write_bar_arrays(columnar.from_bars(instrument, instrumentBars[0].getFrequency(), instrumentBars), path)
+        ret[instrument] = path
+    return ret
+
+
+class BarCache(object):
+    """Keeps bars parsed from source files in binary files, so they can be memory-mapped instead of being parsed again.
+    Cached files are identified using the source path, its modification time and size, and the parser settings.
+
+    :param directory: The directory where cached files will be stored. It gets created if it doesn't exist.
+    :type directory: string.
+    """
+
+    def __init__(self, directory):
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self.__directory = directory
+
+    def getPath(self, path, settings):
+        """Returns the path to the cached file for a given source file and parser settings."""
+        stat = os.stat(path)
+        key = repr((os.path.abspath(path), stat.st_mtime, stat.st_size, settings))
+        return os.path.join(self.__directory, "%s.bars" % hashlib.sha1(key.encode("utf-8")).hexdigest())
+
+    def load(self, path, settings):
+        """Returns the cached :class:`pyalgotrade.barfeed.columnar.BarArrays` or None if they are not available."""
+        ret = None
+        cachedPath = self.getPath(path, settings)
+        if os.path.exists(cachedPath):
+            ret = read_bar_arrays(cachedPath)
+        return ret
+
+    def save(self, path, settings, barArrays):
+        """Stores bars in the cache. Returns False if the bars can't be stored in a binary file."""
+        if not can_write(barArrays):
+            return False
+
+        # Write into a temporary file first, so other processes never load a partially written file.
+        cachedPath = self.getPath(path, settings)
+        fd, tmpPath = tempfile.mkstemp(dir=self.__directory)
+        os.close(fd)
+        try:
+            write_bar_arrays(barArrays, tmpPath)
+            if os.path.exists(cachedPath):
+                os.remove(cachedPath)
+            os.rename(tmpPath, cachedPath)
+        finally:
+            if os.path.exists(tmpPath):
+                os.remove(tmpPath)
+        return True
+
+
+class Feed(columnar.BarFeed):
+    """A :class:`pyalgotrade.barfeed.columnar.BarFeed` that loads bars from binary files written with
+    :func:`write_bar_arrays` or :func:`write_barfeed`. Files are memory-mapped, so startup time doesn't depend on the
+    number of bars and processes loading the same files share memory.
+
+    :param frequency: The frequency of the bars. Check :class:`pyalgotrade.bar.Frequency`.
+    :param maxLen: The maximum number of values that the :class:`pyalgotrade.dataseries.bards.BarDataSeries` will hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    """
+
+    def __init__(self, frequency, maxLen=None):
+        super(Feed, self).__init__(frequency, maxLen)
+
+    def addBarsFromFile(self, path):
+        """Loads bars from a binary file. The instrument gets registered in the bar feed.
+
+        :param path: The path to the file.
+        :type path: string.
+        """
+        barArrays = read_bar_arrays(path)
+        if barArrays.getFrequency() != self.getFrequency():
+            raise Exception("Invalid frequency %s in %s" % (barArrays.getFrequency(), path))
+        self.addBarArrays(barArrays)
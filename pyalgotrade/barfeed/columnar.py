@@ -0,0 +1,343 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import numpy as np
+import pytz
+import six
+from six.moves import xrange
+
+from pyalgotrade import bar
+from pyalgotrade.barfeed import membf
+from pyalgotrade.utils import dt
+from pyalgotrade.instrument import build_instrument
+
+
+# Bars are stored using 8 bytes for the datetime and 8 bytes for each of open, high, low, close and volume. The
+# adjusted close takes another 8 bytes if available, so each bar takes 48 or 56 bytes.
+# For comparison, a list of bar.BasicBar instances takes around 550 bytes per bar (the bar, its datetime and the
+# float objects), or more if bars have extra columns.
+
+def datetime_to_timestamp(dateTime):
+    """Converts a datetime.datetime to microseconds since the epoch. Naive datetimes are converted as is and localized
+    datetimes are converted to UTC first."""
+    return dt.datetime_to_microseconds(dateTime)
+
+
+def timestamp_to_datetime(timestamp, timezone=None):
+    """Converts microseconds since the epoch into a datetime.datetime. If timezone is not None, the timestamp is
+    assumed to be in UTC and the datetime is adjusted to that timezone."""
+    return dt.microseconds_to_datetime(timestamp, timezone)
+
+
+def datetimes_to_timestamps(dateTimes):
+    """Converts a sequence of datetime.datetime into a numpy.array of int64 timestamps."""
+    return np.fromiter(
+        (datetime_to_timestamp(dateTime) for dateTime in dateTimes), dtype=np.int64, count=len(dateTimes)
+    )
+
+
+def _as_column(values, size, dtype=np.float64):
+    ret = np.asarray(values, dtype=dtype)
+    if ret.shape != (size,):
+        raise Exception("Invalid column length. Expected %d values and got %s" % (size, ret.shape))
+    return ret
+
+
+def _extra_column(values):
+    # Numeric columns are stored as floats using NaN for missing values. Anything else is stored as objects.
+    try:
+        return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.array(values, dtype=object)
+
+
+class BarArrays(object):
+    """Bars for a single instrument stored in contiguous NumPy arrays.
+    :class:`pyalgotrade.bar.Bar` instances are built only when requested.
+
+    :param instrument: Instrument identifier.
+    :type instrument: A :class:`pyalgotrade.instrument.Instrument` or a string formatted like
+        QUOTE_SYMBOL/PRICE_CURRENCY.
+    :param frequency: The frequency of the bars. Check :class:`pyalgotrade.bar.Frequency`.
+    :param timestamps: Bar datetimes as microseconds since the epoch. Check :func:`datetime_to_timestamp`.
+    :type timestamps: An int64 array-like.
+    :param open_: Opening prices.
+    :param high: Highest prices.
+    :param low: Lowest prices.
+    :param close: Closing prices.
+    :param volume: Volumes.
+    :param adjClose: Adjusted closing prices, or None if not available. NaN is used for missing values.
+    :param timezone: The timezone used to localize datetimes, or None if datetimes are naive. If set, timestamps are
+        expected to be in UTC.
+    :type timezone: A pytz timezone.
+    :param extra: A dictionary that maps extra column names to values. NaN or None are used for missing values.
+    :type extra: dict.
+    :param validate: True to sort bars by datetime if necessary and to check prices the same way
+        :class:`pyalgotrade.bar.BasicBar` does. Set to False only if arrays were already validated.
+    :type validate: boolean.
+    """
+
+    def __init__(
+        self, instrument, frequency, timestamps, open_, high, low, close, volume, adjClose=None, timezone=None,
+        extra={}, validate=True
+    ):
+        self.__instrument = build_instrument(instrument)
+        self.__frequency = frequency
+        self.__timezone = timezone
+        self.__timestamps = np.asarray(timestamps, dtype=np.int64)
+        size = len(self.__timestamps)
+        self.__open = _as_column(open_, size)
+        self.__high = _as_column(high, size)
+        self.__low = _as_column(low, size)
+        self.__close = _as_column(close, size)
+        self.__volume = _as_column(volume, size)
+        self.__adjClose = None
+        if adjClose is not None:
+            self.__adjClose = _as_column(adjClose, size)
+        self.__extra = {}
+        for name, values in six.iteritems(extra):
+            values = np.asarray(values)
+            if values.shape != (size,):
+                raise Exception("Invalid length for extra column %s" % name)
+            self.__extra[name] = values
+
+        if validate:
+            self.__sort()
+            self.__check()
+
+    def __sort(self):
+        if len(self.__timestamps) > 1 and np.any(self.__timestamps[1:] < self.__timestamps[:-1]):
+            order = np.argsort(self.__timestamps, kind="mergesort")
+            self.__timestamps = self.__timestamps[order]
+            self.__open = self.__open[order]
+            self.__high = self.__high[order]
+            self.__low = self.__low[order]
+            self.__close = self.__close[order]
+            self.__volume = self.__volume[order]
+            if self.__adjClose is not None:
+                self.__adjClose = self.__adjClose[order]
+            for name, values in six.iteritems(self.__extra):
+                self.__extra[name] = values[order]
+
+    def __check(self):
+        checks = [
+            (self.__high < self.__low, "high < low on %s"),
+            (self.__high < self.__open, "high < open on %s"),
+            (self.__high < self.__close, "high < close on %s"),
+            (self.__low > self.__open, "low > open on %s"),
+            (self.__low > self.__close, "low > close on %s"),
+        ]
+        for failed, msg in checks:
+            if failed.any():
+                raise Exception(msg % (self.getDateTime(int(np.argmax(failed)))))
+
+    def __len__(self):
+        return len(self.__timestamps)
+
+    def __getitem__(self, pos):
+        return self.getBar(pos)
+
+    def __iter__(self):
+        for pos in xrange(len(self)):
+            yield self.getBar(pos)
+
+    def getInstrument(self):
+        return self.__instrument
+
+    def getFrequency(self):
+        return self.__frequency
+
+    def getTimeZone(self):
+        return self.__timezone
+
+    def hasAdjClose(self):
+        return self.__adjClose is not None
+
+    def getTimestamps(self):
+        """Returns a numpy.array with the bar timestamps."""
+        return self.__timestamps
+
+    def getOpen(self):
+        return self.__open
+
+    def getHigh(self):
+        return self.__high
+
+    def getLow(self):
+        return self.__low
+
+    def getClose(self):
+        return self.__close
+
+    def getVolume(self):
+        return self.__volume
+
+    def getAdjClose(self):
+        """Returns a numpy.array with the adjusted closing prices, or None if not available."""
+        return self.__adjClose
+
+    def getExtraColumns(self):
+        return self.__extra
+
+    def getMemorySize(self):
+        """Returns the number of bytes used by the arrays."""
+        ret = self.__timestamps.nbytes + self.__open.nbytes + self.__high.nbytes + self.__low.nbytes + \
+            self.__close.nbytes + self.__volume.nbytes
+        if self.__adjClose is not None:
+            ret += self.__adjClose.nbytes
+        for values in self.__extra.values():
+            ret += values.nbytes
+        return ret
+
+    def getDateTime(self, pos):
+        return timestamp_to_datetime(self.__timestamps.item(pos), self.__timezone)
+
+    def getBar(self, pos):
+        """Builds the :class:`pyalgotrade.bar.BasicBar` at a given position."""
+        # item() returns Python scalars and NaN is checked using value != value since both are much faster than
+        # indexing and calling numpy.isnan.
+        adjClose = None
+        if self.__adjClose is not None:
+            adjClose = self.__adjClose.item(pos)
+            if adjClose != adjClose:
+                adjClose = None
+        extra = {}
+        for name, values in six.iteritems(self.__extra):
+            value = values.item(pos)
+            if value is None or (isinstance(value, float) and value != value):
+                continue
+            extra[name] = value
+        return bar.BasicBar(
+            self.__instrument, self.getDateTime(pos), self.__open.item(pos), self.__high.item(pos),
+            self.__low.item(pos), self.__close.item(pos), self.__volume.item(pos), adjClose, self.__frequency,
+            extra=extra
+        )
+
+    def merge(self, other):
+        """Returns a new :class:`BarArrays` with bars from both instances."""
+        if self.__instrument != other.getInstrument():
+            raise Exception("Can't merge bars for different instruments")
+        if self.__timezone != other.getTimeZone():
+            raise Exception("Can't merge bars with different timezones")
+
+        # Missing columns are filled with NaN.
+        def concat(left, right):
+            if left is None and right is None:
+                return None
+            if left is None:
+                left = np.full(len(self), np.nan)
+            if right is None:
+                right = np.full(len(other), np.nan)
+            return np.concatenate([left, right])
+
+        extra = {}
+        for name in set(self.__extra.keys()) | set(other.getExtraColumns().keys()):
+            extra[name] = concat(self.__extra.get(name), other.getExtraColumns().get(name))
+            if extra[name].dtype == object:
+                extra[name] = np.array([None if isinstance(v, float) and np.isnan(v) else v for v in extra[name]])
+
+        return BarArrays(
+            self.__instrument, self.__frequency,
+            np.concatenate([self.__timestamps, other.getTimestamps()]),
+            concat(self.__open, other.getOpen()),
+            concat(self.__high, other.getHigh()),
+            concat(self.__low, other.getLow()),
+            concat(self.__close, other.getClose()),
+            concat(self.__volume, other.getVolume()),
+            adjClose=concat(self.__adjClose, other.getAdjClose()),
+            timezone=self.__timezone,
+            extra=extra
+        )
+
+
+def from_bars(instrument, frequency, bars):
+    """Builds a :class:`BarArrays` from a sequence of :class:`pyalgotrade.bar.Bar` instances.
+
+    :param instrument: Instrument identifier.
+    :type instrument: A :class:`pyalgotrade.instrument.Instrument` or a string formatted like
+        QUOTE_SYMBOL/PRICE_CURRENCY.
+    :param frequency: The frequency of the bars. Check :class:`pyalgotrade.bar.Frequency`.
+    :param bars: A sequence of :class:`pyalgotrade.bar.Bar` instances.
+    """
+
+    bars = list(bars)
+    timezone = None
+    if len(bars) and not dt.datetime_is_naive(bars[0].getDateTime()):
+        timezone = bars[0].getDateTime().tzinfo
+        # Use the zone instead of the fixed offset returned by localize, so DST is handled properly.
+        zone = getattr(timezone, "zone", None)
+        if zone is not None:
+            timezone = pytz.timezone(zone)
+    for bar_ in bars:
+        if dt.datetime_is_naive(bar_.getDateTime()) != (timezone is None):
+            raise Exception("Can't mix naive and localized datetimes")
+
+    adjClose = None
+    if any(bar_.getAdjClose() is not None for bar_ in bars):
+        adjClose = [np.nan if bar_.getAdjClose() is None else bar_.getAdjClose() for bar_ in bars]
+
+    extraNames = set()
+    for bar_ in bars:
+        extraNames.update(bar_.getExtraColumns().keys())
+    extra = {}
+    for name in extraNames:
+        extra[name] = _extra_column([bar_.getExtraColumns().get(name) for bar_ in bars])
+
+    return BarArrays(
+        instrument, frequency,
+        datetimes_to_timestamps([bar_.getDateTime() for bar_ in bars]),
+        [bar_.getOpen() for bar_ in bars],
+        [bar_.getHigh() for bar_ in bars],
+        [bar_.getLow() for bar_ in bars],
+        [bar_.getClose() for bar_ in bars],
+        [bar_.getVolume() for bar_ in bars],
+        adjClose=adjClose,
+        timezone=timezone,
+        extra=extra
+    )
+
+
+class BarFeed(membf.BarFeed):
+    """A :class:`pyalgotrade.barfeed.membf.BarFeed` that holds bars in NumPy arrays instead of lists of
+    :class:`pyalgotrade.bar.Bar` instances. Bars are built as they get dispatched.
+
+    :param frequency: The frequency of the bars. Check :class:`pyalgotrade.bar.Frequency`.
+    :param maxLen: The maximum number of values that the :class:`pyalgotrade.dataseries.bards.BarDataSeries` will hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    """
+
+    def __init__(self, frequency, maxLen=None):
+        super(BarFeed, self).__init__(frequency, maxLen)
+        self.__haveAdjClose = None
+
+    def barsHaveAdjClose(self):
+        return bool(self.__haveAdjClose)
+
+    def addBarsFromSequence(self, instrument, bars):
+        self.addBarArrays(from_bars(instrument, self.getFrequency(), bars))
+
+    def addBarArrays(self, barArrays):
+        if self.__haveAdjClose is None:
+            self.__haveAdjClose = barArrays.hasAdjClose()
+        else:
+            self.__haveAdjClose = self.__haveAdjClose and barArrays.hasAdjClose()
+        super(BarFeed, self).addBarArrays(barArrays)
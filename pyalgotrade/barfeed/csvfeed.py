@@ -19,13 +19,16 @@
 """
 
 import datetime
+import re
 
+import numpy as np
 import pytz
 import six
 
 from pyalgotrade.utils import dt
 from pyalgotrade.utils import csvutils
 from pyalgotrade.barfeed import membf
+from pyalgotrade.barfeed import columnar
 from pyalgotrade import bar
 from pyalgotrade.instrument import build_instrument
 
@@ -44,12 +47,24 @@ class RowParser(object):
     def getDelimiter(self):
         raise NotImplementedError()
 
+    # Return the settings that affect the bars being parsed, or None if parsed bars can't be cached.
+    def getCacheKey(self):
+        return None
+
+    # Called when bars were loaded from a pyalgotrade.barfeed.binfeed.BarCache instead of being parsed.
+    def onCacheHit(self, barArrays):
+        pass
+
 
 # Interface for bar filters.
 class BarFilter(object):
     def includeBar(self, bar_):
         raise NotImplementedError()
 
+    # Return the settings that affect which bars get included, or None if filtered bars can't be cached.
+    def getCacheKey(self):
+        return None
+
 
 class DateRangeFilter(BarFilter):
     def __init__(self, fromDate=None, toDate=None):
@@ -63,6 +78,16 @@ class DateRangeFilter(BarFilter):
             return False
         return True
 
+    def getCacheKey(self):
+        ret = None
+        # Subclasses may include bars using other criteria.
+        if type(self) is DateRangeFilter:
+            ret = ("DateRangeFilter", self.__fromDate, self.__toDate)
+        return ret
+
+    def _getDateRange(self):
+        return self.__fromDate, self.__toDate
+
 
 # US Equities Regular Trading Hours filter
 # Monday ~ Friday
@@ -92,6 +117,12 @@ class USEquitiesRTH(DateRangeFilter):
                 return False
         return ret
 
+    def getCacheKey(self):
+        ret = None
+        if type(self) is USEquitiesRTH:
+            ret = ("USEquitiesRTH",) + self._getDateRange()
+        return ret
+
 
 class BarFeed(membf.BarFeed):
     """Base class for CSV file based :class:`pyalgotrade.barfeed.BarFeed`.
@@ -105,6 +136,7 @@ class BarFeed(membf.BarFeed):
 
         self.__barFilter = None
         self.__dailyTime = datetime.time(0, 0, 0)
+        self.__barCache = None
 
     def getDailyBarTime(self):
         return self.__dailyTime
@@ -118,6 +150,40 @@ class BarFeed(membf.BarFeed):
     def setBarFilter(self, barFilter):
         self.__barFilter = barFilter
 
+    def getBarCache(self):
+        return self.__barCache
+
+    def setBarCache(self, barCache):
+        """
+        Set a :class:`pyalgotrade.barfeed.binfeed.BarCache` to keep parsed bars in binary files. Files that were
+        already parsed using the same settings will be memory-mapped instead of being parsed again.
+        """
+        self.__barCache = barCache
+
+    # Returns the settings used to identify cached bars, or None if bars can't be cached.
+    def __getCacheSettings(self, parser, skipMalformedBars):
+        if self.__barCache is None:
+            return None
+        parserKey = parser.getCacheKey()
+        if parserKey is None:
+            return None
+        filterKey = None
+        if self.__barFilter is not None:
+            filterKey = self.__barFilter.getCacheKey()
+            if filterKey is None:
+                return None
+        return (parserKey, filterKey, skipMalformedBars)
+
+    # Returns True if bars were loaded from the cache.
+    def __loadFromCache(self, path, parser, cacheSettings):
+        barArrays = None
+        if cacheSettings is not None:
+            barArrays = self.__barCache.load(path, cacheSettings)
+        if barArrays is not None:
+            parser.onCacheHit(barArrays)
+            self.addBarArrays(barArrays)
+        return barArrays is not None
+
     def addBarsFromCSV(self, path, rowParser, skipMalformedBars=False):
         def parse_bar_skip_malformed(row):
             ret = None
@@ -127,6 +193,10 @@ class BarFeed(membf.BarFeed):
                 pass
             return ret
 
+        cacheSettings = self.__getCacheSettings(rowParser, skipMalformedBars)
+        if self.__loadFromCache(path, rowParser, cacheSettings):
+            return
+
         if skipMalformedBars:
             parse_bar = parse_bar_skip_malformed
         else:
@@ -142,8 +212,36 @@ class BarFeed(membf.BarFeed):
             if bar_ is not None and (self.__barFilter is None or self.__barFilter.includeBar(bar_)):
                 loadedBars.append(bar_)
 
+        if cacheSettings is not None:
+            self.__barCache.save(
+                path, cacheSettings, columnar.from_bars(rowParser.getInstrument(), self.getFrequency(), loadedBars)
+            )
         self.addBarsFromSequence(rowParser.getInstrument(), loadedBars)
 
+    def addBarArraysFromCSV(self, path, columnParser, skipMalformedBars=False):
+        # Same as addBarsFromCSV but the whole file is parsed column-wise and bars are kept in NumPy arrays.
+        if self.__barFilter is not None:
+            raise Exception("Bar filters are not supported when loading columns")
+
+        cacheSettings = self.__getCacheSettings(columnParser, skipMalformedBars)
+        if self.__loadFromCache(path, columnParser, cacheSettings):
+            return
+
+        with open(path, "r") as f:
+            _, columns = csvutils.read_columns(
+                f, fieldnames=columnParser.getFieldNames(), delimiter=columnParser.getDelimiter()
+            )
+        barArrays = columnParser.parseColumns(columns, skipMalformedBars)
+        if cacheSettings is not None:
+            self.__barCache.save(path, cacheSettings, barArrays)
+        self.addBarArrays(barArrays)
+
+
+def generic_cache_key(instrument, columnNames, dateTimeFormat, dailyBarTime, frequency, timezone):
+    return (
+        "generic", str(instrument), sorted(columnNames.items()), dateTimeFormat, dailyBarTime, frequency, str(timezone)
+    )
+
 
 class GenericRowParser(RowParser):
     def __init__(
@@ -190,6 +288,18 @@ class GenericRowParser(RowParser):
     def getDelimiter(self):
         return ","
 
+    def getCacheKey(self):
+        ret = None
+        if self.__barClass is bar.BasicBar:
+            ret = generic_cache_key(
+                self.__instrument, self.__columnNames, self.__dateTimeFormat, self.__dailyBarTime, self.__frequency,
+                self.__timezone
+            )
+        return ret
+
+    def onCacheHit(self, barArrays):
+        self.__haveAdjClose = barArrays.hasAdjClose()
+
     def parseBar(self, csvRowDict):
         dateTime = self._parseDate(csvRowDict[self.__dateTimeColName])
         open_ = float(csvRowDict[self.__openColName])
@@ -216,6 +326,156 @@ class GenericRowParser(RowParser):
         )
 
 
+# Parses whole CSV columns at once and builds a pyalgotrade.barfeed.columnar.BarArrays.
+# It supports the same settings as GenericRowParser, except for custom bar classes.
+class GenericColumnParser(object):
+    # Datetimes in this format are parsed by NumPy, which is a lot faster than calling strptime for each value.
+    FAST_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+    # NumPy accepts other formats as well, like a 'T' separator, so values are checked against this first.
+    FAST_DATETIME_REGEX = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$")
+
+    def __init__(self, instrument, columnNames, dateTimeFormat, dailyBarTime, frequency, timezone):
+        self.__instrument = build_instrument(instrument)
+        self.__dateTimeFormat = dateTimeFormat
+        self.__dailyBarTime = dailyBarTime
+        self.__frequency = frequency
+        self.__timezone = timezone
+        self.__haveAdjClose = False
+        self.__columnNames = columnNames
+
+    def getInstrument(self):
+        return self.__instrument
+
+    def barsHaveAdjClose(self):
+        return self.__haveAdjClose
+
+    def getFieldNames(self):
+        # It is expected for the first row to have the field names.
+        return None
+
+    def getDelimiter(self):
+        return ","
+
+    def getCacheKey(self):
+        # Bars are the same as the ones parsed by GenericRowParser, so cached files can be shared.
+        return generic_cache_key(
+            self.__instrument, self.__columnNames, self.__dateTimeFormat, self.__dailyBarTime, self.__frequency,
+            self.__timezone
+        )
+
+    def onCacheHit(self, barArrays):
+        self.__haveAdjClose = barArrays.hasAdjClose()
+
+    # Returns the UTC offset, in microseconds, for a naive datetime as a timestamp.
+    def __getUTCOffset(self, timestamp):
+        utcOffset = dt.localize(columnar.timestamp_to_datetime(timestamp), self.__timezone).utcoffset()
+        return (utcOffset.days * 24 * 60 * 60 + utcOffset.seconds) * 1000000 + utcOffset.microseconds
+
+    def _parseDates(self, values, malformed):
+        ret = None
+        fastRegex = GenericColumnParser.FAST_DATETIME_REGEX
+        if self.__dateTimeFormat == GenericColumnParser.FAST_DATETIME_FORMAT and \
+                all(fastRegex.match(value) for value in values):
+            try:
+                ret = np.array(values, dtype="datetime64[us]").astype(np.int64)
+            except ValueError:
+                pass
+
+        if ret is None:
+            ret = np.zeros(len(values), dtype=np.int64)
+            for i, value in enumerate(values):
+                try:
+                    ret[i] = columnar.datetime_to_timestamp(datetime.datetime.strptime(value, self.__dateTimeFormat))
+                except ValueError:
+                    if malformed is None:
+                        raise
+                    malformed[i] = True
+
+        if self.__dailyBarTime is not None:
+            dayLength = 24 * 60 * 60 * 1000000
+            timeOfDay = datetime.datetime.combine(datetime.date(1970, 1, 1), self.__dailyBarTime)
+            ret = ret - ret % dayLength + columnar.datetime_to_timestamp(timeOfDay)
+
+        # Localize the datetimes if a timezone was given, and adjust timestamps to UTC. Datetimes are localized like
+        # GenericRowParser does. The offset is looked up at the beginning and at the end of each hour, and if those
+        # don't match, because the offset changes during that hour and not necessarily on the hour, each datetime in
+        # that hour is localized.
+        if self.__timezone:
+            hourLength = 60 * 60 * 1000000
+            hours, inverse = np.unique(ret // hourLength, return_inverse=True)
+            hourOffsets = np.zeros(len(hours), dtype=np.int64)
+            changing = np.zeros(len(hours), dtype=bool)
+            for i, hour in enumerate(hours.tolist()):
+                hourOffsets[i] = self.__getUTCOffset(hour * hourLength)
+                changing[i] = hourOffsets[i] != self.__getUTCOffset((hour + 1) * hourLength - 1)
+            offsets = hourOffsets[inverse]
+            for pos in np.flatnonzero(changing[inverse]).tolist():
+                offsets[pos] = self.__getUTCOffset(ret.item(pos))
+            ret = ret - offsets
+        return ret
+
+    def _parseFloats(self, values, malformed):
+        try:
+            return np.array(values, dtype=np.float64)
+        except ValueError:
+            if malformed is None:
+                raise
+
+        ret = np.zeros(len(values))
+        for i, value in enumerate(values):
+            try:
+                ret[i] = float(value)
+            except ValueError:
+                malformed[i] = True
+        return ret
+
+    def parseColumns(self, columns, skipMalformedBars=False):
+        size = len(columns[self.__columnNames["datetime"]])
+        malformed = None
+        if skipMalformedBars:
+            malformed = np.zeros(size, dtype=bool)
+
+        timestamps = self._parseDates(columns[self.__columnNames["datetime"]], malformed)
+        open_ = self._parseFloats(columns[self.__columnNames["open"]], malformed)
+        high = self._parseFloats(columns[self.__columnNames["high"]], malformed)
+        low = self._parseFloats(columns[self.__columnNames["low"]], malformed)
+        close = self._parseFloats(columns[self.__columnNames["close"]], malformed)
+        volume = self._parseFloats(columns[self.__columnNames["volume"]], malformed)
+        adjClose = None
+        adjCloseColName = self.__columnNames["adj_close"]
+        if adjCloseColName is not None and adjCloseColName in columns:
+            values = columns[adjCloseColName]
+            if any(len(value) > 0 for value in values):
+                adjClose = self._parseFloats([value if len(value) else "nan" for value in values], malformed)
+                self.__haveAdjClose = True
+
+        # Process extra columns.
+        extra = {}
+        for name, values in six.iteritems(columns):
+            if name not in self.__columnNames.values():
+                try:
+                    extra[name] = np.array(values, dtype=np.float64)
+                except ValueError:
+                    extra[name] = np.array([csvutils.float_or_string(value) for value in values], dtype=object)
+
+        # Skip malformed bars, including those with invalid prices.
+        if malformed is not None:
+            malformed |= (high < low) | (high < open_) | (high < close) | (low > open_) | (low > close)
+            valid = ~malformed
+            timestamps, open_, high, low, close, volume = [
+                values[valid] for values in (timestamps, open_, high, low, close, volume)
+            ]
+            if adjClose is not None:
+                adjClose = adjClose[valid]
+            for name in extra:
+                extra[name] = extra[name][valid]
+
+        return columnar.BarArrays(
+            self.__instrument, self.__frequency, timestamps, open_, high, low, close, volume, adjClose=adjClose,
+            timezone=self.__timezone or None, extra=extra
+        )
+
+
 class GenericBarFeed(BarFeed):
     """A BarFeed that loads bars from CSV files that have the following format:
     ::
@@ -249,6 +509,7 @@ class GenericBarFeed(BarFeed):
         self.__haveAdjClose = False
 
         self.__barClass = bar.BasicBar
+        self.__bulkLoad = False
 
         self.__dateTimeFormat = "%Y-%m-%d %H:%M:%S"
         self.__columnNames = {
@@ -283,6 +544,16 @@ class GenericBarFeed(BarFeed):
     def setBarClass(self, barClass):
         self.__barClass = barClass
 
+    def setBulkLoad(self, bulkLoad):
+        """
+        Parse CSV files column-wise using NumPy and keep bars in a :class:`pyalgotrade.barfeed.columnar.BarArrays`
+        instead of parsing rows one by one. Datetimes in the default format are converted in batch.
+
+        .. note::
+            Files are parsed row by row if a bar filter or a custom bar class is set.
+        """
+        self.__bulkLoad = bulkLoad
+
     def addBarsFromCSV(self, instrument, path, timezone=None, skipMalformedBars=False):
         """Loads bars for a given instrument from a CSV formatted file.
         The instrument gets registered in the bar feed.
@@ -302,12 +573,18 @@ class GenericBarFeed(BarFeed):
             timezone = self.__timezone
 
         instrument = build_instrument(instrument)
-        rowParser = GenericRowParser(
-            instrument, self.__columnNames, self.__dateTimeFormat, self.getDailyBarTime(),
-            self.getFrequency(), timezone, self.__barClass
-        )
-
-        super(GenericBarFeed, self).addBarsFromCSV(path, rowParser, skipMalformedBars=skipMalformedBars)
+        if self.__bulkLoad and self.__barClass is bar.BasicBar and self.getBarFilter() is None:
+            rowParser = GenericColumnParser(
+                instrument, self.__columnNames, self.__dateTimeFormat, self.getDailyBarTime(),
+                self.getFrequency(), timezone
+            )
+            self.addBarArraysFromCSV(path, rowParser, skipMalformedBars=skipMalformedBars)
+        else:
+            rowParser = GenericRowParser(
+                instrument, self.__columnNames, self.__dateTimeFormat, self.getDailyBarTime(),
+                self.getFrequency(), timezone, self.__barClass
+            )
+            super(GenericBarFeed, self).addBarsFromCSV(path, rowParser, skipMalformedBars=skipMalformedBars)
 
         if rowParser.barsHaveAdjClose():
             self.__haveAdjClose = True
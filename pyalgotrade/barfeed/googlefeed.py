@@ -84,6 +84,12 @@ class RowParser(csvfeed.RowParser):
     def getDelimiter(self):
         return ","
 
+    def getCacheKey(self):
+        return (
+            "google", str(self.__instrument), self.__dailyBarTime, self.__frequency, str(self.__timezone),
+            self.__sanitize
+        )
+
     def parseBar(self, csvRowDict):
         dateTime = self.__parseDate(csvRowDict["Date"])
         close = float(csvRowDict["Close"])
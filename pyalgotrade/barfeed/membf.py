@@ -18,14 +18,22 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import heapq
+
 import six
 
 from pyalgotrade import barfeed
 from pyalgotrade import bar
-from pyalgotrade import utils
 from pyalgotrade.instrument import build_instrument
 
 
+# Bars for an instrument are stored either in one of these or in a pyalgotrade.barfeed.columnar.BarArrays.
+# Both support len(), getDateTime(pos) and [pos] to get the bar.
+class _BarList(list):
+    def getDateTime(self, pos):
+        return self[pos].getDateTime()
+
+
 # A non real-time BarFeed responsible for:
 # - Holding bars in memory.
 # - Aligning them with respect to time.
@@ -41,6 +49,19 @@ class BarFeed(barfeed.BaseBarFeed):
         self.__nextPos = {}
         self.__started = False
         self.__currDateTime = None
+        # Priority queue with (next datetime, instrument position, instrument) for instruments with bars left.
+        # It gets built lazily and it is rebuilt every time bars are added or the feed is reset.
+        self.__heap = None
+
+    def __getHeap(self):
+        if self.__heap is None:
+            self.__heap = []
+            for pos, (instrument, bars) in enumerate(six.iteritems(self.__bars)):
+                nextPos = self.__nextPos[instrument]
+                if nextPos < len(bars):
+                    self.__heap.append((bars.getDateTime(nextPos), pos, instrument))
+            heapq.heapify(self.__heap)
+        return self.__heap
 
     # BEGIN observer.Subject abstractmethods
     def start(self):
@@ -54,22 +75,14 @@ class BarFeed(barfeed.BaseBarFeed):
         pass
 
     def eof(self):
-        ret = True
         # Check if there is at least one more bar to return.
-        for instrument, bars in six.iteritems(self.__bars):
-            nextPos = self.__nextPos[instrument]
-            if nextPos < len(bars):
-                ret = False
-                break
-        return ret
+        return len(self.__getHeap()) == 0
 
     def peekDateTime(self):
         ret = None
-
-        for instrument, bars in six.iteritems(self.__bars):
-            nextPos = self.__nextPos[instrument]
-            if nextPos < len(bars):
-                ret = utils.safe_min(ret, bars[nextPos].getDateTime())
+        heap = self.__getHeap()
+        if len(heap):
+            ret = heap[0][0]
         return ret
     # END observer.Subject abstractmethods
 
@@ -84,18 +97,30 @@ class BarFeed(barfeed.BaseBarFeed):
         if smallestDateTime is None:
             return None
 
-        # Make a second pass to get all the bars that have the smallest datetime.
+        # Pop all the instruments that have the smallest datetime. Ties are sorted by instrument position, so bars
+        # are returned in the same order as the instruments were added.
+        heap = self.__getHeap()
+        due = []
+        while len(heap) and heap[0][0] == smallestDateTime:
+            due.append(heapq.heappop(heap))
+
         ret = []
-        for instrument, bars in six.iteritems(self.__bars):
+        for _, pos, instrument in due:
+            # Check if there are duplicate bars (with the same datetime).
+            if self.__currDateTime == smallestDateTime:
+                raise Exception("Duplicate bars found for %s on %s" % (instrument, smallestDateTime))
+            nextPos = self.__nextPos[instrument]
+            bar_ = self.__bars[instrument][nextPos]
+            assert bar_.getInstrument() == instrument, "%s != %s" % (bar_.getInstrument(), instrument)
+            ret.append(bar_)
+            self.__nextPos[instrument] = nextPos + 1
+
+        # Reschedule instruments once all bars were collected.
+        for _, pos, instrument in due:
+            bars = self.__bars[instrument]
             nextPos = self.__nextPos[instrument]
-            if nextPos < len(bars) and bars[nextPos].getDateTime() == smallestDateTime:
-                # Check if there are duplicate bars (with the same datetime).
-                if self.__currDateTime == smallestDateTime:
-                    raise Exception("Duplicate bars found for %s on %s" % (instrument, smallestDateTime))
-                assert bars[nextPos].getInstrument() == instrument, \
-                    "%s != %s" % (bars[nextPos].getInstrument(), instrument)
-                ret.append(bars[nextPos])
-                self.__nextPos[instrument] += 1
+            if nextPos < len(bars):
+                heapq.heappush(heap, (bars.getDateTime(nextPos), pos, instrument))
 
         self.__currDateTime = smallestDateTime
         return bar.Bars(ret)
@@ -106,6 +131,7 @@ class BarFeed(barfeed.BaseBarFeed):
         for instrument in self.__bars.keys():
             self.__nextPos.setdefault(instrument, 0)
         self.__currDateTime = None
+        self.__heap = None
         super(BarFeed, self).reset()
 
     def addBarsFromSequence(self, instrument, bars):
@@ -113,15 +139,37 @@ class BarFeed(barfeed.BaseBarFeed):
             raise Exception("Can't add more bars once you started consuming bars")
 
         instrument = build_instrument(instrument)
-        self.__bars.setdefault(instrument, [])
         self.__nextPos.setdefault(instrument, 0)
 
         # Add and sort the bars
-        self.__bars[instrument].extend(bars)
-        self.__bars[instrument].sort(key=lambda b: b.getDateTime())
+        instrumentBars = _BarList(self.__bars.get(instrument, []))
+        instrumentBars.extend(bars)
+        instrumentBars.sort(key=lambda b: b.getDateTime())
+        self.__bars[instrument] = instrumentBars
+        self.__heap = None
 
         self.registerDataSeries(instrument)
 
+    def addBarArrays(self, barArrays):
+        """Adds bars for an instrument stored in a :class:`pyalgotrade.barfeed.columnar.BarArrays`.
+        Bars will be built as they get dispatched.
+        """
+        if self.__started:
+            raise Exception("Can't add more bars once you started consuming bars")
+
+        instrument = barArrays.getInstrument()
+        currentBars = self.__bars.get(instrument)
+        if currentBars is None:
+            self.__nextPos.setdefault(instrument, 0)
+            self.__bars[instrument] = barArrays
+            self.__heap = None
+            self.registerDataSeries(instrument)
+        elif isinstance(currentBars, _BarList):
+            self.addBarsFromSequence(instrument, barArrays)
+        else:
+            self.__bars[instrument] = currentBars.merge(barArrays)
+            self.__heap = None
+
     def loadAll(self):
         for dateTime, bars in self:
             pass
@@ -96,6 +96,9 @@ class RowParser(csvfeed.RowParser):
     def getDelimiter(self):
         return ";"
 
+    def getCacheKey(self):
+        return ("ninjatrader", str(self.__instrument), self.__frequency, self.__dailyBarTime, str(self.__timezone))
+
     def parseBar(self, csvRowDict):
         dateTime = self.__parseDateTime(csvRowDict["Date Time"])
         close = float(csvRowDict["Close"])
@@ -78,6 +78,15 @@ class RowParser(csvfeed.RowParser):
     def getDelimiter(self):
         return ","
 
+    def getCacheKey(self):
+        ret = None
+        if self.__barClass is bar.BasicBar:
+            ret = (
+                "yahoo", str(self.__instrument), self.__dailyBarTime, self.__frequency, str(self.__timezone),
+                self.__sanitize
+            )
+        return ret
+
     def parseBar(self, csvRowDict):
         dateTime = self.__parseDate(csvRowDict["Date"])
         close = float(csvRowDict["Close"])
@@ -20,11 +20,13 @@
 
 import abc
 
+import numpy as np
 import six
 from six.moves import xrange
 
 from pyalgotrade import observer
 from pyalgotrade.utils import collections
+from pyalgotrade.utils import dt
 
 DEFAULT_MAX_LEN = 1024
 
@@ -147,3 +149,146 @@ class SequenceDataSeries(DataSeries):
 
     def getDateTimes(self):
         return self.__dateTimes.data()
+
+
+class NumericDataSeries(DataSeries):
+    """A DataSeries that holds numbers in numpy arrays, along with datetimes stored as int64 microseconds since the
+    epoch. Values can be retrieved as numpy arrays without copying them.
+
+    :param maxLen: The maximum number of values to hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    :param dtype: The data type for the values: numpy.float64, numpy.float32 or numpy.int64.
+    :type dtype: data-type.
+
+    .. note::
+        * None values are stored as NaN, and NaN values are returned as None. None values are not supported with
+          numpy.int64.
+        * Localized datetimes are stored in UTC, and returned adjusted to the timezone of the first one.
+    """
+
+    # Stored instead of the timestamp when the datetime is None.
+    NO_DATETIME = np.iinfo(np.int64).min
+
+    def __init__(self, maxLen=None, dtype=np.float64):
+        super(NumericDataSeries, self).__init__()
+        maxLen = get_checked_max_len(maxLen)
+        dtype = np.dtype(dtype)
+        if dtype not in (np.dtype(np.float64), np.dtype(np.float32), np.dtype(np.int64)):
+            raise Exception("Invalid dtype %s" % dtype)
+
+        self.__newValueEvent = observer.Event()
+        self.__isFloat = dtype.kind == "f"
+        self.__values = collections.NumPyDeque(maxLen, dtype)
+        self.__timestamps = collections.NumPyDeque(maxLen, np.int64)
+        self.__timeZone = None
+
+    def __len__(self):
+        return len(self.__values)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            values = self.__values.data()[key].tolist()
+            if self.__isFloat:
+                values = [None if value != value else value for value in values]
+            return values
+        return super(NumericDataSeries, self).__getitem__(key)
+
+    def setMaxLen(self, maxLen):
+        """Sets the maximum number of values to hold and resizes accordingly if necessary."""
+        self.__values.resize(maxLen)
+        self.__timestamps.resize(maxLen)
+
+    def getMaxLen(self):
+        """Returns the maximum number of values to hold."""
+        return self.__values.getMaxLen()
+
+    def getDType(self):
+        """Returns the data type for the values."""
+        return self.__values.data().dtype
+
+    # Event handler receives:
+    # 1: Dataseries generating the event
+    # 2: The datetime for the new value
+    # 3: The new value
+    def getNewValueEvent(self):
+        return self.__newValueEvent
+
+    def getValueAbsolute(self, pos):
+        ret = None
+        if pos >= 0 and pos < len(self.__values):
+            ret = self.__values.data().item(pos)
+            if ret != ret:
+                ret = None
+        return ret
+
+    def append(self, value):
+        """Appends a value."""
+        self.appendWithDateTime(None, value)
+
+    def appendWithDateTime(self, dateTime, value):
+        """
+        Appends a value with an associated datetime.
+
+        .. note::
+            If dateTime is not None, it must be greater than the last one.
+        """
+
+        if dateTime is None:
+            timestamp = NumericDataSeries.NO_DATETIME
+        else:
+            timestamp = dt.datetime_to_microseconds(dateTime)
+            if len(self.__timestamps) != 0 and timestamp < self.__timestamps[-1]:
+                raise Exception("Invalid datetime %s. It must be bigger than or equal to the last one %s" % (
+                    dateTime, self.getDateTimes()[-1]
+                ))
+            if self.__timeZone is None and not dt.datetime_is_naive(dateTime):
+                self.__timeZone = dateTime.tzinfo
+
+        if value is None:
+            if not self.__isFloat:
+                raise Exception("None values are not supported with dtype %s" % self.getDType())
+            self.__values.append(np.nan)
+        else:
+            self.__values.append(value)
+        self.__timestamps.append(timestamp)
+
+        self.getNewValueEvent().emit(self, dateTime, value)
+
+    def getDateTimes(self):
+        return [
+            None if timestamp == NumericDataSeries.NO_DATETIME else
+            dt.microseconds_to_datetime(timestamp, self.__timeZone)
+            for timestamp in self.__timestamps.data().tolist()
+        ]
+
+    def asArray(self, count=None):
+        """Returns a numpy.array with the last values, or with all of them if count is None. Missing values are NaN.
+
+        :param count: The number of values to return. If there are fewer values, all of them are returned.
+        :type count: int.
+
+        .. note::
+            The array is a view on the values held, so it is not copied, and it gets overwritten as new values are
+            appended. It must not be modified, and it has to be copied to keep the values.
+        """
+        ret = self.__values.data()
+        if count is not None:
+            ret = ret[-count:] if count > 0 else ret[0:0]
+        return ret
+
+    def dateTimesArray(self, count=None):
+        """Returns a numpy.array of int64 with the datetimes for the last values, as microseconds since the epoch in UTC
+        for localized datetimes. Missing datetimes are NumericDataSeries.NO_DATETIME.
+
+        :param count: The number of datetimes to return. If there are fewer values, all of them are returned.
+        :type count: int.
+
+        .. note::
+            Like :meth:`asArray`, the array is a view that gets overwritten as new values are appended.
+        """
+        ret = self.__timestamps.data()
+        if count is not None:
+            ret = ret[-count:] if count > 0 else ret[0:0]
+        return ret
@@ -40,6 +40,20 @@ def datetime_aligned(ds1, ds2, maxLen=None):
     return (aligned1, aligned2)
 
 
+def subscribe_aligned(ds1, ds2, handler):
+    """
+    Calls handler with the values for every datetime in both dataseries, like :func:`datetime_aligned` does, without
+    adding them to other dataseries.
+
+    :param ds1: A DataSeries instance.
+    :type ds1: :class:`DataSeries`.
+    :param ds2: A DataSeries instance.
+    :type ds2: :class:`DataSeries`.
+    :param handler: A function that receives the datetime, the value from ds1 and the value from ds2.
+    """
+    _HandlerSyncer(ds1, ds2, handler)
+
+
 # This class is responsible for filling 2 dataseries when 2 other dataseries get new values.
 class Syncer(object):
     def __init__(self, sourceDS1, sourceDS2, destDS1, destDS2):
@@ -70,7 +84,7 @@ class Syncer(object):
         # second one
         # then append to both destination dataseries.
         if pos2 is not None:
-            self.__append(dateTime, value, self.__values2[pos2][1])
+            self.onAligned(dateTime, value, self.__values2[pos2][1])
             # Reset buffers.
             self.__values1 = []
             self.__values2 = self.__values2[pos2+1:]
@@ -84,7 +98,7 @@ class Syncer(object):
         # first one
         # then append to both destination dataseries.
         if pos1 is not None:
-            self.__append(dateTime, self.__values1[pos1][1], value)
+            self.onAligned(dateTime, self.__values1[pos1][1], value)
             # Reset buffers.
             self.__values1 = self.__values1[pos1+1:]
             self.__values2 = []
@@ -92,6 +106,17 @@ class Syncer(object):
             # Since source dataseries may not hold all the values we need, we need to buffer manually.
             self.__values2.append((dateTime, value))
 
-    def __append(self, dateTime, value1, value2):
+    # Called with the values for a datetime that is in both dataseries.
+    def onAligned(self, dateTime, value1, value2):
         self.__destDS1.appendWithDateTime(dateTime, value1)
         self.__destDS2.appendWithDateTime(dateTime, value2)
+
+
+# Calls a function with the aligned values instead of filling 2 dataseries.
+class _HandlerSyncer(Syncer):
+    def __init__(self, sourceDS1, sourceDS2, handler):
+        super(_HandlerSyncer, self).__init__(sourceDS1, sourceDS2, None, None)
+        self.__handler = handler
+
+    def onAligned(self, dateTime, value1, value2):
+        self.__handler(dateTime, value1, value2)
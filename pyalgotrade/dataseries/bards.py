@@ -19,15 +19,96 @@
 """
 
 from pyalgotrade import dataseries
+from pyalgotrade import observer
 from pyalgotrade.bar import Frequency
 from pyalgotrade.instrument import build_instrument
+from pyalgotrade.utils import collections
 
-import six
+
+class ColumnDataSeries(dataseries.DataSeries):
+    """A DataSeries with the values of a column in a :class:`BarDataSeries`. Values are not copied, but read from
+    the :class:`BarDataSeries` that created it.
+
+    .. note::
+        Instances are created by :class:`BarDataSeries` and should not be created directly.
+    """
+
+    def __init__(self, barDataSeries):
+        super(ColumnDataSeries, self).__init__()
+        self.__barDataSeries = barDataSeries
+        self.__newValueEvent = None
+
+    def __len__(self):
+        return len(self.__barDataSeries)
+
+    def getBarDataSeries(self):
+        return self.__barDataSeries
+
+    def getMaxLen(self):
+        return self.__barDataSeries.getMaxLen()
+
+    def getDateTimes(self):
+        return self.__barDataSeries.getDateTimes()
+
+    # Event handler receives:
+    # 1: Dataseries generating the event
+    # 2: The datetime for the new value
+    # 3: The new value
+    def getNewValueEvent(self):
+        # The event is created when requested, so values are emitted only if someone may be listening.
+        if self.__newValueEvent is None:
+            self.__newValueEvent = observer.Event()
+        return self.__newValueEvent
+
+    def emitNewValue(self, dateTime):
+        if self.__newValueEvent is not None:
+            self.__newValueEvent.emit(self, dateTime, self.getValueAbsolute(len(self) - 1))
+
+
+class PriceDataSeries(ColumnDataSeries):
+    """A :class:`ColumnDataSeries` for the open, high, low, close, volume or adjusted close values, held in numpy
+    arrays. Missing values are stored as NaN and returned as None."""
+
+    def __init__(self, barDataSeries, columns, column):
+        super(PriceDataSeries, self).__init__(barDataSeries)
+        self.__columns = columns
+        self.__column = column
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [None if value != value else value for value in self.asArray()[key].tolist()]
+        return super(PriceDataSeries, self).__getitem__(key)
+
+    def getValueAbsolute(self, pos):
+        ret = None
+        if pos >= 0 and pos < len(self):
+            ret = self.__columns.column(self.__column).item(pos)
+            if ret != ret:
+                ret = None
+        return ret
+
+    def asArray(self, count=None):
+        """Returns a numpy.array with the last values, or with all of them if count is None. Missing values are NaN.
+
+        :param count: The number of values to return. If there are fewer values, all of them are returned.
+        :type count: int.
+
+        .. note::
+            The array is a view on the values held, so it is not copied, and it gets overwritten as new values are
+            appended. It must not be modified, and it has to be copied to keep the values.
+        """
+        ret = self.__columns.column(self.__column)
+        if count is not None:
+            ret = ret[-count:] if count > 0 else ret[0:0]
+        return ret
 
 
 class BarDataSeries(dataseries.SequenceDataSeries):
     """A DataSeries of :class:`pyalgotrade.bar.Bar` instances. All bars must have the same frequency.
 
+    Open, high, low, close, volume and adjusted close values are stored in a single buffer, and the DataSeries for
+    each of those columns are created when first requested.
+
     :param instrument: Instrument identifier.
     :type instrument: A :class:`pyalgotrade.instrument.Instrument` or a string formatted like
             QUOTE_SYMBOL/PRICE_CURRENCY.
@@ -37,18 +118,26 @@ class BarDataSeries(dataseries.SequenceDataSeries):
     :type maxLen: int.
     """
 
+    OPEN, HIGH, LOW, CLOSE, VOLUME, ADJ_CLOSE = range(6)
+    # New values are emitted in this order.
+    __EMIT_ORDER = (OPEN, CLOSE, HIGH, LOW, VOLUME, ADJ_CLOSE)
+
     def __init__(self, instrument, maxLen=None):
         super(BarDataSeries, self).__init__(maxLen)
         self._instrument = build_instrument(instrument)
-        self._openDS = dataseries.SequenceDataSeries(maxLen)
-        self._closeDS = dataseries.SequenceDataSeries(maxLen)
-        self._highDS = dataseries.SequenceDataSeries(maxLen)
-        self._lowDS = dataseries.SequenceDataSeries(maxLen)
-        self._volumeDS = dataseries.SequenceDataSeries(maxLen)
-        self._adjCloseDS = dataseries.SequenceDataSeries(maxLen)
+        self.__columns = collections.NumPyColumnsDeque(self.getMaxLen(), 6)
+        # Column DataSeries created so far.
+        self.__columnDS = {}
         self._extraDS = {}
         self._useAdjustedValues = False
 
+    def __getColumnDS(self, column):
+        ret = self.__columnDS.get(column)
+        if ret is None:
+            ret = PriceDataSeries(self, self.__columns, column)
+            self.__columnDS[column] = ret
+        return ret
+
     def _getOrCreateExtraDS(self, name):
         ret = self._extraDS.get(name)
         if ret is None:
@@ -56,12 +145,27 @@ class BarDataSeries(dataseries.SequenceDataSeries):
             self._extraDS[name] = ret
         return ret
 
+    # Column DataSeries used to be held in these attributes, so they are kept for subclasses.
+    _openDS = property(lambda self: self.getOpenDataSeries())
+    _closeDS = property(lambda self: self.getCloseDataSeries())
+    _highDS = property(lambda self: self.getHighDataSeries())
+    _lowDS = property(lambda self: self.getLowDataSeries())
+    _volumeDS = property(lambda self: self.getVolumeDataSeries())
+    _adjCloseDS = property(lambda self: self.getAdjCloseDataSeries())
+
     def getInstrument(self):
         return self._instrument
 
     def setUseAdjustedValues(self, useAdjusted):
         self._useAdjustedValues = useAdjusted
 
+    def setMaxLen(self, maxLen):
+        """Sets the maximum number of values to hold and resizes accordingly if necessary."""
+        super(BarDataSeries, self).setMaxLen(maxLen)
+        self.__columns.resize(maxLen)
+        for extraDS in self._extraDS.values():
+            extraDS.setMaxLen(maxLen)
+
     def append(self, bar):
         self.appendWithDateTime(bar.getDateTime(), bar)
 
@@ -91,50 +195,52 @@ class BarDataSeries(dataseries.SequenceDataSeries):
                         bar.getInstrument(), prev_bar.getDateTime(), bar.getDateTime()
                     ))
 
+        # Columns are stored first, so they're in sync with the bars when the new value event is emitted.
+        self.__columns.append((
+            bar.getOpen(), bar.getHigh(), bar.getLow(), bar.getClose(), bar.getVolume(), bar.getAdjClose()
+        ))
         super(BarDataSeries, self).appendWithDateTime(dateTime, bar)
 
-        self._openDS.appendWithDateTime(dateTime, bar.getOpen())
-        self._closeDS.appendWithDateTime(dateTime, bar.getClose())
-        self._highDS.appendWithDateTime(dateTime, bar.getHigh())
-        self._lowDS.appendWithDateTime(dateTime, bar.getLow())
-        self._volumeDS.appendWithDateTime(dateTime, bar.getVolume())
-        self._adjCloseDS.appendWithDateTime(dateTime, bar.getAdjClose())
+        # Handlers may request other columns, so the dictionary is not iterated.
+        for column in BarDataSeries.__EMIT_ORDER:
+            columnDS = self.__columnDS.get(column)
+            if columnDS is not None:
+                columnDS.emitNewValue(dateTime)
 
-        # Process extra columns.
-        for name, value in six.iteritems(bar.getExtraColumns()):
-            extraDS = self._getOrCreateExtraDS(name)
-            extraDS.appendWithDateTime(dateTime, value)
+        # Extra columns hold values only for the bars that have them.
+        for name, value in list(bar.getExtraColumns().items()):
+            self._getOrCreateExtraDS(name).appendWithDateTime(dateTime, value)
 
     def getOpenDataSeries(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the open prices."""
-        return self._openDS
+        return self.__getColumnDS(BarDataSeries.OPEN)
 
     def getCloseDataSeries(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the close prices."""
-        return self._closeDS
+        return self.__getColumnDS(BarDataSeries.CLOSE)
 
     def getHighDataSeries(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the high prices."""
-        return self._highDS
+        return self.__getColumnDS(BarDataSeries.HIGH)
 
     def getLowDataSeries(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the low prices."""
-        return self._lowDS
+        return self.__getColumnDS(BarDataSeries.LOW)
 
     def getVolumeDataSeries(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the volume."""
-        return self._volumeDS
+        return self.__getColumnDS(BarDataSeries.VOLUME)
 
     def getAdjCloseDataSeries(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the adjusted close prices."""
-        return self._adjCloseDS
+        return self.__getColumnDS(BarDataSeries.ADJ_CLOSE)
 
     def getPriceDataSeries(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the close or adjusted close prices."""
         if self._useAdjustedValues:
-            return self._adjCloseDS
+            return self.getAdjCloseDataSeries()
         else:
-            return self._closeDS
+            return self.getCloseDataSeries()
 
     def getExtraDataSeries(self, name):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` for an extra column."""
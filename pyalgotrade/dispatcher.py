@@ -18,11 +18,19 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import heapq
+import itertools
+
 from pyalgotrade import utils
 from pyalgotrade import observer
 from pyalgotrade import dispatchprio
 
 
+# The number of subjects from which the priority queue is used, if the dispatcher decides. With fewer subjects
+# scanning them is faster.
+HEAP_MIN_SUBJECTS = 4
+
+
 # This class is responsible for dispatching events from multiple subjects, synchronizing them if necessary.
 class Dispatcher(object):
     def __init__(self):
@@ -31,6 +39,12 @@ class Dispatcher(object):
         self.__startEvent = observer.Event()
         self.__idleEvent = observer.Event()
         self.__currDateTime = None
+        self.__useHeap = False
+        # Used when dispatching with a priority queue.
+        self.__heap = None
+        self.__heapCounter = None
+        self.__polled = None
+        self.__positions = {}
 
     # Returns the current event datetime. It may be None for events from realtime subjects.
     def getCurrentDateTime(self):
@@ -45,6 +59,17 @@ class Dispatcher(object):
     def stop(self):
         self.__stop = True
 
+    # Keep subjects in a priority queue keyed on their next datetime, instead of scanning every subject twice on each
+    # cycle. Dispatch order and priorities are preserved. This should be set before running the dispatcher.
+    # Subjects that return a datetime from peekDateTime are expected to keep returning it until they dispatch.
+    # Realtime subjects (those that return None) and subjects that hit eof are polled on every cycle.
+    # If None, the priority queue is used if there are at least HEAP_MIN_SUBJECTS subjects.
+    def setUseHeap(self, useHeap):
+        self.__useHeap = useHeap
+
+    def getUseHeap(self):
+        return self.__useHeap
+
     def getSubjects(self):
         return self.__subjects
 
@@ -65,6 +90,11 @@ class Dispatcher(object):
                     break
                 pos += 1
             self.__subjects.insert(pos, subject)
+        self.__positions = dict((s, i) for i, s in enumerate(self.__subjects))
+
+        # If we're already dispatching using the priority queue, the subject will get scheduled in the next cycle.
+        if self.__polled is not None:
+            self.__polled.append(subject)
 
         subject.onDispatcherRegistered(self)
 
@@ -99,6 +129,54 @@ class Dispatcher(object):
                     eventsDispatched = True
         return eof, eventsDispatched
 
+    # Push the subject into the priority queue if its next datetime is known, or poll it on the next cycle otherwise.
+    # Subjects that hit eof are polled as well, since some of them, like resampled bar feeds, get more events later.
+    def __schedule(self, subject):
+        dateTime = None
+        if not subject.eof():
+            dateTime = subject.peekDateTime()
+        if dateTime is None:
+            self.__polled.append(subject)
+        else:
+            heapq.heappush(self.__heap, (dateTime, next(self.__heapCounter), subject))
+
+    # Same as __dispatch but using the priority queue.
+    def __dispatchHeap(self):
+        # Schedule the subjects that were polled or dispatched in the previous cycle. Those that are not realtime will
+        # go into the priority queue.
+        polled = self.__polled
+        self.__polled = []
+        for subject in polled:
+            self.__schedule(subject)
+
+        # Subjects in the priority queue have events left, so all subjects hit eof only if the ones polled did.
+        heap = self.__heap
+        if len(heap) == 0 and all(subject.eof() for subject in self.__polled):
+            return True, False
+
+        # Dispatch realtime subjects and those subjects with the lowest datetime, in the order they were added.
+        smallestDateTime = None
+        if len(heap):
+            smallestDateTime = heap[0][0]
+        self.__currDateTime = smallestDateTime
+
+        subjects = self.__polled
+        self.__polled = []
+        while len(heap) and heap[0][0] == smallestDateTime:
+            subjects.append(heapq.heappop(heap)[2])
+        if len(subjects) > 1:
+            subjects.sort(key=self.__positions.__getitem__)
+
+        eventsDispatched = False
+        for subject in subjects:
+            if self.__dispatchSubject(subject, smallestDateTime):
+                eventsDispatched = True
+
+        # The next datetime may have changed only for the subjects that we tried to dispatch, so those get scheduled
+        # again at the beginning of the next cycle.
+        self.__polled.extend(subjects)
+        return False, eventsDispatched
+
     def run(self):
         try:
             for subject in self.__subjects:
@@ -106,8 +184,19 @@ class Dispatcher(object):
 
             self.__startEvent.emit()
 
+            useHeap = self.__useHeap
+            if useHeap is None:
+                useHeap = len(self.__subjects) >= HEAP_MIN_SUBJECTS
+
+            dispatchImpl = self.__dispatch
+            if useHeap:
+                self.__heap = []
+                self.__heapCounter = itertools.count()
+                self.__polled = list(self.__subjects)
+                dispatchImpl = self.__dispatchHeap
+
             while not self.__stop:
-                eof, eventsDispatched = self.__dispatch()
+                eof, eventsDispatched = dispatchImpl()
                 if eof:
                     self.__stop = True
                 elif not eventsDispatched:
@@ -115,6 +204,9 @@ class Dispatcher(object):
         finally:
             # There are no more events.
             self.__currDateTime = None
+            self.__heap = None
+            self.__heapCounter = None
+            self.__polled = None
 
             for subject in self.__subjects:
                 subject.stop()
@@ -66,7 +66,7 @@ class Event(object):
                 handler(*args, **kwargs)
         finally:
             self.__emitting -= 1
-            if not self.__emitting:
+            if not self.__emitting and self.__deferred:
                 self.__applyChanges()
 
 
@@ -18,6 +18,8 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import collections
+import math
 import threading
 
 import six
@@ -27,16 +29,43 @@ class Parameters(object):
     def __init__(self, *args, **kwargs):
         self.args = args
         self.kwargs = kwargs
+        # The position in the ParameterSource.
+        self.index = None
 
 
 class ParameterSource(object):
     """
     Source for backtesting parameters. This class is thread safe.
+
+    :param params: An iterable object with the parameters.
+    :param skip: The positions of parameters that should be skipped, for example because they were already evaluated.
+    :type skip: set of int.
     """
-    def __init__(self, params):
+    def __init__(self, params, skip=None):
+        self.__skip = skip or set()
+        self.__remaining = None
+        if hasattr(params, "__len__"):
+            self.__remaining = len(params) - len([index for index in self.__skip if 0 <= index < len(params)])
         self.__iter = iter(params)
+        self.__nextIndex = 0
+        # Parameters that were read ahead to count them.
+        self.__readAhead = collections.deque()
         self.__lock = threading.Lock()
 
+    # Returns the next parameters from the iterator, or raises StopIteration.
+    def __readNext(self):
+        while True:
+            params = six.next(self.__iter)
+            index = self.__nextIndex
+            self.__nextIndex += 1
+            if index not in self.__skip:
+                break
+        # Backward compatibility when parameters don't yield Parameters.
+        if not isinstance(params, Parameters):
+            params = Parameters(*params)
+        params.index = index
+        return params
+
     def getNext(self, count):
         """
         Returns the next parameters to use in a backtest.
@@ -51,22 +80,118 @@ class ParameterSource(object):
 
         ret = []
         with self.__lock:
+            while len(ret) < count and len(self.__readAhead):
+                ret.append(self.__readAhead.popleft())
             if self.__iter is not None:
                 try:
-                    while count > 0:
-                        params = six.next(self.__iter)
-                        # Backward compatibility when parameters don't yield Parameters.
-                        if not isinstance(params, Parameters):
-                            params = Parameters(*params)
-                        ret.append(params)
-                        count -= 1
+                    while len(ret) < count:
+                        ret.append(self.__readNext())
                 except StopIteration:
                     self.__iter = None
+                    self.__remaining = 0
+            if self.__remaining is not None:
+                self.__remaining = max(0, self.__remaining - len(ret))
         return ret
 
     def eof(self):
         with self.__lock:
-            return self.__iter is None
+            return self.__iter is None and len(self.__readAhead) == 0
+
+    def getRemaining(self, limit=None):
+        """
+        Returns the number of parameters left, or None if unknown. This is known if the parameters passed to the
+        constructor support len(). Otherwise up to limit parameters are read ahead to count them, and None is returned
+        if there are more than that.
+
+        :param limit: The max number of parameters to read ahead, or None to not read ahead.
+        :type limit: int
+        """
+        with self.__lock:
+            if self.__remaining is None and limit is not None and self.__iter is not None:
+                try:
+                    while len(self.__readAhead) <= limit:
+                        self.__readAhead.append(self.__readNext())
+                except StopIteration:
+                    self.__iter = None
+                    self.__remaining = len(self.__readAhead)
+            return self.__remaining
+
+
+class BatchSizer(object):
+    """
+    Sizes batches of parameters using the measured runtime per parameter, so that each batch takes about the same
+    time to run. As parameters run out, batches get smaller so the remaining work is spread among all workers.
+    This class is thread safe.
+
+    :param maxBatchSize: The max number of parameters in a batch.
+    :type maxBatchSize: int
+    :param batchDuration: The target duration for each batch, in seconds.
+    :type batchDuration: float
+    """
+    def __init__(self, maxBatchSize, batchDuration=10):
+        assert maxBatchSize > 0, "Invalid batch size"
+        assert batchDuration > 0, "Invalid batch duration"
+
+        self.__maxBatchSize = maxBatchSize
+        self.__batchDuration = batchDuration
+        self.__executions = 0
+        self.__elapsed = 0
+        self.__lock = threading.Lock()
+
+    def addRuntime(self, executions, elapsed):
+        """
+        Records the time it took to run a batch.
+
+        :param executions: The number of parameters in the batch.
+        :type executions: int
+        :param elapsed: The time it took to run the batch, in seconds.
+        :type elapsed: float
+        """
+        with self.__lock:
+            self.__executions += executions
+            self.__elapsed += elapsed
+
+    def getParameterRuntime(self):
+        """Returns the average runtime per parameter, in seconds, or None if there are no measurements yet."""
+        with self.__lock:
+            ret = None
+            if self.__executions:
+                ret = self.__elapsed / float(self.__executions)
+        return ret
+
+    def getShrinkThreshold(self, workerCount=1):
+        """
+        Returns the number of parameters left below which batches get smaller. Pass it to
+        :meth:`ParameterSource.getRemaining` so parameters that don't support len() are counted when they are about to
+        run out.
+
+        :param workerCount: The number of workers processing batches.
+        :type workerCount: int
+        """
+        return 2 * max(1, workerCount) * self.__maxBatchSize
+
+    def getBatchSize(self, remaining=None, workerCount=1):
+        """
+        Returns the number of parameters for the next batch.
+
+        :param remaining: The number of parameters left, or None if unknown.
+        :type remaining: int
+        :param workerCount: The number of workers processing batches.
+        :type workerCount: int
+        """
+        runtime = self.getParameterRuntime()
+        if runtime is None:
+            # Start with single parameters until there is an estimate.
+            ret = 1
+        elif runtime == 0:
+            ret = self.__maxBatchSize
+        else:
+            ret = int(min(self.__maxBatchSize, max(1, self.__batchDuration / runtime)))
+
+        # Leave at least two batches per worker, so workers that finish early can take more.
+        if remaining is not None:
+            ret = min(ret, max(1, int(math.ceil(remaining / (2. * max(1, workerCount))))))
+        return ret
 
 
 class ResultSinc(object):
@@ -78,7 +203,7 @@ class ResultSinc(object):
         self.__bestResult = None
         self.__bestParameters = None
 
-    def push(self, result, parameters):
+    def push(self, result, parameters, runtime=None):
         """
         Push strategy results obtained by running the strategy with the given parameters.
 
@@ -86,6 +211,8 @@ class ResultSinc(object):
         :type result: float
         :param parameters: The parameters that yield the given result.
         :type parameters: Parameters
+        :param runtime: The time it took to run the strategy, in seconds, or None if unknown.
+        :type runtime: float
         """
         with self.__lock:
             self.onNewResult(result, parameters)
@@ -94,6 +221,14 @@ class ResultSinc(object):
                 self.__bestParameters = parameters
                 self.onNewBestResult(result, parameters)
 
+    def replay(self, result, parameters, runtime=None):
+        """
+        Push a result that was obtained before, like the ones recorded in a
+        :class:`pyalgotrade.optimizer.journal.Journal` when an optimization is resumed. By default this is the same as
+        :meth:`push`. Override if the sinc may already hold the result.
+        """
+        self.push(result, parameters, runtime)
+
     def getBest(self):
         with self.__lock:
             ret = self.__bestResult, self.__bestParameters
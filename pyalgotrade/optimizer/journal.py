@@ -0,0 +1,128 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import os
+import pickle
+import threading
+
+import pyalgotrade.logger
+from pyalgotrade.optimizer import base
+
+logger = pyalgotrade.logger.getLogger(__name__)
+
+
+class Journal(object):
+    """Records completed parameters and their results in an append-only file, so an optimization that was interrupted
+    can be resumed without evaluating those parameters again. This class is thread safe.
+
+    Parameters are identified by their position in the sequence of parameters, so resuming requires the parameters
+    to be generated in the same order.
+
+    :param path: The path to the file. If it exists, completed parameters are loaded from it.
+    :type path: string.
+    :param sync: True to wait for entries to be written to disk before returning from :meth:`record`.
+    :type sync: boolean.
+    """
+
+    def __init__(self, path, sync=True):
+        self.__path = path
+        self.__sync = sync
+        self.__completed = set()
+        self.__lock = threading.Lock()
+
+        # Load completed parameters. If the process died while writing, the last entry is incomplete and gets dropped.
+        validSize = 0
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                while True:
+                    try:
+                        indices, records = pickle.load(f)
+                    except EOFError:
+                        break
+                    except Exception:
+                        logger.error("Dropping incomplete journal entry at offset %d" % validSize)
+                        break
+                    self.__completed.update(indices)
+                    validSize = f.tell()
+
+        self.__file = open(path, "ab")
+        self.__file.truncate(validSize)
+
+    def getCompleted(self):
+        """Returns the set with the positions of the parameters that were completed."""
+        with self.__lock:
+            return set(self.__completed)
+
+    def replay(self, resultSinc):
+        """Pushes the results in the journal into a :class:`pyalgotrade.optimizer.base.ResultSinc`, using
+        :meth:`pyalgotrade.optimizer.base.ResultSinc.replay`.
+
+        :param resultSinc: The sinc where results will be pushed.
+        :type resultSinc: :class:`pyalgotrade.optimizer.base.ResultSinc`.
+        """
+        with self.__lock:
+            self.__file.flush()
+            with open(self.__path, "rb") as f:
+                while True:
+                    try:
+                        indices, records = pickle.load(f)
+                    except EOFError:
+                        break
+                    for index, (args, kwargs, result, runtime) in zip(indices, records):
+                        parameters = base.Parameters(*args, **kwargs)
+                        parameters.index = index
+                        resultSinc.replay(result, parameters, runtime)
+
+    def record(self, indices, records):
+        """Records completed parameters and their results.
+
+        :param indices: The positions of the parameters that were completed.
+        :type indices: list of int.
+        :param records: A list of (parameters, result, runtime) tuples.
+        :type records: list.
+        """
+        entry = (
+            list(indices),
+            [(tuple(parameters.args), parameters.kwargs, result, runtime) for parameters, result, runtime in records]
+        )
+        with self.__lock:
+            pickle.dump(entry, self.__file, pickle.HIGHEST_PROTOCOL)
+            self.__file.flush()
+            if self.__sync:
+                os.fsync(self.__file.fileno())
+            self.__completed.update(indices)
+
+    def close(self):
+        with self.__lock:
+            self.__file.close()
+
+
+def open_journal(path, strategyParameters, resultSinc):
+    """Opens a :class:`Journal`, pushes the results it holds into the result sinc, and builds a
+    :class:`pyalgotrade.optimizer.base.ParameterSource` that skips completed parameters.
+
+    :rtype: A (:class:`Journal`, :class:`pyalgotrade.optimizer.base.ParameterSource`) tuple.
+    """
+    ret = Journal(path)
+    completed = ret.getCompleted()
+    if len(completed):
+        logger.info("Resuming with %d completed parameters" % len(completed))
+    ret.replay(resultSinc)
+    return ret, base.ParameterSource(strategyParameters, skip=completed)
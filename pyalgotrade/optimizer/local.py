@@ -18,15 +18,26 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import collections
 import logging
 import multiprocessing
 import os
 import random
+import shutil
 import socket
+import tempfile
 import threading
 import time
 
+from six.moves import queue
+
+import pyalgotrade.logger
+from pyalgotrade import bar
+from pyalgotrade import barfeed
+from pyalgotrade.barfeed import binfeed
+from pyalgotrade.barfeed import columnar
 from pyalgotrade.optimizer import base
+from pyalgotrade.optimizer import journal as journal_
 from pyalgotrade.optimizer import server
 from pyalgotrade.optimizer import worker
 from pyalgotrade.optimizer import xmlrpcserver
@@ -43,8 +54,140 @@ class ServerThread(threading.Thread):
         self.__results = self.__server.serve()
 
 
-def worker_process(strategyClass, port, logLevel):
+class LoadedBars(object):
+    """Bars held in memory. Each worker process gets a copy, which is shared copy-on-write on platforms that fork."""
+
+    def __init__(self, frequency, instruments, bars):
+        self.__frequency = frequency
+        self.__instruments = instruments
+        self.__bars = bars
+
+    def buildBarFeed(self):
+        return barfeed.OptimizerBarFeed(self.__frequency, self.__instruments, self.__bars)
+
+
+class SharedBars(object):
+    """Bars published into memory-mapped binary files that worker processes share instead of getting a copy.
+    Check :func:`share_bars`."""
+
+    def __init__(self, frequency, instruments, paths):
+        self.__frequency = frequency
+        self.__instruments = instruments
+        self.__paths = paths
+        self.__barArrays = None
+
+    def __getstate__(self):
+        # Only the paths get pickled. Each process maps the files on its own.
+        return (self.__frequency, self.__instruments, self.__paths)
+
+    def __setstate__(self, state):
+        self.__frequency, self.__instruments, self.__paths = state
+        self.__barArrays = None
+
+    def getPaths(self):
+        return self.__paths
+
+    def buildBarFeed(self):
+        # Files are mapped once per process and every feed built afterwards is a view on the same pages.
+        if self.__barArrays is None:
+            self.__barArrays = [binfeed.read_bar_arrays(path) for path in self.__paths]
+
+        ret = columnar.BarFeed(self.__frequency)
+        for instrument in self.__instruments:
+            ret.registerDataSeries(instrument)
+        for barArrays in self.__barArrays:
+            ret.addBarArrays(barArrays)
+        return ret
+
+
+def _get_shared_directory(size):
+    # Use POSIX shared memory if it is available and there is enough room. Otherwise use a regular temporary
+    # directory. Pages will still be shared through the page cache.
+    shmPath = "/dev/shm"
+    if hasattr(os, "statvfs") and os.path.isdir(shmPath):
+        stat = os.statvfs(shmPath)
+        if stat.f_bavail * stat.f_frsize > size * 2:
+            return shmPath
+    return None
+
+
+def share_bars(frequency, instruments, loadedBars):
+    """Writes bars into memory-mapped binary files that worker processes can share.
+    Files are written into a temporary directory that should be removed using :func:`remove_shared_bars`.
+
+    :param frequency: The frequency of the bars. Check :class:`pyalgotrade.bar.Frequency`.
+    :param instruments: The instruments in the bar feed.
+    :param loadedBars: A sequence of :class:`pyalgotrade.bar.Bars` in dispatch order.
+    :rtype: A :class:`SharedBars` instance, or None if the bars can't be stored in binary files.
+    """
+
+    instrumentBars = collections.OrderedDict()
+    for bars in loadedBars:
+        for instrument, bar_ in bars.items():
+            instrumentBars.setdefault(instrument, []).append(bar_)
+
+    barArrays = []
+    for instrument, bars in instrumentBars.items():
+        # Custom bar classes can't be rebuilt from the columns.
+        if any(type(bar_) is not bar.BasicBar for bar_ in bars):
+            return None
+        barArrays.append(columnar.from_bars(instrument, frequency, bars))
+        if not binfeed.can_write(barArrays[-1]):
+            return None
+
+    directory = tempfile.mkdtemp(
+        prefix="pyalgotrade-", dir=_get_shared_directory(sum(item.getMemorySize() for item in barArrays))
+    )
+    paths = []
+    for pos, item in enumerate(barArrays):
+        paths.append(os.path.join(directory, "%d.bars" % pos))
+        binfeed.write_bar_arrays(item, paths[-1])
+    return SharedBars(frequency, instruments, paths)
+
+
+def load_bars(barFeed, shareBars=False):
+    """Consumes a bar feed and returns the bars that worker processes will use to build their feeds.
+
+    :param barFeed: The bar feed to load.
+    :type barFeed: :class:`pyalgotrade.barfeed.BarFeed`.
+    :param shareBars: True to publish the bars into memory-mapped files if possible. Check :func:`share_bars`.
+    :type shareBars: boolean.
+    :rtype: A :class:`LoadedBars` or a :class:`SharedBars` instance.
+    """
+
+    loadedBars = []
+    for dateTime, bars in barFeed:
+        loadedBars.append(bars)
+    instruments = barFeed.getKeys()
+
+    ret = None
+    if shareBars:
+        ret = share_bars(barFeed.getFrequency(), instruments, loadedBars)
+        if ret is None:
+            logger.info("Bars can't be shared. Workers will get a copy")
+    if ret is None:
+        ret = LoadedBars(barFeed.getFrequency(), instruments, loadedBars)
+    return ret
+
+
+def remove_shared_bars(sharedBars):
+    """Removes the files written by :func:`share_bars`."""
+    paths = sharedBars.getPaths()
+    if len(paths):
+        shutil.rmtree(os.path.dirname(paths[0]), ignore_errors=True)
+
+
+def worker_process(strategyClass, port, logLevel, sharedBars=None):
     class Worker(worker.Worker):
+        def loadBars(self):
+            if sharedBars is None:
+                super(Worker, self).loadBars()
+
+        def buildBarFeed(self):
+            if sharedBars is None:
+                return super(Worker, self).buildBarFeed()
+            return sharedBars.buildBarFeed()
+
         def runStrategy(self, barFeed, *args, **kwargs):
             strat = strategyClass(barFeed, *args, **kwargs)
             strat.run()
@@ -60,6 +203,33 @@ def worker_process(strategyClass, port, logLevel):
         w.getLogger().exception("Failed to run worker: %s" % (e))
 
 
+def multiprocessing_worker_process(strategyClass, bars, logLevel, tasks, results):
+    workerLogger = pyalgotrade.logger.getLogger("worker-%s" % (os.getpid()))
+    workerLogger.setLevel(logLevel)
+
+    # Batches are processed in the order they were queued for this process, until a None is received.
+    task = tasks.get()
+    while task is not None:
+        batchId, parameters = task
+        # (result, runtime) for each set of parameters.
+        batchResults = []
+        startTime = time.time()
+        for params in parameters:
+            workerLogger.info("Running strategy with parameters %s" % (str(params.args)))
+            result = None
+            runStartTime = time.time()
+            try:
+                strat = strategyClass(bars.buildBarFeed(), *params.args, **params.kwargs)
+                strat.run()
+                result = strat.getResult()
+            except Exception as e:
+                workerLogger.exception("Error running strategy with parameters %s: %s" % (str(params.args), e))
+            workerLogger.info("Result %s" % result)
+            batchResults.append((result, time.time() - runStartTime))
+        results.put((batchId, batchResults, time.time() - startTime))
+        task = tasks.get()
+
+
 def find_port():
     while True:
         ret = random.randint(1025, 65536)
@@ -81,28 +251,26 @@ def stop_process(p):
         p.join(timeout)
 
 
-def run_impl(
-    strategyClass, barFeed, strategyParameters, batchSize, workerCount=None, logLevel=logging.ERROR, resultSinc=None
-):
-    if workerCount is None:
-        workerCount = multiprocessing.cpu_count()
-    assert workerCount > 0, "No workers"
-
-    ret = None
+def run_xmlrpc_impl(strategyClass, bars, paramSource, resultSinc, batchSize, workerCount, logLevel, journal=None):
     workers = []
     port = find_port()
     if port is None:
         raise Exception("Failed to find a port to listen")
 
-    # Build and start the server thread before the worker processes.
-    # We'll manually stop the server once workers have finished.
-    paramSource = base.ParameterSource(strategyParameters)
-    if resultSinc is None:
-        resultSinc = base.ResultSinc()
+    # Shared bars are loaded by the workers. Bars in memory are pickled and served.
+    if isinstance(bars, SharedBars):
+        barFeed = None
+        sharedBars = bars
+    else:
+        barFeed = bars.buildBarFeed()
+        sharedBars = None
 
-    # Create and start the server.
+    # Create and start the server thread before the worker processes.
+    # We'll manually stop the server once workers have finished.
     logger.info("Starting server on port %s" % port)
-    srv = xmlrpcserver.Server(paramSource, resultSinc, barFeed, "localhost", port, autoStop=False, batchSize=batchSize)
+    srv = xmlrpcserver.Server(
+        paramSource, resultSinc, barFeed, "localhost", port, autoStop=False, batchSize=batchSize, journal=journal
+    )
     serverThread = ServerThread(srv)
     serverThread.start()
     logger.info("Waiting for the server to be ready")
@@ -114,7 +282,7 @@ def run_impl(
         for i in range(workerCount):
             workers.append(multiprocessing.Process(
                 target=worker_process,
-                args=(strategyClass, port, logLevel))
+                args=(strategyClass, port, logLevel, sharedBars))
             )
         # Start workers
         for process in workers:
@@ -133,15 +301,150 @@ def run_impl(
         srv.stop()
         serverThread.join()
 
-        bestResult, bestParameters = resultSinc.getBest()
-        if bestResult is not None:
-            ret = server.Results(bestParameters.args, bestResult)
 
+def run_multiprocessing_impl(
+    strategyClass, bars, paramSource, resultSinc, batchSize, workerCount, logLevel, journal=None
+):
+    results = multiprocessing.Queue()
+    # Each worker process gets its own task queue, so the batches it was given are known without it having to
+    # acknowledge them. Maps each worker process to its task queue and the ids of the batches it was given, in order.
+    workers = {}
+
+    def start_worker():
+        tasks = multiprocessing.Queue()
+        process = multiprocessing.Process(
+            target=multiprocessing_worker_process, args=(strategyClass, bars, logLevel, tasks, results)
+        )
+        process.start()
+        workers[process] = (tasks, collections.deque())
+
+    batchSizer = base.BatchSizer(batchSize)
+    # Batch id -> parameters, for batches that were queued and have no results yet.
+    pendingBatches = {}
+    # Ids of batches that have to be queued again because the worker they were given to died.
+    lostBatches = collections.deque()
+    # Ids of batches that were running when a worker died.
+    retriedBatches = set()
+    nextBatchId = 0
+
+    try:
+        logger.info("Starting %s workers" % workerCount)
+        for i in range(workerCount):
+            start_worker()
+
+        while True:
+            # Keep two batches per worker queued, so workers don't have to wait for the next one.
+            for tasks, batchIds in workers.values():
+                while len(batchIds) < 2:
+                    if len(lostBatches):
+                        batchId = lostBatches.popleft()
+                    elif not paramSource.eof():
+                        remaining = paramSource.getRemaining(batchSizer.getShrinkThreshold(workerCount))
+                        parameters = paramSource.getNext(batchSizer.getBatchSize(remaining, workerCount))
+                        if len(parameters) == 0:
+                            continue
+                        batchId = nextBatchId
+                        nextBatchId += 1
+                        pendingBatches[batchId] = parameters
+                    else:
+                        break
+                    batchIds.append(batchId)
+                    tasks.put((batchId, pendingBatches[batchId]))
+
+            if len(pendingBatches) == 0:
+                break
+
+            try:
+                batchId, batchResults, elapsed = results.get(timeout=1)
+                for tasks, batchIds in workers.values():
+                    if batchId in batchIds:
+                        batchIds.remove(batchId)
+                # Results for batches that were queued again may arrive twice.
+                parameters = pendingBatches.pop(batchId, None)
+                if parameters is not None:
+                    batchSizer.addRuntime(len(parameters), elapsed)
+                    records = [(params, result, runtime) for params, (result, runtime) in zip(parameters, batchResults)]
+                    if journal is not None:
+                        journal.record([params.index for params in parameters], records)
+                    for params, result, runtime in records:
+                        resultSinc.push(result, params, runtime)
+            except queue.Empty:
+                pass
+
+            # Replace workers that died and queue the batches they were given once more. Batches are processed in
+            # order, so the first one without results is the one that was running. It is queued once more in case it
+            # wasn't its fault, and if it kills a worker again, it gets dropped.
+            for process, (tasks, batchIds) in list(workers.items()):
+                if not process.is_alive():
+                    del workers[process]
+                    logger.error("Worker %s died with exit code %s" % (process.pid, process.exitcode))
+                    batchIds = [batchId for batchId in batchIds if batchId in pendingBatches]
+                    if len(batchIds):
+                        runningBatchId = batchIds[0]
+                        if runningBatchId in retriedBatches:
+                            parameters = pendingBatches.pop(runningBatchId)
+                            logger.error("Dropping parameters %s" % ([params.args for params in parameters]))
+                            batchIds = batchIds[1:]
+                        else:
+                            retriedBatches.add(runningBatchId)
+                    lostBatches.extend(batchIds)
+                    start_worker()
+    finally:
+        # Stop workers
+        for tasks, batchIds in workers.values():
+            tasks.put(None)
+        for process in workers:
+            stop_process(process)
+
+
+def run_impl(
+    strategyClass, barFeed, strategyParameters, batchSize, workerCount=None, logLevel=logging.ERROR, resultSinc=None,
+    shareBars=False, useXMLRPC=False, journalPath=None
+):
+    if workerCount is None:
+        workerCount = multiprocessing.cpu_count()
+    assert workerCount > 0, "No workers"
+    assert batchSize > 0, "Invalid batch size"
+
+    ret = None
+    if resultSinc is None:
+        resultSinc = base.ResultSinc()
+    journal = None
+    if journalPath is None:
+        paramSource = base.ParameterSource(strategyParameters)
+    else:
+        journal, paramSource = journal_.open_journal(journalPath, strategyParameters, resultSinc)
+
+    # Load the bars before starting the worker processes. Shared bars are published once and mapped by each worker.
+    # Otherwise each worker gets a copy.
+    logger.info("Loading bars")
+    bars = load_bars(barFeed, shareBars)
+
+    try:
+        if useXMLRPC:
+            run_xmlrpc_impl(strategyClass, bars, paramSource, resultSinc, batchSize, workerCount, logLevel, journal)
+        else:
+            run_multiprocessing_impl(
+                strategyClass, bars, paramSource, resultSinc, batchSize, workerCount, logLevel, journal
+            )
+    finally:
+        if isinstance(bars, SharedBars):
+            remove_shared_bars(bars)
+        if journal is not None:
+            journal.close()
+
+    bestResult, bestParameters = resultSinc.getBest()
+    if bestResult is not None:
+        ret = server.Results(bestParameters.args, bestResult)
     return ret
 
 
-def run(strategyClass, barFeed, strategyParameters, workerCount=None, logLevel=logging.ERROR, batchSize=200):
+def run(
+    strategyClass, barFeed, strategyParameters, workerCount=None, logLevel=logging.ERROR, batchSize=200,
+    shareBars=False, resultSinc=None, journalPath=None
+):
     """Executes many instances of a strategy in parallel and finds the parameters that yield the best results.
+    Worker processes get batches of parameters through a queue, and results are collected as each batch finishes.
 
     :param strategyClass: The strategy class.
     :param barFeed: The bar feed to use to backtest the strategy.
@@ -151,9 +454,26 @@ def run(strategyClass, barFeed, strategyParameters, workerCount=None, logLevel=l
     :param workerCount: The number of strategies to run in parallel. If None then as many workers as CPUs are used.
     :type workerCount: int.
     :param logLevel: The log level. Defaults to **logging.ERROR**.
-    :param batchSize: The number of strategy executions that are delivered to each worker.
+    :param batchSize: The max number of strategy executions that are delivered to each worker. Batches are sized
+        using the measured runtime per execution, and get smaller as parameters run out.
     :type batchSize: int.
+    :param shareBars: True to publish bars once into memory-mapped files that all workers share, instead of giving
+        each worker a copy. This saves memory and startup time with large bar feeds, but bars get built as they are
+        dispatched, so each strategy execution takes a bit longer. Bars that can't be shared (check
+        :func:`share_bars`) are copied as usual.
+    :type shareBars: boolean.
+    :param resultSinc: Where every result gets pushed. If None, only the best result is kept.
+        Check :mod:`pyalgotrade.optimizer.results` to keep the best N results or to write every result into a file.
+    :type resultSinc: :class:`pyalgotrade.optimizer.base.ResultSinc`.
+    :param journalPath: The path to a file where completed parameters and their results are recorded. If the file
+        exists, parameters recorded there are skipped and their results are pushed into the result sinc first, so an
+        interrupted optimization can be resumed. Parameters must be generated in the same order.
+        Check :class:`pyalgotrade.optimizer.journal.Journal`.
+    :type journalPath: string.
     :rtype: A :class:`Results` instance with the best results found.
     """
 
-    return run_impl(strategyClass, barFeed, strategyParameters, batchSize, workerCount=workerCount, logLevel=logLevel)
+    return run_impl(
+        strategyClass, barFeed, strategyParameters, batchSize, workerCount=workerCount, logLevel=logLevel,
+        shareBars=shareBars, resultSinc=resultSinc, journalPath=journalPath
+    )
@@ -0,0 +1,246 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import heapq
+import itertools
+import numbers
+import os
+import pickle
+import threading
+
+import numpy as np
+import six
+
+from pyalgotrade.optimizer import base
+
+
+class TopResultsSinc(base.ResultSinc):
+    """A :class:`pyalgotrade.optimizer.base.ResultSinc` that keeps the best N results. Memory usage depends on N and
+    not on the number of results pushed. This class is thread safe.
+
+    :param count: The number of results to keep.
+    :type count: int.
+    """
+
+    def __init__(self, count):
+        assert count > 0, "Invalid count"
+        super(TopResultsSinc, self).__init__()
+        self.__count = count
+        # Min-heap with (result, -sequence, parameters, runtime). The sequence breaks ties in favor of the results that
+        # were pushed first, and prevents parameters from being compared.
+        self.__heap = []
+        self.__sequence = itertools.count()
+        self.__lock = threading.Lock()
+
+    def push(self, result, parameters, runtime=None):
+        super(TopResultsSinc, self).push(result, parameters, runtime)
+        if result is None:
+            return
+
+        item = (result, -next(self.__sequence), parameters, runtime)
+        with self.__lock:
+            if len(self.__heap) < self.__count:
+                heapq.heappush(self.__heap, item)
+            elif item[:2] > self.__heap[0][:2]:
+                heapq.heapreplace(self.__heap, item)
+
+    def getTop(self):
+        """Returns a list of (result, parameters, runtime) tuples, best result first."""
+        with self.__lock:
+            items = sorted(self.__heap, reverse=True)
+        return [(result, parameters, runtime) for result, _, parameters, runtime in items]
+
+
+def _build_column(values):
+    # Numbers are stored in numeric arrays, using NaN for missing values, and strings in string arrays.
+    # Anything else is stored as objects.
+    if all(isinstance(value, numbers.Number) and not isinstance(value, bool) for value in values if value is not None):
+        if any(value is None for value in values) or any(isinstance(value, float) for value in values):
+            return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+        return np.array(values, dtype=np.int64)
+    if all(isinstance(value, six.string_types) for value in values):
+        return np.array(values)
+    ret = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        ret[i] = value
+    return ret
+
+
+class ResultsFileSinc(base.ResultSinc):
+    """A :class:`pyalgotrade.optimizer.base.ResultSinc` that appends every result to a file, so the full result
+    surface can be examined after the optimization. Results are buffered and written in chunks, with one array per
+    column, so memory usage depends on the chunk size and not on the number of results pushed.
+    Use :func:`load_results` to load the file. This class is thread safe.
+
+    :param path: The path to the file. If the file exists, results are appended. Results replayed from a journal when
+        an optimization is resumed are only written if the file doesn't hold a row for the same parameter position.
+    :type path: string.
+    :param chunkSize: The number of results to buffer before writing them to the file.
+    :type chunkSize: int.
+
+    The columns are **result** and **runtime**, with NaN for missing values, **index**, with the position of the
+    parameters in the :class:`pyalgotrade.optimizer.base.ParameterSource` or -1 if unknown, **arg0** to **argN** for
+    positional parameters, and the names of keyword parameters.
+
+    .. note::
+        Call :meth:`close` once done, so buffered results are written.
+    """
+
+    def __init__(self, path, chunkSize=10000):
+        assert chunkSize > 0, "Invalid chunk size"
+        super(ResultsFileSinc, self).__init__()
+        # If the process died while writing, the last chunk is incomplete and gets dropped.
+        validSize = 0
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                while True:
+                    try:
+                        pickle.load(f)
+                    except Exception:
+                        # EOFError, or an incomplete chunk.
+                        break
+                    validSize = f.tell()
+        self.__path = path
+        self.__file = open(path, "ab")
+        self.__file.truncate(validSize)
+        self.__chunkSize = chunkSize
+        self.__rows = []
+        # Parameter positions for the rows in the file. Only loaded if results are replayed.
+        self.__written = None
+        self.__lock = threading.Lock()
+
+    def push(self, result, parameters, runtime=None):
+        super(ResultsFileSinc, self).push(result, parameters, runtime)
+        with self.__lock:
+            self.__rows.append((result, parameters, runtime))
+            if len(self.__rows) >= self.__chunkSize:
+                self.__writeChunk()
+
+    def __loadWritten(self):
+        self.__written = set()
+        self.__file.flush()
+        for chunk in iter_result_chunks(self.__path):
+            indices = dict(chunk).get("index")
+            if indices is not None:
+                self.__written.update(index for index in indices.tolist() if index >= 0)
+        self.__written.update(parameters.index for _, parameters, _ in self.__rows if parameters.index is not None)
+
+    def replay(self, result, parameters, runtime=None):
+        with self.__lock:
+            if self.__written is None:
+                self.__loadWritten()
+            written = parameters.index in self.__written
+            # Each position is replayed once.
+            self.__written.discard(parameters.index)
+        if written:
+            base.ResultSinc.push(self, result, parameters, runtime)
+        else:
+            self.push(result, parameters, runtime)
+
+    def __writeChunk(self):
+        if len(self.__rows) == 0:
+            return
+
+        names = ["result", "runtime", "index"]
+        columns = {"result": [], "runtime": [], "index": []}
+        for pos, (result, parameters, runtime) in enumerate(self.__rows):
+            index = -1 if parameters.index is None else parameters.index
+            values = [("result", result), ("runtime", runtime), ("index", index)]
+            values.extend(("arg%d" % i, value) for i, value in enumerate(parameters.args))
+            values.extend(sorted(parameters.kwargs.items()))
+            for name, value in values:
+                column = columns.get(name)
+                if column is None:
+                    # Rows before this one don't have the column.
+                    names.append(name)
+                    column = columns.setdefault(name, [None] * pos)
+                column.append(value)
+            for name in names:
+                if len(columns[name]) == pos:
+                    columns[name].append(None)
+
+        chunk = [(name, _build_column(columns[name])) for name in names]
+        pickle.dump(chunk, self.__file, pickle.HIGHEST_PROTOCOL)
+        self.__file.flush()
+        self.__rows = []
+
+    def flush(self):
+        """Writes buffered results to the file."""
+        with self.__lock:
+            self.__writeChunk()
+
+    def close(self):
+        """Writes buffered results and closes the file."""
+        with self.__lock:
+            self.__writeChunk()
+            self.__file.close()
+
+
+def iter_result_chunks(path):
+    """Iterates over the chunks in a file written by :class:`ResultsFileSinc`, without loading the whole file.
+    Each chunk is a list of (column name, numpy.array) tuples.
+
+    :param path: The path to the file.
+    :type path: string.
+    """
+    with open(path, "rb") as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                break
+
+
+def load_results(path):
+    """Loads a file written by :class:`ResultsFileSinc`.
+
+    :param path: The path to the file.
+    :type path: string.
+    :rtype: A dictionary that maps column names to numpy.array instances.
+    """
+    names = []
+    chunks = []
+    for chunk in iter_result_chunks(path):
+        for name, _ in chunk:
+            if name not in names:
+                names.append(name)
+        chunks.append(dict(chunk))
+
+    ret = {}
+    for name in names:
+        values = []
+        for chunk in chunks:
+            column = chunk.get(name)
+            if column is None:
+                # Missing from this chunk.
+                size = len(next(iter(chunk.values())))
+                if name in ("result", "runtime"):
+                    column = np.full(size, np.nan)
+                elif name == "index":
+                    column = np.full(size, -1, dtype=np.int64)
+                else:
+                    column = np.full(size, None, dtype=object)
+            values.append(column)
+        # Mixed types are loaded as objects instead of letting numpy cast them. Numbers are cast as usual.
+        kinds = set(column.dtype.kind for column in values)
+        if len(kinds) > 1 and not kinds.issubset(set("iuf")):
+            values = [column.astype(object) for column in values]
+        ret[name] = np.concatenate(values) if len(values) else np.array([])
+    return ret
@@ -20,6 +20,7 @@
 
 import pyalgotrade.logger
 from pyalgotrade.optimizer import base
+from pyalgotrade.optimizer import journal as journal_
 from pyalgotrade.optimizer import xmlrpcserver
 
 logger = pyalgotrade.logger.getLogger(__name__)
@@ -40,7 +41,7 @@ class Results(object):
         return self.__result
 
 
-def serve(barFeed, strategyParameters, address, port, batchSize=200):
+def serve(barFeed, strategyParameters, address, port, batchSize=200, resultSinc=None, journalPath=None):
     """Executes a server that will provide bars and strategy parameters for workers to use.
 
     :param barFeed: The bar feed that each worker will use to backtest the strategy.
@@ -51,16 +52,37 @@ def serve(barFeed, strategyParameters, address, port, batchSize=200):
     :type address: string.
     :param port: The port to listen for incoming worker connections.
     :type port: int.
-    :param batchSize: The number of strategy executions that are delivered to each worker.
+    :param batchSize: The max number of strategy executions that are delivered to each worker. Batches are sized
+        using the measured runtime per execution, and get smaller as parameters run out. Once there are no more
+        parameters, jobs that are still running are handed out again to idle workers, in case their workers died or
+        are slow. Each job runs in at most two workers at the same time, and idle workers that get nothing to do
+        finish.
     :type batchSize: int.
+    :param resultSinc: Where every result gets pushed. If None, only the best result is kept.
+        Check :mod:`pyalgotrade.optimizer.results` to keep the best N results or to write every result into a file.
+    :type resultSinc: :class:`pyalgotrade.optimizer.base.ResultSinc`.
+    :param journalPath: The path to a file where completed parameters and their results are recorded. If the file
+        exists, parameters recorded there are skipped and their results are pushed into the result sinc first, so an
+        interrupted optimization can be resumed. Parameters must be generated in the same order.
+        Check :class:`pyalgotrade.optimizer.journal.Journal`.
+    :type journalPath: string.
     :rtype: A :class:`Results` instance with the best results found or None if no results were obtained.
     """
 
-    paramSource = base.ParameterSource(strategyParameters)
-    resultSinc = base.ResultSinc()
-    s = xmlrpcserver.Server(paramSource, resultSinc, barFeed, address, port, batchSize=batchSize)
+    if resultSinc is None:
+        resultSinc = base.ResultSinc()
+    journal = None
+    if journalPath is None:
+        paramSource = base.ParameterSource(strategyParameters)
+    else:
+        journal, paramSource = journal_.open_journal(journalPath, strategyParameters, resultSinc)
+    s = xmlrpcserver.Server(paramSource, resultSinc, barFeed, address, port, batchSize=batchSize, journal=journal)
     logger.info("Starting server")
-    s.serve()
+    try:
+        s.serve()
+    finally:
+        if journal is not None:
+            journal.close()
     logger.info("Server finished")
 
     ret = None
@@ -20,6 +20,7 @@
 
 import socket
 import multiprocessing
+import time
 import retrying
 
 from six.moves import xmlrpc_client
@@ -69,7 +70,8 @@ class Worker(object):
         return ret
 
     def getNextJob(self):
-        ret = retry_on_network_error(self.__server.getNextJob)
+        workerName = serialization.dumps(self.__workerName)
+        ret = retry_on_network_error(self.__server.getNextJob, workerName)
         ret = serialization.loads(ret)
         return ret
 
@@ -80,29 +82,43 @@ class Worker(object):
         workerName = serialization.dumps(self.__workerName)
         retry_on_network_error(self.__server.pushJobResults, jobId, result, parameters, workerName)
 
-    def __processJob(self, job, barsFreq, instruments, bars):
-        bestResult = None
+    def pushJobRecords(self, jobId, records):
+        jobId = serialization.dumps(jobId)
+        records = serialization.dumps(records)
+        workerName = serialization.dumps(self.__workerName)
+        retry_on_network_error(self.__server.pushJobRecords, jobId, records, workerName)
+
+    # Load the bars used to build the feeds.
+    def loadBars(self):
+        self.__instruments, self.__bars = self.getInstrumentsAndBars()
+        self.__barsFreq = self.getBarsFrequency()
+
+    # Build a new feed to run the strategy with a set of parameters.
+    def buildBarFeed(self):
+        return barfeed.OptimizerBarFeed(self.__barsFreq, self.__instruments, self.__bars)
+
+    def __processJob(self, job):
+        # Results for every set of parameters are sent back as (parameters, result, runtime) records.
+        records = []
         parameters = job.getNextParameters()
-        bestParams = parameters
         while parameters is not None:
             # Wrap the bars into a feed.
-            feed = barfeed.OptimizerBarFeed(barsFreq, instruments, bars)
+            feed = self.buildBarFeed()
             # Run the strategy.
             self.getLogger().info("Running strategy with parameters %s" % (str(parameters)))
             result = None
+            startTime = time.time()
             try:
                 result = self.runStrategy(feed, *parameters)
             except Exception as e:
                 self.getLogger().exception("Error running strategy with parameters %s: %s" % (str(parameters), e))
             self.getLogger().info("Result %s" % result)
-            if bestResult is None or result > bestResult:
-                bestResult = result
-                bestParams = parameters
+            records.append((parameters, result, time.time() - startTime))
             # Run with the next set of parameters.
             parameters = job.getNextParameters()
 
-        assert(bestParams is not None)
-        self.pushJobResults(job.getId(), bestResult, bestParams)
+        assert(len(records))
+        self.pushJobRecords(job.getId(), records)
 
     # Run the strategy and return the result.
     def runStrategy(self, feed, parameters):
@@ -112,13 +128,12 @@ class Worker(object):
         try:
             self.getLogger().info("Started running")
             # Get the instruments and bars.
-            instruments, bars = self.getInstrumentsAndBars()
-            barsFreq = self.getBarsFrequency()
+            self.loadBars()
 
             # Process jobs
             job = self.getNextJob()
             while job is not None:
-                self.__processJob(job, barsFreq, instruments, bars)
+                self.__processJob(job)
                 job = self.getNextJob()
             self.getLogger().info("Finished running")
         except Exception as e:
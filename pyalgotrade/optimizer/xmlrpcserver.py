@@ -18,6 +18,7 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import itertools
 import threading
 import time
 
@@ -30,6 +31,12 @@ from pyalgotrade.optimizer import serialization
 
 logger = pyalgotrade.logger.getLogger(__name__)
 
+# The max number of workers a job is handed out to at the same time, once parameters run out.
+MAX_JOB_ISSUES = 2
+# Workers are expected to ask for jobs once per batch duration. Workers not seen for this many batch durations are
+# considered dead.
+WORKER_TIMEOUT_BATCHES = 3
+
 
 class AutoStopThread(threading.Thread):
     def __init__(self, server):
@@ -43,11 +50,14 @@ class AutoStopThread(threading.Thread):
 
 
 class Job(object):
+    # Ids can't be reused since results for jobs that were handed out more than once may arrive late.
+    nextId = itertools.count()
+
     def __init__(self, strategyParameters):
         self.__strategyParameters = strategyParameters
         self.__bestResult = None
         self.__bestParameters = None
-        self.__id = id(self)
+        self.__id = next(Job.nextId)
 
     def getId(self):
         return self.__id
@@ -59,13 +69,26 @@ class Job(object):
         return ret
 
 
+# Server side bookkeeping for jobs that were handed out and have no results yet.
+class ActiveJob(object):
+    def __init__(self, job, parameters):
+        self.job = job
+        self.parameters = parameters
+        self.issueTime = time.time()
+        # The names of the workers running the job.
+        self.workers = set()
+
+
 # Restrict to a particular path.
 class RequestHandler(xmlrpc_server.SimpleXMLRPCRequestHandler):
     rpc_paths = ('/PyAlgoTradeRPC',)
 
 
 class Server(xmlrpc_server.SimpleXMLRPCServer):
-    def __init__(self, paramSource, resultSinc, barFeed, address, port, autoStop=True, batchSize=200):
+    def __init__(
+        self, paramSource, resultSinc, barFeed, address, port, autoStop=True, batchSize=200, batchDuration=10,
+        journal=None
+    ):
         assert batchSize > 0, "Invalid batch size"
 
         xmlrpc_server.SimpleXMLRPCServer.__init__(
@@ -75,9 +98,13 @@ class Server(xmlrpc_server.SimpleXMLRPCServer):
         # (address, port), requestHandler=RequestHandler, logRequests=False, allow_none=True
         # )
 
-        self.__batchSize = batchSize
+        self.__batchSizer = base.BatchSizer(batchSize, batchDuration)
+        self.__batchDuration = batchDuration
+        # Maps worker names to the last time they were seen.
+        self.__workers = {}
         self.__paramSource = paramSource
         self.__resultSinc = resultSinc
+        self.__journal = journal
         self.__barFeed = barFeed
         self.__instrumentsAndBars = None  # Serialized instruments and bars for faster retrieval.
         self.__barsFreq = None
@@ -96,6 +123,7 @@ class Server(xmlrpc_server.SimpleXMLRPCServer):
         self.register_function(self.getBarsFrequency, 'getBarsFrequency')
         self.register_function(self.getNextJob, 'getNextJob')
         self.register_function(self.pushJobResults, 'pushJobResults')
+        self.register_function(self.pushJobRecords, 'pushJobRecords')
 
     def getInstrumentsAndBars(self):
         return self.__instrumentsAndBars
@@ -103,17 +131,63 @@ class Server(xmlrpc_server.SimpleXMLRPCServer):
     def getBarsFrequency(self):
         return str(self.__barsFreq)
 
-    def getNextJob(self):
+    def __getWorkerTimeout(self):
+        ret = self.__batchDuration
+        # A single execution may take longer than the batch duration.
+        runtime = self.__batchSizer.getParameterRuntime()
+        if runtime is not None:
+            ret = max(ret, runtime * self.__batchSizer.getBatchSize())
+        return ret * WORKER_TIMEOUT_BATCHES
+
+    def __workerSeen(self, workerName):
+        now = time.time()
+        self.__workers[workerName] = now
+
+        # Forget about workers that died.
+        deadline = now - self.__getWorkerTimeout()
+        for name, lastSeen in list(self.__workers.items()):
+            if lastSeen < deadline:
+                logger.info("Worker %s is gone" % name)
+                del self.__workers[name]
+                for activeJob in self.__activeJobs.values():
+                    activeJob.workers.discard(name)
+
+    def getNextJob(self, workerName=None):
         ret = None
 
         with self.__lock:
+            if workerName is not None:
+                workerName = serialization.loads(workerName)
+                self.__workerSeen(workerName)
+                # Workers run one job at a time, so if it had one, it gave up on it.
+                for activeJob in self.__activeJobs.values():
+                    activeJob.workers.discard(workerName)
+
             # Get the next set of parameters.
-            params = [p.args for p in self.__paramSource.getNext(self.__batchSize)]
+            workerCount = len(self.__workers)
+            remaining = self.__paramSource.getRemaining(self.__batchSizer.getShrinkThreshold(workerCount))
+            params = self.__paramSource.getNext(self.__batchSizer.getBatchSize(remaining, workerCount))
 
-            # Map the active job
             if len(params):
-                ret = Job(params)
-                self.__activeJobs[ret.getId()] = ret
+                # Map the active job
+                activeJob = ActiveJob(Job([p.args for p in params]), params)
+                self.__activeJobs[activeJob.job.getId()] = activeJob
+                ret = activeJob.job
+            else:
+                # There are no more parameters, so instead of letting the worker go, hand out a job that is still
+                # running somewhere else. This covers workers that died or are slow, and the first results that get
+                # pushed are used. Jobs are handed out to up to MAX_JOB_ISSUES workers at the same time, those
+                # running in less workers go first, and then the oldest ones.
+                candidates = [
+                    activeJob for activeJob in self.__activeJobs.values() if len(activeJob.workers) < MAX_JOB_ISSUES
+                ]
+                if len(candidates):
+                    activeJob = min(candidates, key=lambda item: (len(item.workers), item.issueTime))
+                    ret = activeJob.job
+                    logger.info("Reissuing job %s" % ret.getId())
+
+            if ret is not None and workerName is not None:
+                activeJob.workers.add(workerName)
 
         return serialization.dumps(ret)
 
@@ -128,23 +202,42 @@ class Server(xmlrpc_server.SimpleXMLRPCServer):
         return jobsPending or activeJobs
 
     def pushJobResults(self, jobId, result, parameters, workerName):
-        jobId = serialization.loads(jobId)
-        result = serialization.loads(result)
+        # Only the best result in the job. Kept for workers that don't push every record.
         parameters = serialization.loads(parameters)
+        result = serialization.loads(result)
+        records = serialization.dumps([(parameters, result, None)])
+        self.pushJobRecords(jobId, records, workerName)
+
+    def pushJobRecords(self, jobId, records, workerName):
+        jobId = serialization.loads(jobId)
+        records = serialization.loads(records)
+        workerName = serialization.loads(workerName)
 
         # Remove the job mapping.
         with self.__lock:
             try:
-                del self.__activeJobs[jobId]
+                activeJob = self.__activeJobs.pop(jobId)
             except KeyError:
                 # The job's results were already submitted.
                 return
 
-            if self.__bestResult is None or result > self.__bestResult:
-                logger.info("Best result so far %s with parameters %s" % (result, parameters))
-                self.__bestResult = result
+            self.__workerSeen(workerName)
+            self.__batchSizer.addRuntime(len(activeJob.parameters), time.time() - activeJob.issueTime)
+
+            for parameters, result, runtime in records:
+                if result is not None and (self.__bestResult is None or result > self.__bestResult):
+                    logger.info("Best result so far %s with parameters %s" % (result, parameters))
+                    self.__bestResult = result
 
-        self.__resultSinc.push(result, base.Parameters(*parameters))
+        records = [(base.Parameters(*parameters), result, runtime) for parameters, result, runtime in records]
+        # Workers that push every record do it in the order parameters were given.
+        if len(records) == len(activeJob.parameters):
+            for (parameters, _, _), jobParameters in zip(records, activeJob.parameters):
+                parameters.index = jobParameters.index
+        if self.__journal is not None:
+            self.__journal.record([parameters.index for parameters in activeJob.parameters], records)
+        for parameters, result, runtime in records:
+            self.__resultSinc.push(result, parameters, runtime)
 
     def waitServing(self, timeout=None):
         return self.__startedServingEvent.wait(timeout)
@@ -155,13 +248,15 @@ class Server(xmlrpc_server.SimpleXMLRPCServer):
     def serve(self):
         try:
             # Initialize instruments, bars and parameters.
-            logger.info("Loading bars")
-            loadedBars = []
-            for dateTime, bars in self.__barFeed:
-                loadedBars.append(bars)
-            instruments = self.__barFeed.getKeys()
-            self.__instrumentsAndBars = serialization.dumps((instruments, loadedBars))
-            self.__barsFreq = self.__barFeed.getFrequency()
+            # If there is no bar feed, workers are expected to load bars by other means.
+            if self.__barFeed is not None:
+                logger.info("Loading bars")
+                loadedBars = []
+                for dateTime, bars in self.__barFeed:
+                    loadedBars.append(bars)
+                instruments = self.__barFeed.getKeys()
+                self.__instrumentsAndBars = serialization.dumps((instruments, loadedBars))
+                self.__barsFreq = self.__barFeed.getFrequency()
 
             if self.__autoStopThread:
                 self.__autoStopThread.start()
@@ -673,6 +673,9 @@ class BacktestingStrategy(BaseStrategy):
     .. note::
         Either balances or brk should be set.
         This is a base class and should not be used directly.
+        When there are many subjects to dispatch, like many bar feeds, they are kept in a priority queue keyed on their
+        next datetime. Subjects that return a datetime from peekDateTime should keep returning it until they dispatch,
+        like historical bar feeds do. Use getDispatcher().setUseHeap(False) otherwise.
     """
 
     def __init__(self, barFeed, balances=None, brk=None):
@@ -687,6 +690,8 @@ class BacktestingStrategy(BaseStrategy):
             brk = backtesting.Broker(balances, barFeed)
 
         super(BacktestingStrategy, self).__init__(barFeed, brk)
+        # Historical bar feeds and the backtesting broker can be dispatched using a priority queue.
+        self.getDispatcher().setUseHeap(None)
         self.__useAdjustedValues = False
         self.setUseEventDateTimeInLogs(True)
         self.setDebugMode(True)
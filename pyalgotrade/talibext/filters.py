@@ -0,0 +1,203 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+from talib import abstract
+
+from pyalgotrade import technical
+from pyalgotrade.utils import collections
+
+
+def get_lookback(talibFunc, **params):
+    """Returns the number of values that a TA-Lib function needs before the first one it calculates.
+
+    Passing lookback + 1 values calculates the newest value only. For functions whose values depend on all the values
+    that came before, like EMA, RSI or MACD, that is a different value than the one calculated passing more values.
+
+    :param talibFunc: The TA-Lib function, like talib.SMA.
+    :param params: The parameters for the TA-Lib function.
+    """
+    function = abstract.Function(talibFunc.__name__)
+    function.set_parameters(**params)
+    return function.lookback
+
+
+def to_last_value(result):
+    # Returns the last value that a TA-Lib function calculated, or None if it is NaN. Functions with multiple outputs
+    # return a tuple.
+    if isinstance(result, (tuple, list)):
+        ret = tuple(output[-1].item() for output in result)
+        if any(value != value for value in ret):
+            ret = None
+    else:
+        ret = result[-1].item()
+        if ret != ret:
+            ret = None
+    return ret
+
+
+class TALibEventWindow(technical.EventWindow):
+    """Calls a TA-Lib function with the values in the window. The values are passed as they are held, without copying
+    them."""
+
+    def __init__(self, count, talibFunc, params):
+        super(TALibEventWindow, self).__init__(count)
+        self.__talibFunc = talibFunc
+        self.__params = params
+
+    def getValue(self):
+        ret = None
+        if self.windowFull():
+            ret = to_last_value(self.__talibFunc(self.getValues(), **self.__params))
+        return ret
+
+
+class TALibBarEventWindow(technical.EventWindow):
+    """Calls a TA-Lib function with values from the bars in the window. Each input is held in its own contiguous
+    row, so values are passed without copying them, and bars are not retained."""
+
+    INPUTS = {
+        "open": lambda bar, useAdjusted: bar.getOpen(useAdjusted),
+        "high": lambda bar, useAdjusted: bar.getHigh(useAdjusted),
+        "low": lambda bar, useAdjusted: bar.getLow(useAdjusted),
+        "close": lambda bar, useAdjusted: bar.getClose(useAdjusted),
+        "volume": lambda bar, useAdjusted: bar.getVolume(),
+    }
+
+    def __init__(self, count, talibFunc, params, inputs, useAdjustedValues):
+        for name in inputs:
+            assert name in TALibBarEventWindow.INPUTS, "Invalid input %s" % name
+
+        super(TALibBarEventWindow, self).__init__(count)
+        self.__talibFunc = talibFunc
+        self.__params = params
+        self.__getters = [TALibBarEventWindow.INPUTS[name] for name in inputs]
+        self.__useAdjusted = useAdjustedValues
+        self.__columns = collections.NumPyColumnsDeque(count, len(inputs))
+
+    def onNewValue(self, dateTime, value):
+        if value is not None:
+            self.__columns.append([getter(value, self.__useAdjusted) for getter in self.__getters])
+
+    def getValues(self):
+        """Returns a 2D numpy.array with one row for each input."""
+        return self.__columns.data()
+
+    def windowFull(self):
+        return len(self.__columns) == self.getWindowSize()
+
+    def getValue(self):
+        ret = None
+        if self.windowFull():
+            ret = to_last_value(self.__talibFunc(*self.getValues(), **self.__params))
+        return ret
+
+
+def get_columns(barDataSeries, inputs):
+    """Returns the column DataSeries of a :class:`pyalgotrade.dataseries.bards.BarDataSeries` for the input names."""
+    getters = {
+        "open": barDataSeries.getOpenDataSeries,
+        "high": barDataSeries.getHighDataSeries,
+        "low": barDataSeries.getLowDataSeries,
+        "close": barDataSeries.getCloseDataSeries,
+        "volume": barDataSeries.getVolumeDataSeries,
+    }
+    for name in inputs:
+        assert name in getters, "Invalid input %s" % name
+    return [getters[name]() for name in inputs]
+
+
+class TALibColumnsEventWindow(technical.EventWindow):
+    """Calls a TA-Lib function with the last values held by the column DataSeries of a
+    :class:`pyalgotrade.dataseries.bards.BarDataSeries`, like the one returned by getHighDataSeries(). The values are
+    read directly from the DataSeries without copying them, so the window only counts the bars."""
+
+    def __init__(self, count, talibFunc, params, barDataSeries, inputs):
+        super(TALibColumnsEventWindow, self).__init__(1, dtype=object)
+        self.__count = count
+        self.__talibFunc = talibFunc
+        self.__params = params
+        self.__inputs = inputs
+        self.__columns = get_columns(barDataSeries, inputs)
+        self.__bars = 0
+
+    def onNewValue(self, dateTime, value):
+        if value is not None and self.__bars < self.__count:
+            self.__bars += 1
+
+    def getValues(self):
+        """Returns a list with the values for each column."""
+        return [column.asArray(self.__count) for column in self.__columns]
+
+    def getWindowSize(self):
+        return self.__count
+
+    def windowFull(self):
+        return self.__bars == self.__count
+
+    def getValue(self):
+        ret = None
+        if self.windowFull():
+            ret = to_last_value(self.__talibFunc(*self.getValues(), **self.__params))
+        return ret
+
+    def computeBatch(self, dateTimes, values):
+        # The columns hold the bars that were added to the BarDataSeries, not the ones being computed, so the bars are
+        # replayed through a window that holds its own values.
+        assert self.__bars == 0, "The window is not empty"
+        eventWindow = TALibBarEventWindow(self.__count, self.__talibFunc, self.__params, self.__inputs, False)
+        return eventWindow.computeBatch(dateTimes, values)
+
+
+class TALibFilter(technical.EventBasedFilter):
+    """A filter that calls a TA-Lib function with the last values every time a new value is added, and keeps the last
+    value calculated. Functions with multiple outputs, like talib.BBANDS, yield a tuple. Values are None until count
+    values are available, and while TA-Lib returns NaN.
+
+    The values are the same as the last ones returned by the :mod:`pyalgotrade.talibext.indicator` functions with the
+    same count, but the values are held in the window instead of being read from the DataSeries on every call.
+
+    :param dataSeries: The DataSeries instance being filtered.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param talibFunc: The TA-Lib function, like talib.SMA.
+    :param count: The number of values to pass to the TA-Lib function. Use :func:`get_lookback` + 1 to calculate only
+        the newest value, for functions whose values don't depend on all the values that came before.
+    :type count: int.
+    :param params: The parameters for the TA-Lib function, like {"timeperiod": 20}.
+    :type params: dict.
+    :param inputs: If dataSeries is a :class:`pyalgotrade.dataseries.bards.BarDataSeries`, the bar values to pass to
+        the TA-Lib function, in order. Valid names are open, high, low, close and volume.
+    :type inputs: list.
+    :param useAdjustedValues: True to use adjusted bar values.
+    :type useAdjustedValues: boolean.
+    :param maxLen: The maximum number of values to hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    """
+
+    def __init__(self, dataSeries, talibFunc, count, params={}, inputs=None, useAdjustedValues=False, maxLen=None):
+        if inputs is None:
+            eventWindow = TALibEventWindow(count, talibFunc, params)
+        elif not useAdjustedValues and dataSeries.getMaxLen() >= count:
+            # The BarDataSeries holds enough unadjusted values in its own columns.
+            eventWindow = TALibColumnsEventWindow(count, talibFunc, params, dataSeries, inputs)
+        else:
+            eventWindow = TALibBarEventWindow(count, talibFunc, params, inputs, useAdjustedValues)
+        super(TALibFilter, self).__init__(dataSeries, eventWindow, maxLen)
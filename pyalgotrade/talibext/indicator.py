@@ -21,14 +21,27 @@
 import talib
 import numpy
 
+from pyalgotrade import dataseries
+from pyalgotrade.dataseries import bards
+
 
 # Returns the last values of a dataseries as a numpy.array, or None if not enough values could be retrieved from the
-# dataseries.
+# dataseries, or if any of them is None. If the dataseries holds fewer than count values, all of them are returned.
 def value_ds_to_numpy(ds, count):
     ret = None
+    if isinstance(ds, (dataseries.NumericDataSeries, bards.PriceDataSeries)):
+        # Use the values held by the dataseries without building a list. These dataseries store None as NaN and return
+        # NaN as None, so NaN values are missing values, like the ones from bars without an adjusted close.
+        values = ds.asArray(count)
+        if not numpy.isnan(values).any():
+            ret = numpy.asarray(values, dtype=numpy.float64)
+        return ret
+
     try:
         values = ds[count*-1:]
-        ret = numpy.array([float(value) for value in values])
+        # Converting the whole list at once is faster than converting each value, but None would become NaN.
+        if None not in values:
+            ret = numpy.array(values, dtype=numpy.float64)
     except IndexError:
         pass
     except TypeError:  # In case we try to convert None to float.
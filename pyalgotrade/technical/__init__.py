@@ -18,10 +18,77 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import copy
+
+import numpy as np
+
 from pyalgotrade.utils import collections
 from pyalgotrade import dataseries
 
 
+def to_batch_array(values):
+    """Returns the values as a numpy.array of floats, or None if there are None values."""
+    if isinstance(values, np.ndarray) and values.dtype.kind == "f":
+        return values
+    if any(value is None for value in values):
+        return None
+    return np.asarray(values, dtype=float)
+
+
+def rolling_windows(values, windowSize):
+    """Returns a read-only 2D view of a numpy.array with one row for each full window."""
+    values = np.ascontiguousarray(values)
+    count = max(len(values) - windowSize + 1, 0)
+    return np.lib.stride_tricks.as_strided(
+        values, shape=(count, windowSize), strides=(values.strides[0], values.strides[0]), writeable=False
+    )
+
+
+def apply_rolling(values, windowSize, function):
+    """Calls function with chunks of rolling windows, to bound the size of temporary arrays, and concatenates the
+    results."""
+    windows = rolling_windows(values, windowSize)
+    chunkSize = max(1, 2**20 // windowSize)
+    chunks = [function(windows[i:i+chunkSize]) for i in range(0, len(windows), chunkSize)]
+    if len(chunks) == 0:
+        return np.empty(0)
+    return np.concatenate(chunks)
+
+
+class PrecomputedValues(object):
+    """Holds values calculated in advance for a known input sequence, and hands them out while the values being
+    filtered match that sequence.
+
+    :param values: The input values.
+    :param dateTimes: The datetimes for the input values, or None to match values only.
+    :param outputs: The values calculated for each input value.
+    """
+
+    def __init__(self, values, dateTimes, outputs):
+        assert len(values) == len(outputs)
+        assert dateTimes is None or len(dateTimes) == len(values)
+        self.__values = values.tolist() if isinstance(values, np.ndarray) else list(values)
+        self.__dateTimes = None if dateTimes is None else list(dateTimes)
+        self.__outputs = outputs
+        self.__pos = 0
+
+    def pop(self, dateTime, value):
+        """Returns a (matched, output) tuple with the next precomputed value, if dateTime and value match the next
+        input."""
+        pos = self.__pos
+        if pos < len(self.__values) and value == self.__values[pos] and (
+            self.__dateTimes is None or dateTime == self.__dateTimes[pos]
+        ):
+            self.__pos += 1
+            return True, self.__outputs[pos]
+        return False, None
+
+    def getConsumed(self):
+        """Returns a list of (dateTime, value) tuples for the inputs that were matched."""
+        dateTimes = [None] * self.__pos if self.__dateTimes is None else self.__dateTimes[:self.__pos]
+        return list(zip(dateTimes, self.__values[:self.__pos]))
+
+
 class EventWindow(object):
     """An EventWindow class is responsible for making calculation over a moving window of values.
 
@@ -62,6 +129,29 @@ class EventWindow(object):
         """Override to calculate a value using the values in the window."""
         raise NotImplementedError()
 
+    def computeBatch(self, dateTimes, values):
+        """Calculates the values that :meth:`getValue` returns after each value is added, in a single pass.
+        This window must be empty, and it is not modified.
+
+        Override to use vectorized operations. Results must be identical to the ones calculated adding values one by
+        one, so the same floating point operations have to be performed in the same order.
+
+        :param dateTimes: The datetimes for the values, or None.
+        :type dateTimes: list.
+        :param values: The values.
+        :type values: list or numpy.array.
+        :rtype: A list with one value for each value added.
+        """
+        assert len(self.__values) == 0, "The window is not empty"
+        if dateTimes is None:
+            dateTimes = [None] * len(values)
+        window = copy.deepcopy(self)
+        ret = []
+        for dateTime, value in zip(dateTimes, values):
+            window.onNewValue(dateTime, value)
+            ret.append(window.getValue())
+        return ret
+
 
 class EventBasedFilter(dataseries.SequenceDataSeries):
     """An EventBasedFilter class is responsible for capturing new values in a :class:`pyalgotrade.dataseries.DataSeries`
@@ -82,8 +172,16 @@ class EventBasedFilter(dataseries.SequenceDataSeries):
         self.__dataSeries = dataSeries
         self.__dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
         self.__eventWindow = eventWindow
+        self.__precomputed = None
 
     def __onNewValue(self, dataSeries, dateTime, value):
+        if self.__precomputed is not None:
+            matched, newValue = self.__precomputed.pop(dateTime, value)
+            if matched:
+                self.appendWithDateTime(dateTime, newValue)
+                return
+            self.__stopPrecomputed()
+
         # Let the event window perform calculations.
         self.__eventWindow.onNewValue(dateTime, value)
         # Get the resulting value
@@ -94,5 +192,41 @@ class EventBasedFilter(dataseries.SequenceDataSeries):
     def getDataSeries(self):
         return self.__dataSeries
 
+    def detach(self):
+        """Stops filtering values from the DataSeries being filtered."""
+        self.__dataSeries.getNewValueEvent().unsubscribe(self.__onNewValue)
+
+    def __stopPrecomputed(self):
+        # The event window is not updated while precomputed values are used, so it has to catch up before values can
+        # be processed one by one.
+        for dateTime, value in self.__precomputed.getConsumed():
+            self.__eventWindow.onNewValue(dateTime, value)
+        self.__precomputed = None
+
+    def precompute(self, values, dateTimes=None, outputs=None):
+        """Calculates the filter over values known in advance, like the whole close price series in a backtest,
+        using :meth:`EventWindow.computeBatch`. As values are added to the DataSeries being filtered, the precomputed
+        values are used instead of updating the event window, as long as the values (and datetimes, if supplied) match
+        the ones precomputed. Once they don't, the event window catches up and values are processed one by one.
+        Either way, the values are identical to the ones calculated without this.
+
+        :param values: The values that will be added to the DataSeries being filtered.
+        :type values: list or numpy.array.
+        :param dateTimes: The datetimes for those values. Filters that use datetimes require them.
+        :type dateTimes: list.
+        :param outputs: The values already calculated by :meth:`EventWindow.computeBatch` for an identical filter, or
+            None to calculate them.
+        :type outputs: list.
+
+        .. note::
+            This must be called before any values are added to the DataSeries being filtered.
+        """
+        assert len(self) == 0, "Values were already filtered"
+        if outputs is None:
+            outputs = self.__eventWindow.computeBatch(dateTimes, values)
+        self.__precomputed = PrecomputedValues(values, dateTimes, outputs)
+
     def getEventWindow(self):
+        if self.__precomputed is not None:
+            self.__stopPrecomputed()
         return self.__eventWindow
@@ -0,0 +1,117 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import numpy as np
+
+from pyalgotrade import technical
+from pyalgotrade import dataseries
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import registry
+
+
+# Functions that calculate the values for many periods at once, for indicators whose values would otherwise be
+# calculated one by one.
+_FAMILIES = {
+    ma.EMA: ma.compute_ema_family,
+}
+
+
+class IndicatorBank(object):
+    """Calculates indicators over values known in advance, like the close prices for an instrument in a backtest, and
+    keeps the results so that every indicator with the same parameters is calculated only once, no matter how many
+    times the backtest runs. This is useful for parameter sweeps, like trying many (fast, slow) periods for an SMA
+    crossover.
+
+    Indicators are calculated with :meth:`pyalgotrade.technical.EventWindow.computeBatch`, so the values are identical
+    to the ones calculated as values are added to the DataSeries.
+
+    :param values: The values that will be added to the DataSeries being filtered.
+    :type values: list or numpy.array.
+    :param dateTimes: The datetimes for those values. Filters that use datetimes require them.
+    :type dateTimes: list.
+    """
+
+    def __init__(self, values, dateTimes=None):
+        self.__values = values
+        self.__dateTimes = dateTimes
+        # Converted only once for all the indicators.
+        self.__batchValues = technical.to_batch_array(values)
+        if self.__batchValues is None:
+            self.__batchValues = values
+        # Key -> outputs
+        self.__outputs = {}
+
+    def __getKey(self, indicatorClass, args, kwargs):
+        return (
+            indicatorClass, registry.freeze(args),
+            tuple(sorted((name, registry.freeze(value)) for name, value in kwargs.items()))
+        )
+
+    def getOutputs(self, indicatorClass, *args, **kwargs):
+        """Returns the values for indicatorClass(dataSeries, \\*args, \\*\\*kwargs), calculating them if this is the
+        first time.
+
+        :param indicatorClass: A :class:`pyalgotrade.technical.EventBasedFilter` subclass.
+        :rtype: A list with one value for each value.
+        """
+        assert issubclass(indicatorClass, technical.EventBasedFilter), \
+            "indicatorClass must be a technical.EventBasedFilter subclass"
+
+        key = self.__getKey(indicatorClass, args, kwargs)
+        ret = self.__outputs.get(key)
+        if ret is None:
+            eventWindow = indicatorClass(dataseries.SequenceDataSeries(), *args, **kwargs).getEventWindow()
+            ret = eventWindow.computeBatch(self.__dateTimes, self.__batchValues)
+            self.__outputs[key] = ret
+        return ret
+
+    def addFamily(self, indicatorClass, periods, *args, **kwargs):
+        """Calculates indicatorClass(dataSeries, period, \\*args, \\*\\*kwargs) for every period.
+
+        :param indicatorClass: A :class:`pyalgotrade.technical.EventBasedFilter` subclass.
+        :param periods: The periods, like range(5, 301).
+        """
+        periods = list(periods)
+        family = _FAMILIES.get(indicatorClass)
+        if family is not None and len(args) == 0 and len(kwargs) == 0 and isinstance(self.__batchValues, np.ndarray):
+            missing = [
+                period for period in periods if self.__getKey(indicatorClass, (period,), {}) not in self.__outputs
+            ]
+            for period, outputs in family(self.__batchValues, missing).items():
+                self.__outputs[self.__getKey(indicatorClass, (period,), {})] = outputs
+
+        for period in periods:
+            self.getOutputs(indicatorClass, period, *args, **kwargs)
+
+    def build(self, indicatorClass, dataSeries, *args, **kwargs):
+        """Builds indicatorClass(dataSeries, \\*args, \\*\\*kwargs) and sets it up to use the values calculated by
+        this bank, as described in :meth:`pyalgotrade.technical.EventBasedFilter.precompute`.
+
+        :param indicatorClass: A :class:`pyalgotrade.technical.EventBasedFilter` subclass.
+        :param dataSeries: The DataSeries that will get the values. It must be empty.
+        :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+        """
+        ret = indicatorClass(dataSeries, *args, **kwargs)
+        ret.precompute(self.__values, self.__dateTimes, self.getOutputs(indicatorClass, *args, **kwargs))
+        return ret
+
+    def __len__(self):
+        """Returns the number of indicators calculated."""
+        return len(self.__outputs)
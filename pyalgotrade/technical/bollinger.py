@@ -49,6 +49,18 @@ class BollingerBands(object):
         # It is important to subscribe after sma and stddev since we'll use those values.
         dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
 
+    def precompute(self, values, dateTimes=None):
+        """Calculates the middle band and the standard deviation over values known in advance.
+        Check :meth:`pyalgotrade.technical.EventBasedFilter.precompute`.
+
+        :param values: The values that will be added to the DataSeries being filtered.
+        :type values: list or numpy.array.
+        :param dateTimes: The datetimes for those values.
+        :type dateTimes: list.
+        """
+        self.__sma.precompute(values, dateTimes)
+        self.__stdDev.precompute(values, dateTimes)
+
     def __onNewValue(self, dataSeries, dateTime, value):
         upperValue = None
         lowerValue = None
@@ -18,6 +18,9 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+from pyalgotrade import dataseries
+from pyalgotrade.dataseries import aligned
+
 
 def compute_diff(values1, values2):
     assert(len(values1) == len(values2))
@@ -51,15 +54,18 @@ def _cross_impl(values1, values2, start, end, signCheck):
     # Get both set of values.
     values1, values2 = _get_stripped(values1[start:end], values2[start:end], start > 0)
 
-    # Compute differences and check sign changes.
+    # Compute differences and check sign changes, skipping the ones that are 0.
     ret = 0
-    diffs = compute_diff(values1, values2)
-    diffs = filter(lambda x: x != 0, diffs)
     prevDiff = None
-    for diff in diffs:
-        if prevDiff is not None and not signCheck(prevDiff) and signCheck(diff):
-            ret += 1
-        prevDiff = diff
+    for v1, v2 in zip(values1, values2):
+        if v1 is not None and v2 is not None:
+            diff = v1 - v2
+        else:
+            diff = None
+        if diff != 0:
+            if prevDiff is not None and not signCheck(prevDiff) and signCheck(diff):
+                ret += 1
+            prevDiff = diff
     return ret
 
 
@@ -76,6 +82,9 @@ def _cross_impl(values1, values2, start, end, signCheck):
 # Since it was too complicated to make CrossAbove and CrossBelow filters work with this new model (
 # mainly because the underlying DataSeries may not get new values added at the same time, or one after
 # another) I decided to turn those into functions, cross_above and cross_below.
+# Cross is the event based alternative for the common case of checking the last 2 values on every bar. It aligns the
+# values by datetime, like dataseries.aligned does, which takes care of the DataSeries not getting new values at the
+# same time.
 
 def cross_above(values1, values2, start=-2, end=None):
     """Checks for a cross above conditions over the specified period between two DataSeries objects.
@@ -115,3 +124,46 @@ def cross_below(values1, values2, start=-2, end=None):
         The default start and end values check for cross below conditions over the last 2 values.
     """
     return _cross_impl(values1, values2, start, end, lambda x: x < 0)
+
+
+class Cross(dataseries.SequenceDataSeries):
+    """A DataSeries that checks for cross above and cross below conditions between two DataSeries as new values are
+    added to them. Values are aligned by datetime and for every datetime in both DataSeries a new value is added:
+
+     * 1 if values1 crossed above values2.
+     * -1 if values1 crossed below values2.
+     * 0 otherwise.
+
+    Every value is the same as calling :func:`cross_above` and :func:`cross_below` with the default start and end,
+    once both DataSeries got a value for that datetime, but it is calculated in constant time.
+
+    :param values1: The DataSeries that crosses.
+    :type values1: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param values2: The DataSeries being crossed.
+    :type values2: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param maxLen: The maximum number of values to hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    """
+
+    def __init__(self, values1, values2, maxLen=None):
+        super(Cross, self).__init__(maxLen)
+        aligned.subscribe_aligned(values1, values2, self.__onAligned)
+        self.__prevDiff = None
+
+    def __onAligned(self, dateTime, value1, value2):
+        if value1 is not None and value2 is not None:
+            diff = value1 - value2
+        else:
+            diff = None
+
+        ret = 0
+        prevDiff = self.__prevDiff
+        if prevDiff is not None and diff is not None:
+            if prevDiff < 0 and diff > 0:
+                ret = 1
+            elif prevDiff > 0 and diff < 0:
+                ret = -1
+        self.__prevDiff = diff
+        self.appendWithDateTime(dateTime, ret)
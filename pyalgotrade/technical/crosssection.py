@@ -0,0 +1,204 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import numpy as np
+from scipy import stats
+
+from pyalgotrade.instrument import build_instrument
+from pyalgotrade.utils import collections
+
+
+# Cross-sectional operations. They receive a numpy.array with one value for each instrument and return a
+# numpy.array with one value for each instrument. NaN values are ignored and stay NaN.
+
+def rank(values):
+    """Ranks the values in ascending order, starting at 1. Ties get the average of their ranks."""
+    values = np.asarray(values, dtype=float)
+    ret = np.full(values.shape, np.nan)
+    mask = ~np.isnan(values)
+    if mask.any():
+        ret[mask] = stats.rankdata(values[mask])
+    return ret
+
+
+def percentile(values):
+    """Returns the rank of the values divided by the number of values, so the highest value is 1."""
+    ret = rank(values)
+    count = np.count_nonzero(~np.isnan(ret))
+    if count:
+        ret /= count
+    return ret
+
+
+def demean(values):
+    """Subtracts the mean from the values."""
+    values = np.asarray(values, dtype=float)
+    if np.isnan(values).all():
+        return values.copy()
+    return values - np.nanmean(values)
+
+
+def zscore(values, ddof=0):
+    """Returns how many standard deviations each value is away from the mean."""
+    values = np.asarray(values, dtype=float)
+    if np.count_nonzero(~np.isnan(values)) <= ddof:
+        return np.full(values.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return demean(values) / np.nanstd(values, ddof=ddof)
+
+
+def top_k(values, k):
+    """Returns the positions of the k highest values, highest first. There may be less than k if there are NaN
+    values."""
+    values = np.asarray(values, dtype=float)
+    positions = np.flatnonzero(~np.isnan(values))
+    if k < len(positions):
+        positions = positions[np.argpartition(-values[positions], k)[:k]]
+    # Stable, so ties are ordered by position.
+    return positions[np.argsort(-values[positions], kind="mergesort")]
+
+
+def _get_price(bar):
+    return bar.getPrice()
+
+
+class CrossSection(object):
+    """Holds the last values for many instruments in a single (instruments x values) matrix, so cross-sectional
+    calculations, like ranking all the instruments on every bar, take a few numpy calls instead of a loop over the
+    instruments.
+
+    A column is added for every datetime with bars for at least one of the instruments. Instruments without a bar for
+    that datetime get NaN.
+
+    :param barFeed: The bar feed.
+    :type barFeed: :class:`pyalgotrade.barfeed.BaseBarFeed`.
+    :param instruments: The instruments.
+    :type instruments: A list of :class:`pyalgotrade.instrument.Instrument` or strings formatted like
+        QUOTE_SYMBOL/PRICE_CURRENCY.
+    :param windowSize: The number of values to hold for each instrument.
+    :type windowSize: int.
+    :param getter: A function that receives a :class:`pyalgotrade.bar.Bar` and returns the value to hold. If None,
+        the bar price is used, which is the adjusted close if the feed uses adjusted values.
+    :type getter: function.
+    """
+
+    def __init__(self, barFeed, instruments, windowSize, getter=None):
+        assert windowSize > 0, "Invalid window size"
+
+        self.__instruments = [build_instrument(instrument) for instrument in instruments]
+        self.__values = collections.NumPyColumnsDeque(windowSize, len(self.__instruments))
+        self.__getter = getter if getter is not None else _get_price
+        # Values for the last datetime. They are added to the matrix when they are needed, since the bars for an
+        # instrument may come after the ones for the other instruments.
+        self.__row = np.full(len(self.__instruments), np.nan)
+        self.__rowDateTime = None
+        self.__rowAdded = False
+        self.__rowChanged = False
+
+        for pos, instrument in enumerate(self.__instruments):
+            barFeed.registerDataSeries(instrument)
+            barFeed.getDataSeries(instrument).getNewValueEvent().subscribe(self.__buildHandler(pos))
+
+    def __buildHandler(self, pos):
+        return lambda dataSeries, dateTime, bar: self.__onBar(pos, dateTime, bar)
+
+    def __onBar(self, pos, dateTime, bar):
+        if dateTime != self.__rowDateTime:
+            self.__update()
+            self.__row.fill(np.nan)
+            self.__rowDateTime = dateTime
+            self.__rowAdded = False
+        self.__row[pos] = self.__getter(bar)
+        self.__rowChanged = True
+
+    def __update(self):
+        if self.__rowChanged:
+            if self.__rowAdded:
+                self.__values.setLast(self.__row)
+            else:
+                self.__values.append(self.__row)
+                self.__rowAdded = True
+            self.__rowChanged = False
+
+    def __len__(self):
+        """Returns the number of values held for each instrument."""
+        self.__update()
+        return len(self.__values)
+
+    def getInstruments(self):
+        """Returns the instruments, in the same order as the rows."""
+        return self.__instruments
+
+    def getWindowSize(self):
+        return self.__values.getMaxLen()
+
+    def windowFull(self):
+        return len(self) == self.getWindowSize()
+
+    def getDateTime(self):
+        """Returns the datetime for the last values."""
+        return self.__rowDateTime
+
+    def getValues(self):
+        """Returns a 2D numpy.array with one row for each instrument, oldest values first.
+
+        .. note::
+            The array is a view that gets overwritten as new values are added.
+        """
+        self.__update()
+        return self.__values.data()
+
+    def getLastValues(self):
+        """Returns a numpy.array with the last value for each instrument."""
+        values = self.getValues()
+        if values.shape[1] == 0:
+            return np.full(len(self.__instruments), np.nan)
+        return values[:, -1]
+
+    def getReturns(self, period=1):
+        """Returns a numpy.array with the return for each instrument over the last period values.
+        Values are NaN until there are period + 1 values.
+        """
+        values = self.getValues()
+        if values.shape[1] <= period:
+            return np.full(len(self.__instruments), np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return values[:, -1] / values[:, -1 - period] - 1
+
+    def getMeans(self, period=None):
+        """Returns a numpy.array with the mean of the last period values for each instrument, or all the values if
+        period is None. Values are NaN until there are period values, or if any of them is NaN.
+        """
+        values = self.getValues()
+        if period is None:
+            period = values.shape[1]
+        if period == 0 or values.shape[1] < period:
+            return np.full(len(self.__instruments), np.nan)
+        return values[:, -period:].mean(axis=1)
+
+    def getTop(self, values, k):
+        """Returns the instruments with the k highest values, highest first, skipping the ones with NaN.
+
+        :param values: A numpy.array with one value for each instrument, like the ones returned by
+            :meth:`getReturns` or by :func:`rank`.
+        :param k: The number of instruments.
+        :type k: int.
+        """
+        return [self.__instruments[pos] for pos in top_k(values, k)]
@@ -18,22 +18,87 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import collections
+
 from pyalgotrade import technical
 
 
+class RollingExtreme(object):
+    """Keeps the lowest or highest of the last values added, in amortized O(1) time per value.
+
+    :param windowSize: The number of values to consider.
+    :type windowSize: int.
+    :param useMin: True to keep the lowest value, False to keep the highest one.
+    :type useMin: boolean.
+    """
+
+    def __init__(self, windowSize, useMin):
+        assert(windowSize > 0)
+        self.__windowSize = windowSize
+        self.__useMin = useMin
+        # (position, value) tuples for the values that can still become the extreme, so values are monotonic.
+        self.__candidates = collections.deque()
+        self.__count = 0
+        # Like numpy.min/max, a NaN in the window is the result.
+        self.__lastNaN = None
+
+    def add(self, value):
+        pos = self.__count
+        self.__count += 1
+        candidates = self.__candidates
+
+        value = float(value)
+        if value != value:
+            self.__lastNaN = pos
+        elif self.__useMin:
+            while candidates and candidates[-1][1] >= value:
+                candidates.pop()
+            candidates.append((pos, value))
+        else:
+            while candidates and candidates[-1][1] <= value:
+                candidates.pop()
+            candidates.append((pos, value))
+
+        if candidates and candidates[0][0] <= pos - self.__windowSize:
+            candidates.popleft()
+
+    def getValue(self):
+        """Returns the lowest or highest of the last windowSize values, or None if no values were added."""
+        if self.__lastNaN is not None and self.__lastNaN > self.__count - 1 - self.__windowSize:
+            return float("nan")
+        if self.__candidates:
+            return self.__candidates[0][1]
+        return None
+
+
 class HighLowEventWindow(technical.EventWindow):
     def __init__(self, windowSize, useMin):
         super(HighLowEventWindow, self).__init__(windowSize)
         self.__useMin = useMin
+        self.__extreme = RollingExtreme(windowSize, useMin)
+
+    def onNewValue(self, dateTime, value):
+        super(HighLowEventWindow, self).onNewValue(dateTime, value)
+        if value is not None:
+            self.__extreme.add(value)
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            values = self.getValues()
-            if self.__useMin:
-                ret = values.min()
-            else:
-                ret = values.max()
+            ret = self.__extreme.getValue()
+        return ret
+
+    def computeBatch(self, dateTimes, values):
+        batchValues = technical.to_batch_array(values)
+        if batchValues is None:
+            return super(HighLowEventWindow, self).computeBatch(dateTimes, values)
+
+        if self.__useMin:
+            function = lambda windows: windows.min(axis=1)  # noqa: E731
+        else:
+            function = lambda windows: windows.max(axis=1)  # noqa: E731
+        ret = [None] * min(len(batchValues), self.getWindowSize() - 1)
+        ret.extend(technical.apply_rolling(batchValues, self.getWindowSize(), function))
         return ret
 
 
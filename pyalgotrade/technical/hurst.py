@@ -44,21 +44,94 @@ def hurst_exp(p, minLags, maxLags):
 
 
 class HurstExponentEventWindow(technical.EventWindow):
-    def __init__(self, period, minLags, maxLags, logValues=True):
+    def __init__(self, period, minLags, maxLags, logValues=True, evalInterval=1):
+        assert evalInterval > 0, "evalInterval must be > 0"
         super(HurstExponentEventWindow, self).__init__(period)
         self.__minLags = minLags
         self.__maxLags = maxLags
         self.__logValues = logValues
+        self.__evalInterval = evalInterval
+        self.__lags = np.arange(minLags, maxLags)
+        # Every lag needs at least one difference to update the sums. Otherwise hurst_exp is used.
+        self.__incremental = maxLags <= period
+        # The number of differences for each lag.
+        self.__counts = (period - self.__lags).astype(float)
+        # The slope of the linear fit to the double-log graph is the dot product of these and log10(tau).
+        logLags = np.log10(self.__lags)
+        logLags = logLags - logLags.mean()
+        self.__fitWeights = logLags / logLags.dot(logLags)
+        # Differences for each lag are shifted by their mean at the time of the last recalculation.
+        self.__shifts = None
+        self.__sums = None
+        self.__sumSquares = None
+        self.__updates = 0
+        self.__valuesSinceEval = 0
+        self.__value = None
+        self.__stale = False
+
+    def __recalculate(self, values):
+        self.__shifts = np.empty(len(self.__lags))
+        self.__sums = np.empty(len(self.__lags))
+        self.__sumSquares = np.empty(len(self.__lags))
+        for i, lag in enumerate(self.__lags):
+            diffs = np.subtract(values[lag:], values[:-lag])
+            self.__shifts[i] = diffs.mean()
+            diffs -= self.__shifts[i]
+            self.__sums[i] = diffs.sum()
+            self.__sumSquares[i] = diffs.dot(diffs)
+        self.__updates = 0
 
     def onNewValue(self, dateTime, value):
         if value is not None and self.__logValues:
             value = np.log10(value)
+
+        oldDiffs = None
+        if value is not None and self.__incremental and self.windowFull():
+            values = self.getValues()
+            oldDiffs = values[self.__lags] - values[0]
+
         super(HurstExponentEventWindow, self).onNewValue(dateTime, value)
 
+        if value is None or not self.windowFull():
+            return
+
+        if self.__incremental:
+            # To bound the rounding errors that build up with each update, the sums are recalculated every time
+            # period values were added. oldTotal - oldTotal is not 0 for nan and inf, and those can't be removed.
+            oldTotal = None if oldDiffs is None else oldDiffs.sum()
+            if oldDiffs is None or self.__updates >= self.getWindowSize() or oldTotal - oldTotal != 0:
+                self.__recalculate(self.getValues())
+            else:
+                values = self.getValues()
+                newDiffs = values[-1] - values[-1 - self.__lags] - self.__shifts
+                oldDiffs -= self.__shifts
+                self.__sums += newDiffs - oldDiffs
+                self.__sumSquares += newDiffs * newDiffs - oldDiffs * oldDiffs
+                self.__updates += 1
+
+        if self.__value is None or self.__valuesSinceEval + 1 >= self.__evalInterval:
+            self.__stale = True
+            self.__valuesSinceEval = 0
+        else:
+            self.__valuesSinceEval += 1
+
+    def __evaluate(self):
+        if not self.__incremental:
+            return hurst_exp(self.getValues(), self.__minLags, self.__maxLags)
+
+        means = self.__sums / self.__counts
+        variances = np.maximum(self.__sumSquares / self.__counts - means * means, 0)
+        # tau is the square root of the standard deviation, so log10(tau) is log10(variance) / 4.
+        logTau = np.log10(variances) * 0.25
+        return self.__fitWeights.dot(logTau) * 2
+
     def getValue(self):
         ret = None
         if self.windowFull():
-            ret = hurst_exp(self.getValues(), self.__minLags, self.__maxLags)
+            if self.__stale:
+                self.__value = self.__evaluate()
+                self.__stale = False
+            ret = self.__value
         return ret
 
 
@@ -77,15 +150,21 @@ class HurstExponent(technical.EventBasedFilter):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded
         from the opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param evalInterval: The number of values between hurst exponent calculations. The last value calculated is
+        repeated in between.
+    :type evalInterval: int.
+
+    .. note::
+        The variance of the differences for each lag is updated as values come and go, so each value costs O(maxLags).
     """
 
-    def __init__(self, dataSeries, period, minLags=2, maxLags=20, logValues=True, maxLen=None):
+    def __init__(self, dataSeries, period, minLags=2, maxLags=20, logValues=True, maxLen=None, evalInterval=1):
         assert period > 0, "period must be > 0"
         assert minLags >= 2, "minLags must be >= 2"
         assert maxLags > minLags, "maxLags must be > minLags"
 
         super(HurstExponent, self).__init__(
             dataSeries,
-            HurstExponentEventWindow(period, minLags, maxLags, logValues),
+            HurstExponentEventWindow(period, minLags, maxLags, logValues, evalInterval),
             maxLen
         )
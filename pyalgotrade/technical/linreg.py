@@ -19,6 +19,8 @@
 """
 
 from pyalgotrade import technical
+from pyalgotrade import dataseries
+from pyalgotrade.dataseries import aligned
 from pyalgotrade.utils import collections
 from pyalgotrade.utils import dt
 
@@ -35,25 +37,137 @@ def lsreg(x, y):
     return res[0], res[1]
 
 
+class RollingLinearRegression(object):
+    """Least-squares regression line over a window of (x, y) values, updated in O(1) time using rolling sums.
+
+    To bound the rounding errors that build up with each update, the sums are recalculated from the values in the
+    window every time windowSize values were added.
+
+    :param windowSize: The size of the window. Must be greater than 1.
+    :type windowSize: int.
+    """
+
+    def __init__(self, windowSize):
+        assert(windowSize > 1)
+        self.__windowSize = windowSize
+        # Values are shifted by the means at the time of the last recalculation, so the sums don't lose precision when
+        # values are far from 0, like timestamps.
+        self.__shiftX = None
+        self.__shiftY = None
+        self.__sumX = None
+        self.__sumY = None
+        self.__sumXX = None
+        self.__sumXY = None
+        self.__sumYY = None
+        self.__updates = 0
+
+    def add(self, newX, newY, oldX, oldY, xValues, yValues):
+        """Updates the regression once a value was added to a full window.
+
+        :param newX: The x value that was added.
+        :param newY: The y value that was added.
+        :param oldX: The x value that left the window, or None if the window just got full.
+        :param oldY: The y value that left the window, or None if the window just got full.
+        :param xValues: A numpy.array with the x values in the window, including newX.
+        :param yValues: A numpy.array with the y values in the window, including newY.
+        """
+        # oldX - oldX is not 0 for nan and inf, and those can't be removed from the sums.
+        if oldX is None or self.__updates >= self.__windowSize or oldX - oldX != 0 or oldY - oldY != 0:
+            self.__shiftX = float(xValues.mean())
+            self.__shiftY = float(yValues.mean())
+            x = xValues - self.__shiftX
+            y = yValues - self.__shiftY
+            self.__sumX = float(x.sum())
+            self.__sumY = float(y.sum())
+            self.__sumXX = float(x.dot(x))
+            self.__sumXY = float(x.dot(y))
+            self.__sumYY = float(y.dot(y))
+            self.__updates = 0
+        else:
+            newX = float(newX) - self.__shiftX
+            newY = float(newY) - self.__shiftY
+            oldX = float(oldX) - self.__shiftX
+            oldY = float(oldY) - self.__shiftY
+            self.__sumX += newX - oldX
+            self.__sumY += newY - oldY
+            self.__sumXX += newX * newX - oldX * oldX
+            self.__sumXY += newX * newY - oldX * oldY
+            self.__sumYY += newY * newY - oldY * oldY
+            self.__updates += 1
+
+    def __getSums(self):
+        # Returns the sums of squared deviations from the means and of the products of the deviations.
+        n = float(self.__windowSize)
+        ssX = self.__sumXX - self.__sumX * self.__sumX / n
+        ssY = self.__sumYY - self.__sumY * self.__sumY / n
+        ssXY = self.__sumXY - self.__sumX * self.__sumY / n
+        return max(ssX, 0.0), max(ssY, 0.0), ssXY
+
+    def getSlope(self):
+        ssX, _, ssXY = self.__getSums()
+        if ssX == 0:
+            # Like scipy.stats.linregress.
+            return float("nan")
+        return ssXY / ssX
+
+    def getIntercept(self):
+        return self.getValueAt(0)
+
+    def getValueAt(self, x):
+        """Returns the y value for x on the regression line."""
+        n = self.__windowSize
+        return self.__shiftY + self.__sumY / n + self.getSlope() * (x - self.__shiftX - self.__sumX / n)
+
+    def getRSquared(self):
+        """Returns the coefficient of determination."""
+        ssX, ssY, ssXY = self.__getSums()
+        # Like scipy.stats.linregress, r is 0 if either variable is constant.
+        if ssX == 0 or ssY == 0:
+            return 0.0
+        return min(ssXY * ssXY / (ssX * ssY), 1.0)
+
+    def getResidualVariance(self, ddof=0):
+        """Returns the variance of the distances from the values to the regression line.
+
+        :param ddof: Delta degrees of freedom, like in numpy.var.
+        :type ddof: int.
+        """
+        ssX, ssY, ssXY = self.__getSums()
+        ssRes = ssY
+        if ssX != 0:
+            ssRes = max(ssY - ssXY * ssXY / ssX, 0.0)
+        return ssRes / float(self.__windowSize - ddof)
+
+
 class LeastSquaresRegressionWindow(technical.EventWindow):
     def __init__(self, windowSize):
         assert(windowSize > 1)
         super(LeastSquaresRegressionWindow, self).__init__(windowSize)
         self._timestamps = collections.NumPyDeque(windowSize)
+        self.__regression = RollingLinearRegression(windowSize)
 
     def onNewValue(self, dateTime, value):
+        oldTimestamp = None
+        oldValue = None
+        if value is not None and self.windowFull():
+            oldTimestamp = self._timestamps[0]
+            oldValue = self.getValues()[0]
+
         technical.EventWindow.onNewValue(self, dateTime, value)
         if value is not None:
             timestamp = dt.datetime_to_timestamp(dateTime)
             if len(self._timestamps):
                 assert(timestamp > self._timestamps[-1])
             self._timestamps.append(timestamp)
+            if self.windowFull():
+                self.__regression.add(
+                    timestamp, value, oldTimestamp, oldValue, self._timestamps.data(), self.getValues()
+                )
 
     def __getValueAtImpl(self, timestamp):
         ret = None
         if self.windowFull():
-            a, b = lsreg(self._timestamps.data(), self.getValues())
-            ret = a * timestamp + b
+            ret = self.__regression.getValueAt(timestamp)
         return ret
 
     def getValueAt(self, dateTime):
@@ -65,6 +179,9 @@ class LeastSquaresRegressionWindow(technical.EventWindow):
             ret = self.__getValueAtImpl(self._timestamps.data()[-1])
         return ret
 
+    def getRegression(self):
+        return self.__regression
+
 
 class LeastSquaresRegression(technical.EventBasedFilter):
     """Calculates values based on a least-squares regression.
@@ -94,13 +211,37 @@ class LeastSquaresRegression(technical.EventBasedFilter):
 class SlopeEventWindow(technical.EventWindow):
     def __init__(self, windowSize):
         super(SlopeEventWindow, self).__init__(windowSize)
-        self.__x = np.arange(windowSize)
+        # The slope doesn't change if x values are shifted, so the number of values added is used as x, and x values
+        # don't have to be shifted as the window moves.
+        self.__positions = collections.NumPyDeque(windowSize)
+        self.__count = 0
+        self.__regression = RollingLinearRegression(windowSize) if windowSize > 1 else None
+
+    def onNewValue(self, dateTime, value):
+        oldPosition = None
+        oldValue = None
+        if value is not None and self.windowFull():
+            oldPosition = self.__positions[0]
+            oldValue = self.getValues()[0]
+
+        super(SlopeEventWindow, self).onNewValue(dateTime, value)
+        if value is not None:
+            position = self.__count
+            self.__count += 1
+            self.__positions.append(position)
+            if self.__regression is not None and self.windowFull():
+                self.__regression.add(
+                    position, value, oldPosition, oldValue, self.__positions.data(), self.getValues()
+                )
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            y = self.getValues()
-            ret = lsreg(self.__x, y)[0]
+            if self.__regression is None:
+                # A single value has no slope.
+                ret = float("nan")
+            else:
+                ret = self.__regression.getSlope()
         return ret
 
 
@@ -150,3 +291,102 @@ class Trend(technical.EventBasedFilter):
         super(Trend, self).__init__(
             dataSeries, TrendEventWindow(windowSize, positiveThreshold, negativeThreshold), maxLen
         )
+
+
+class PairRegression(object):
+    """Least-squares regression of the values in one DataSeries on the values in another one, over a moving window,
+    for pairs trading. Values are aligned by datetime, like :func:`pyalgotrade.dataseries.aligned.datetime_aligned`
+    does, and the regression is updated in O(1) time for every datetime in both DataSeries.
+
+    For every datetime, values1 = alpha + beta * values2 + error, and:
+
+     * The spread is values1 - beta * values2.
+     * The z-score is how many standard deviations the spread is away from its mean in the window. The mean of the
+       spread is alpha.
+
+    Values are None until windowSize values are available, and when either value is None.
+
+    :param values1: The DataSeries with the dependent values.
+    :type values1: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param values2: The DataSeries with the independent values.
+    :type values2: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param windowSize: The number of values to use. Must be greater than 1.
+    :type windowSize: int.
+    :param ddof: Delta degrees of freedom for the standard deviation of the spread.
+    :type ddof: int.
+    :param maxLen: The maximum number of values to hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    """
+
+    def __init__(self, values1, values2, windowSize, ddof=1, maxLen=None):
+        assert windowSize > ddof, "Invalid window size"
+        self.__values1 = collections.NumPyDeque(windowSize)
+        self.__values2 = collections.NumPyDeque(windowSize)
+        self.__regression = RollingLinearRegression(windowSize)
+        self.__ddof = ddof
+        self.__beta = dataseries.SequenceDataSeries(maxLen)
+        self.__alpha = dataseries.SequenceDataSeries(maxLen)
+        self.__spread = dataseries.SequenceDataSeries(maxLen)
+        self.__zScore = dataseries.SequenceDataSeries(maxLen)
+        aligned.subscribe_aligned(values1, values2, self.__onAligned)
+
+    def __onAligned(self, dateTime, value1, value2):
+        beta = None
+        alpha = None
+        spread = None
+        zScore = None
+
+        if value1 is not None and value2 is not None:
+            windowSize = self.__values1.getMaxLen()
+            oldValue1 = None
+            oldValue2 = None
+            if len(self.__values1) == windowSize:
+                oldValue1 = self.__values1[0]
+                oldValue2 = self.__values2[0]
+            self.__values1.append(value1)
+            self.__values2.append(value2)
+
+            if len(self.__values1) == windowSize:
+                self.__regression.add(
+                    value2, value1, oldValue2, oldValue1, self.__values2.data(), self.__values1.data()
+                )
+                beta = self.__regression.getSlope()
+                alpha = self.__regression.getIntercept()
+                spread = value1 - beta * value2
+                stdDev = self.__regression.getResidualVariance(self.__ddof) ** 0.5
+                if stdDev == 0:
+                    zScore = float("nan")
+                else:
+                    zScore = (spread - alpha) / stdDev
+
+        self.__beta.appendWithDateTime(dateTime, beta)
+        self.__alpha.appendWithDateTime(dateTime, alpha)
+        self.__spread.appendWithDateTime(dateTime, spread)
+        self.__zScore.appendWithDateTime(dateTime, zScore)
+
+    def getBeta(self):
+        """
+        Returns the slope of the regression line, also known as the hedge ratio, as a
+        :class:`pyalgotrade.dataseries.DataSeries`.
+        """
+        return self.__beta
+
+    def getAlpha(self):
+        """
+        Returns the intercept of the regression line as a :class:`pyalgotrade.dataseries.DataSeries`.
+        """
+        return self.__alpha
+
+    def getSpread(self):
+        """
+        Returns the spread as a :class:`pyalgotrade.dataseries.DataSeries`.
+        """
+        return self.__spread
+
+    def getZScore(self):
+        """
+        Returns the z-score of the spread as a :class:`pyalgotrade.dataseries.DataSeries`.
+        """
+        return self.__zScore
@@ -63,6 +63,24 @@ class SMAEventWindow(technical.EventWindow):
     def getValue(self):
         return self.__value
 
+    def computeBatch(self, dateTimes, values):
+        batchValues = technical.to_batch_array(values)
+        if batchValues is None:
+            return super(SMAEventWindow, self).computeBatch(dateTimes, values)
+
+        period = self.getWindowSize()
+        ret = [None] * min(len(batchValues), period - 1)
+        if len(batchValues) >= period:
+            # The first average is the mean of the first window, and the rest are calculated adding value / period and
+            # then adding -firstValue / period. numpy.cumsum adds sequentially, so interleaving both terms performs the
+            # same operations as onNewValue, in the same order.
+            terms = np.empty(2 * (len(batchValues) - period) + 1)
+            terms[0] = batchValues[:period].mean()
+            terms[1::2] = batchValues[period:] / float(period)
+            terms[2::2] = -(batchValues[:-period] / float(period))
+            ret.extend(np.cumsum(terms)[::2])
+        return ret
+
 
 class SMA(technical.EventBasedFilter):
     """Simple Moving Average filter.
@@ -100,6 +118,58 @@ class EMAEventWindow(technical.EventWindow):
     def getValue(self):
         return self.__value
 
+    def computeBatch(self, dateTimes, values):
+        batchValues = technical.to_batch_array(values)
+        if batchValues is None:
+            return super(EMAEventWindow, self).computeBatch(dateTimes, values)
+
+        period = self.getWindowSize()
+        ret = [None] * min(len(batchValues), period - 1)
+        if len(batchValues) >= period:
+            # Each value depends on the previous one, so this can't be vectorized without changing the rounding.
+            # Plain floats are used for speed, and they round like numpy.float64.
+            value = float(batchValues[:period].mean())
+            emas = [value]
+            multiplier = self.__multiplier
+            for newValue in batchValues[period:].tolist():
+                value = (newValue - value) * multiplier + value
+                emas.append(value)
+            ret.extend(np.array(emas))
+        return ret
+
+
+def compute_ema_family(values, periods):
+    """Calculates :meth:`EMAEventWindow.computeBatch` for many periods in a single pass over the values, updating the
+    averages for all the periods with numpy operations that round like the ones performed for a single period.
+
+    :param values: The values.
+    :type values: numpy.array.
+    :param periods: The periods.
+    :rtype: A dictionary with the values calculated for each period.
+    """
+    periods = sorted(set(periods))
+    assert len(periods) == 0 or periods[0] > 1
+    periods = [period for period in periods if period <= len(values)]
+    ret = {}
+    if len(periods):
+        multipliers = np.array([2.0 / (period + 1) for period in periods])
+        # Periods whose first average is at each position.
+        seeds = {}
+        for i, period in enumerate(periods):
+            seeds.setdefault(period - 1, []).append(i)
+        emas = np.zeros(len(periods))
+        outputs = np.empty((len(periods), len(values)))
+        for pos in range(periods[0] - 1, len(values)):
+            # Averages for periods that didn't start yet are meaningless, and are never used.
+            emas = (values[pos] - emas) * multipliers + emas
+            for i in seeds.get(pos, []):
+                emas[i] = values[:pos + 1].mean()
+            outputs[:, pos] = emas
+        for i, period in enumerate(periods):
+            ret[period] = [None] * (period - 1)
+            ret[period].extend(outputs[i, period - 1:])
+    return ret
+
 
 class EMA(technical.EventBasedFilter):
     """Exponential Moving Average filter.
@@ -132,6 +202,18 @@ class WMAEventWindow(technical.EventWindow):
             ret = accum / float(weightSum)
         return ret
 
+    def computeBatch(self, dateTimes, values):
+        batchValues = technical.to_batch_array(values)
+        if batchValues is None:
+            return super(WMAEventWindow, self).computeBatch(dateTimes, values)
+
+        weights = self.__weights
+        ret = [None] * min(len(batchValues), len(weights) - 1)
+        ret.extend(technical.apply_rolling(
+            batchValues, len(weights), lambda windows: (windows * weights).sum(axis=1) / float(weights.sum())
+        ))
+        return ret
+
 
 class WMA(technical.EventBasedFilter):
     """Weighted Moving Average filter.
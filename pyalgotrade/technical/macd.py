@@ -18,6 +18,7 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+from pyalgotrade import technical
 from pyalgotrade.technical import ma
 from pyalgotrade import dataseries
 
@@ -58,6 +59,7 @@ class MACD(dataseries.SequenceDataSeries):
         self.__signalEMAWindow = ma.EMAEventWindow(signalEMA)
         self.__signal = dataseries.SequenceDataSeries(maxLen)
         self.__histogram = dataseries.SequenceDataSeries(maxLen)
+        self.__precomputed = None
         dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
 
     def getSignal(self):
@@ -71,7 +73,66 @@ class MACD(dataseries.SequenceDataSeries):
         """
         return self.__histogram
 
+    def precompute(self, values, dateTimes=None):
+        """Calculates the MACD, the signal and the histogram over values known in advance.
+        Check :meth:`pyalgotrade.technical.EventBasedFilter.precompute`.
+
+        :param values: The values that will be added to the DataSeries being filtered.
+        :type values: list or numpy.array.
+        :param dateTimes: The datetimes for those values.
+        :type dateTimes: list.
+
+        .. note::
+            This must be called before any values are added to the DataSeries being filtered, and it has no effect if
+            there are None values.
+        """
+        assert len(self) == 0, "Values were already filtered"
+        batchValues = technical.to_batch_array(values)
+        if batchValues is None:
+            return
+
+        skip = self.__fastEMASkip
+        slowValues = self.__slowEMAWindow.computeBatch(None, batchValues)
+        fastValues = [None] * min(skip, len(batchValues))
+        fastValues.extend(self.__fastEMAWindow.computeBatch(None, batchValues[skip:]))
+        diffs = [
+            None if fastValue is None else fastValue - slowValue for fastValue, slowValue in zip(fastValues, slowValues)
+        ]
+        # The signal window skips the None values at the beginning.
+        firstDiff = min(skip + self.__fastEMAWindow.getWindowSize() - 1, len(diffs))
+        signalValues = [None] * firstDiff
+        signalValues.extend(self.__signalEMAWindow.computeBatch(None, diffs[firstDiff:]))
+        outputs = []
+        for diff, signalValue in zip(diffs, signalValues):
+            if signalValue is None:
+                outputs.append((None, None, None))
+            else:
+                outputs.append((diff, signalValue, diff - signalValue))
+        self.__precomputed = technical.PrecomputedValues(batchValues, dateTimes, outputs)
+
+    def __stopPrecomputed(self):
+        # Windows are not updated while precomputed values are used, so they have to catch up.
+        for dateTime, value in self.__precomputed.getConsumed():
+            self.__updateWindows(dateTime, value)
+        self.__precomputed = None
+
     def __onNewValue(self, dataSeries, dateTime, value):
+        if self.__precomputed is not None:
+            matched, values = self.__precomputed.pop(dateTime, value)
+            if matched:
+                macdValue, signalValue, histogramValue = values
+                self.appendWithDateTime(dateTime, macdValue)
+                self.__signal.appendWithDateTime(dateTime, signalValue)
+                self.__histogram.appendWithDateTime(dateTime, histogramValue)
+                return
+            self.__stopPrecomputed()
+
+        macdValue, signalValue, histogramValue = self.__updateWindows(dateTime, value)
+        self.appendWithDateTime(dateTime, macdValue)
+        self.__signal.appendWithDateTime(dateTime, signalValue)
+        self.__histogram.appendWithDateTime(dateTime, histogramValue)
+
+    def __updateWindows(self, dateTime, value):
         diff = None
         macdValue = None
         signalValue = None
@@ -95,7 +156,4 @@ class MACD(dataseries.SequenceDataSeries):
             macdValue = diff
             signalValue = self.__signalEMAWindow.getValue()
             histogramValue = macdValue - signalValue
-
-        self.appendWithDateTime(dateTime, macdValue)
-        self.__signal.appendWithDateTime(dateTime, signalValue)
-        self.__histogram.appendWithDateTime(dateTime, histogramValue)
+        return macdValue, signalValue, histogramValue
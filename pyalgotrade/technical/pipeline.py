@@ -0,0 +1,125 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+from pyalgotrade import technical
+from pyalgotrade import dataseries
+
+
+class Pipeline(dataseries.SequenceDataSeries):
+    """A filter that chains :class:`pyalgotrade.technical.EventWindow` instances, so the values calculated by each one
+    are the input for the next one. The values are the ones that the last window calculates.
+
+    The values are identical to the ones calculated chaining :class:`pyalgotrade.technical.EventBasedFilter`
+    instances, like an EMA over an RSI, but intermediate values are not stored in DataSeries and don't emit events,
+    unless requested.
+
+    :param dataSeries: The DataSeries instance being filtered.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param eventWindows: The event windows to chain, starting with the one that gets the values being filtered.
+        They must be empty.
+    :type eventWindows: list.
+    :param keep: The positions in eventWindows of the windows whose values should be available using
+        :meth:`getIntermediate`.
+    :type keep: list.
+    :param maxLen: The maximum number of values to hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    """
+
+    def __init__(self, dataSeries, eventWindows, keep=[], maxLen=None):
+        assert len(eventWindows) > 0, "No event windows"
+        for pos in keep:
+            assert 0 <= pos < len(eventWindows) - 1, "Invalid intermediate position %s" % pos
+
+        super(Pipeline, self).__init__(maxLen)
+        self.__eventWindows = list(eventWindows)
+        self.__intermediates = [
+            dataseries.SequenceDataSeries(maxLen) if pos in keep else None for pos in range(len(eventWindows) - 1)
+        ]
+        self.__precomputed = None
+        dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
+
+    def getEventWindows(self):
+        if self.__precomputed is not None:
+            self.__stopPrecomputed()
+        return self.__eventWindows
+
+    def getIntermediate(self, pos):
+        """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the values calculated by one of the event windows.
+
+        :param pos: The position of the event window. It must be one of the positions passed in keep.
+        :type pos: int.
+        """
+        ret = self.__intermediates[pos]
+        assert ret is not None, "Values for position %s are not kept" % pos
+        return ret
+
+    def precompute(self, values, dateTimes=None):
+        """Calculates the values over values known in advance, using
+        :meth:`pyalgotrade.technical.EventWindow.computeBatch` for each event window.
+        Check :meth:`pyalgotrade.technical.EventBasedFilter.precompute`.
+
+        :param values: The values that will be added to the DataSeries being filtered.
+        :type values: list or numpy.array.
+        :param dateTimes: The datetimes for those values. Filters that use datetimes require them.
+        :type dateTimes: list.
+
+        .. note::
+            This must be called before any values are added to the DataSeries being filtered.
+        """
+        assert len(self) == 0, "Values were already filtered"
+        stageValues = []
+        stageInput = values
+        for eventWindow in self.__eventWindows:
+            stageInput = eventWindow.computeBatch(dateTimes, stageInput)
+            stageValues.append(stageInput)
+        outputs = list(zip(*stageValues))
+        self.__precomputed = technical.PrecomputedValues(values, dateTimes, outputs)
+
+    def __stopPrecomputed(self):
+        # Windows are not updated while precomputed values are used, so they have to catch up.
+        for dateTime, value in self.__precomputed.getConsumed():
+            self.__updateWindows(dateTime, value)
+        self.__precomputed = None
+
+    def __updateWindows(self, dateTime, value):
+        ret = []
+        for eventWindow in self.__eventWindows:
+            eventWindow.onNewValue(dateTime, value)
+            value = eventWindow.getValue()
+            ret.append(value)
+        return ret
+
+    def __onNewValue(self, dataSeries, dateTime, value):
+        stageValues = None
+        if self.__precomputed is not None:
+            matched, stageValues = self.__precomputed.pop(dateTime, value)
+            if not matched:
+                self.__stopPrecomputed()
+                stageValues = None
+
+        if stageValues is None:
+            stageValues = self.__updateWindows(dateTime, value)
+
+        for intermediate, stageValue in zip(self.__intermediates, stageValues):
+            if intermediate is not None:
+                intermediate.appendWithDateTime(dateTime, stageValue)
+        self.appendWithDateTime(dateTime, stageValues[-1])
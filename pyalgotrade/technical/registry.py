@@ -0,0 +1,105 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import numpy as np
+
+from pyalgotrade import technical
+
+
+def freeze(value):
+    """Returns a hashable version of an indicator parameter. Lists, tuples and numpy arrays become tuples."""
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    elif isinstance(value, np.ndarray):
+        return tuple(value.tolist())
+    return value
+
+
+class IndicatorRegistry(object):
+    """Shares :class:`pyalgotrade.technical.EventBasedFilter` instances, so that the same indicator over the same
+    DataSeries is calculated only once, no matter how many strategies, analyzers or plots use it.
+
+    Indicators are keyed by class, DataSeries identity and parameters. Parameters have to be passed the same way to
+    match, so SMA(ds, 20) and SMA(ds, period=20) are different indicators.
+    """
+
+    def __init__(self):
+        # Key -> [indicator, reference count]
+        self.__entries = {}
+        # id(indicator) -> key
+        self.__keys = {}
+
+    def acquire(self, indicatorClass, dataSeries, *args, **kwargs):
+        """Returns the indicator built with indicatorClass(dataSeries, \\*args, \\*\\*kwargs), creating it if there is
+        no matching one. Every call has to be paired with a call to :meth:`release`.
+
+        :param indicatorClass: A :class:`pyalgotrade.technical.EventBasedFilter` subclass.
+        :param dataSeries: The DataSeries instance being filtered.
+        :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+        """
+        assert issubclass(indicatorClass, technical.EventBasedFilter), \
+            "indicatorClass must be a technical.EventBasedFilter subclass"
+
+        key = (
+            indicatorClass, id(dataSeries), freeze(args),
+            tuple(sorted((name, freeze(value)) for name, value in kwargs.items()))
+        )
+        entry = self.__entries.get(key)
+        if entry is None:
+            # The indicator holds a reference to the DataSeries, so its id can't be reused while the entry exists.
+            entry = [indicatorClass(dataSeries, *args, **kwargs), 0]
+            self.__entries[key] = entry
+            self.__keys[id(entry[0])] = key
+        entry[1] += 1
+        return entry[0]
+
+    def release(self, indicator):
+        """Releases an indicator returned by :meth:`acquire`. Once it is no longer used, it stops filtering values.
+
+        :param indicator: The indicator to release.
+        :type indicator: :class:`pyalgotrade.technical.EventBasedFilter`.
+        """
+        key = self.__keys.get(id(indicator))
+        if key is None:
+            raise Exception("The indicator was not acquired from this registry")
+
+        entry = self.__entries[key]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del self.__entries[key]
+            del self.__keys[id(indicator)]
+            indicator.detach()
+
+    def getRefCount(self, indicator):
+        """Returns the number of times an indicator was acquired and not released."""
+        key = self.__keys.get(id(indicator))
+        return 0 if key is None else self.__entries[key][1]
+
+    def __len__(self):
+        return len(self.__entries)
+
+
+# Shared by everything that uses get_registry().
+_registry = IndicatorRegistry()
+
+
+def get_registry():
+    """Returns the :class:`IndicatorRegistry` shared within the process."""
+    return _registry
@@ -18,6 +18,7 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import numpy as np
 from six.moves import xrange
 
 from pyalgotrade import technical
@@ -110,6 +111,39 @@ class RSIEventWindow(technical.EventWindow):
     def getValue(self):
         return self.__value
 
+    def computeBatch(self, dateTimes, values):
+        batchValues = technical.to_batch_array(values)
+        if batchValues is None:
+            return super(RSIEventWindow, self).computeBatch(dateTimes, values)
+
+        period = self.__period
+        ret = [None] * min(len(batchValues), period)
+        if len(batchValues) <= period:
+            return ret
+
+        # Same operations as gain_loss_one, avg_gain_loss and onNewValue, in the same order. Averages depend on the
+        # previous ones, so they're calculated in a loop using plain floats, which round like numpy.float64.
+        changes = np.diff(batchValues)
+        gains = np.where(changes < 0, 0, changes).tolist()
+        losses = np.where(changes < 0, -changes, 0).tolist()
+        avgGain = 0
+        avgLoss = 0
+        for i in xrange(period):
+            avgGain += gains[i]
+            avgLoss += losses[i]
+        avgGain = avgGain / float(period)
+        avgLoss = avgLoss / float(period)
+
+        for i in xrange(period, len(changes) + 1):
+            if i > period:
+                avgGain = (avgGain * (period-1) + gains[i-1]) / float(period)
+                avgLoss = (avgLoss * (period-1) + losses[i-1]) / float(period)
+            if avgLoss == 0:
+                ret.append(100)
+            else:
+                ret.append(np.float64(100 - 100 / (1 + avgGain / avgLoss)))
+        return ret
+
 
 class RSI(technical.EventBasedFilter):
     """
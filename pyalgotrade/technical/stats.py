@@ -18,21 +18,205 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import math
+
+import numpy as np
+
 from pyalgotrade import technical
 
 
-class StdDevEventWindow(technical.EventWindow):
-    def __init__(self, period, ddof):
-        assert(period > 0)
-        super(StdDevEventWindow, self).__init__(period)
-        self.__ddof = ddof
+class RollingMeanVariance(object):
+    """Rolling mean and variance over a window of values, updated in O(1) time using Welford's algorithm.
+
+    To bound the rounding errors that build up with each update, both are recalculated from the values in the window,
+    the same way as numpy.mean/var, every time windowSize values were added.
+
+    :param windowSize: The size of the window.
+    :type windowSize: int.
+    """
+
+    def __init__(self, windowSize):
+        assert(windowSize > 0)
+        self.__windowSize = windowSize
+        # Values are shifted by the mean at the time of the last recalculation, so the updates don't lose precision
+        # when the values are far from 0.
+        self.__shift = None
+        self.__shiftedMean = None
+        # Sum of squared differences from the mean.
+        self.__m2 = None
+        self.__updates = 0
+
+    def add(self, newValue, oldValue, values):
+        """Updates the mean and variance once a value was added to a full window.
+
+        :param newValue: The value that was added.
+        :param oldValue: The value that left the window, or None if the window just got full.
+        :param values: A numpy.array with the values in the window, including newValue.
+        """
+        # oldValue - oldValue is not 0 for nan and inf, and those can't be removed from the sums.
+        if oldValue is None or self.__updates >= self.__windowSize or oldValue - oldValue != 0:
+            mean = values.mean()
+            deviations = values - mean
+            self.__shift = float(mean)
+            # The mean is rounded, so the deviations don't add up to exactly 0.
+            self.__shiftedMean = float(deviations.mean())
+            self.__m2 = float(np.square(deviations).sum())
+            self.__updates = 0
+        else:
+            newValue = float(newValue) - self.__shift
+            oldValue = float(oldValue) - self.__shift
+            oldMean = self.__shiftedMean
+            delta = newValue - oldValue
+            self.__shiftedMean = oldMean + delta / self.__windowSize
+            self.__m2 += delta * (newValue - self.__shiftedMean + oldValue - oldMean)
+            if self.__m2 < 0:
+                self.__m2 = 0.0
+            self.__updates += 1
+
+    def getMean(self):
+        return self.__shift + self.__shiftedMean
+
+    def getVariance(self, ddof=0):
+        return get_variance(self.__m2, self.__windowSize, ddof)
+
+    def getStdDev(self, ddof=0):
+        return math.sqrt(self.getVariance(ddof))
+
+
+def get_variance(m2, windowSize, ddof):
+    """Returns the variance for a sum of squared differences from the mean, or for a numpy.array of them."""
+    count = windowSize - ddof
+    if count <= 0:
+        # Like numpy.var, this yields inf or nan.
+        return np.float64(m2) / 0
+    return m2 / float(count)
+
+
+def compute_mean_m2(values, windowSize):
+    """Calculates the mean and the sum of squared differences from the mean that :class:`RollingMeanVariance` holds
+    after each value is added to a full window, in a single pass. The results are identical.
+
+    :param values: The values.
+    :type values: numpy.array.
+    :param windowSize: The size of the window.
+    :type windowSize: int.
+    :rtype: A (means, m2s) tuple of numpy.arrays, with one value for each full window.
+    """
+    count = len(values) - windowSize + 1
+    if count <= 0:
+        return np.empty(0), np.empty(0)
+
+    # Recalculations depend on the values only, so they are found beforehand and vectorized. They happen when the
+    # window gets full, every windowSize updates, and when a nan or inf leaves the window.
+    starts = [0] + (np.flatnonzero(~np.isfinite(values[:count - 1])) + 1).tolist()
+    ends = starts[1:] + [count]
+    positions = [pos for start, end in zip(starts, ends) for pos in range(start, end, windowSize + 1)]
+    # Rows are reduced like 1D arrays, so these are the same operations performed by RollingMeanVariance.add.
+    windows = technical.rolling_windows(values, windowSize)[positions]
+    recalcMeans = windows.mean(axis=1)
+    deviations = windows - recalcMeans[:, np.newaxis]
+    recalcs = zip(recalcMeans.tolist(), deviations.mean(axis=1).tolist(), np.square(deviations).sum(axis=1).tolist())
+
+    # The updates in between depend on the previous ones, so they are performed one by one, inlined over plain floats.
+    plainValues = values.tolist()
+    means = []
+    m2s = []
+    for start, end, (shift, shiftedMean, m2) in zip(positions, positions[1:] + [count], recalcs):
+        means.append(shift + shiftedMean)
+        m2s.append(m2)
+        for newValue, oldValue in zip(plainValues[start + windowSize:end + windowSize - 1], plainValues[start:end - 1]):
+            newValue -= shift
+            oldValue -= shift
+            oldMean = shiftedMean
+            delta = newValue - oldValue
+            shiftedMean = oldMean + delta / windowSize
+            m2 += delta * (newValue - shiftedMean + oldValue - oldMean)
+            if m2 < 0:
+                m2 = 0.0
+            means.append(shift + shiftedMean)
+            m2s.append(m2)
+    return np.array(means), np.array(m2s)
+
+
+class RollingMeanVarianceEventWindow(technical.EventWindow):
+    """Base class for event windows that use the rolling mean and variance of the values.
+
+    .. note::
+        This is a base class and should not be used directly.
+    """
+
+    def __init__(self, period):
+        super(RollingMeanVarianceEventWindow, self).__init__(period)
+        self.__meanVariance = RollingMeanVariance(period)
+
+    def onNewValue(self, dateTime, value):
+        oldValue = None
+        if value is not None and self.windowFull():
+            oldValue = self.getValues()[0]
+
+        super(RollingMeanVarianceEventWindow, self).onNewValue(dateTime, value)
+
+        if value is not None and self.windowFull():
+            self.__meanVariance.add(value, oldValue, self.getValues())
+
+    def getMeanVariance(self):
+        return self.__meanVariance
+
+    def getValueFromMeanVariance(self, values, meanVariance):
+        """Override to calculate a value once the window is full.
+
+        :param values: A numpy.array with the values in the window.
+        :param meanVariance: The :class:`RollingMeanVariance` for the values in the window.
+        """
+        raise NotImplementedError()
+
+    def getValuesFromMeanVariances(self, lastValues, means, m2s):
+        """Override to calculate the values for many windows at once, performing the same operations as
+        :meth:`getValueFromMeanVariance`.
+
+        :param lastValues: A numpy.array with the last value in each window.
+        :param means: A numpy.array with the mean of each window.
+        :param m2s: A numpy.array with the sum of squared differences from the mean for each window.
+        :rtype: A list with one value for each window.
+        """
+        raise NotImplementedError()
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            ret = self.getValues().std(ddof=self.__ddof)
+            ret = self.getValueFromMeanVariance(self.getValues(), self.__meanVariance)
         return ret
 
+    def computeBatch(self, dateTimes, values):
+        batchValues = technical.to_batch_array(values)
+        if batchValues is None:
+            return super(RollingMeanVarianceEventWindow, self).computeBatch(dateTimes, values)
+
+        # Each update depends on the previous one, so only the values calculated from the means and variances are
+        # vectorized. This is slower than calling numpy.std for every window when windows are short, but the values
+        # have to be identical to the ones calculated adding values one by one.
+        period = self.getWindowSize()
+        ret = [None] * min(len(batchValues), period - 1)
+        if len(batchValues) >= period:
+            means, m2s = compute_mean_m2(batchValues, period)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ret.extend(self.getValuesFromMeanVariances(batchValues[period - 1:], means, m2s))
+        return ret
+
+
+class StdDevEventWindow(RollingMeanVarianceEventWindow):
+    def __init__(self, period, ddof):
+        assert(period > 0)
+        super(StdDevEventWindow, self).__init__(period)
+        self.__ddof = ddof
+
+    def getValueFromMeanVariance(self, values, meanVariance):
+        return meanVariance.getStdDev(self.__ddof)
+
+    def getValuesFromMeanVariances(self, lastValues, means, m2s):
+        # numpy.sqrt and math.sqrt are both correctly rounded.
+        return np.sqrt(get_variance(m2s, self.getWindowSize(), self.__ddof)).tolist()
+
 
 class StdDev(technical.EventBasedFilter):
     """Standard deviation filter.
@@ -53,21 +237,18 @@ class StdDev(technical.EventBasedFilter):
         super(StdDev, self).__init__(dataSeries, StdDevEventWindow(period, ddof), maxLen)
 
 
-class ZScoreEventWindow(technical.EventWindow):
+class ZScoreEventWindow(RollingMeanVarianceEventWindow):
     def __init__(self, period, ddof):
         assert(period > 1)
         super(ZScoreEventWindow, self).__init__(period)
         self.__ddof = ddof
 
-    def getValue(self):
-        ret = None
-        if self.windowFull():
-            values = self.getValues()
-            lastValue = values[-1]
-            mean = values.mean()
-            std = values.std(ddof=self.__ddof)
-            ret = (lastValue - mean) / float(std)
-        return ret
+    def getValueFromMeanVariance(self, values, meanVariance):
+        # values[-1] is a numpy.float64, so dividing by a zero standard deviation yields inf or nan.
+        return (values[-1] - meanVariance.getMean()) / meanVariance.getStdDev(self.__ddof)
+
+    def getValuesFromMeanVariances(self, lastValues, means, m2s):
+        return list((lastValues - means) / np.sqrt(get_variance(m2s, self.getWindowSize(), self.__ddof)))
 
 
 class ZScore(technical.EventBasedFilter):
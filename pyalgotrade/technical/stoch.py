@@ -20,6 +20,7 @@
 
 from pyalgotrade import technical
 from pyalgotrade.dataseries import bards
+from pyalgotrade.technical import highlow
 from pyalgotrade.technical import ma
 
 
@@ -39,12 +40,23 @@ class SOEventWindow(technical.EventWindow):
         assert(period > 1)
         super(SOEventWindow, self).__init__(period, dtype=object)
         self.__useAdjusted = useAdjustedValues
+        self.__lowestLow = highlow.RollingExtreme(period, True)
+        self.__highestHigh = highlow.RollingExtreme(period, False)
+        self.__currentClose = None
+
+    def onNewValue(self, dateTime, value):
+        super(SOEventWindow, self).onNewValue(dateTime, value)
+        if value is not None:
+            self.__lowestLow.add(value.getLow(self.__useAdjusted))
+            self.__highestHigh.add(value.getHigh(self.__useAdjusted))
+            self.__currentClose = value.getClose(self.__useAdjusted)
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            lowestLow, highestHigh = get_low_high_values(self.__useAdjusted, self.getValues())
-            currentClose = self.getValues()[-1].getClose(self.__useAdjusted)
+            lowestLow = self.__lowestLow.getValue()
+            highestHigh = self.__highestHigh.getValue()
+            currentClose = self.__currentClose
             closeDelta = currentClose - lowestLow
             if closeDelta:
                 ret = closeDelta / float(highestHigh - lowestLow) * 100
@@ -20,27 +20,56 @@
 
 from pyalgotrade import technical
 from pyalgotrade.dataseries import bards
+from pyalgotrade.utils import collections
 
 
 class VWAPEventWindow(technical.EventWindow):
+    # The window holds price * volume for each bar, and the volumes are held in a separate window, so bars are not
+    # retained and the sums can be updated as bars come and go.
     def __init__(self, windowSize, useTypicalPrice):
-        super(VWAPEventWindow, self).__init__(windowSize, dtype=object)
+        super(VWAPEventWindow, self).__init__(windowSize)
+        self.__volumes = collections.NumPyDeque(windowSize)
         self.__useTypicalPrice = useTypicalPrice
+        self.__cumTotal = None
+        self.__cumVolume = None
+        self.__updates = 0
 
-    def getValue(self):
-        ret = None
+    def onNewValue(self, dateTime, value):
+        if value is None:
+            return
+
+        if self.__useTypicalPrice:
+            price = value.getTypicalPrice()
+        else:
+            price = value.getPrice()
+        volume = value.getVolume()
+
+        oldTotal = None
+        oldVolume = None
         if self.windowFull():
-            cumTotal = 0
-            cumVolume = 0
+            oldTotal = float(self.getValues()[0])
+            oldVolume = float(self.__volumes[0])
 
-            for bar in self.getValues():
-                if self.__useTypicalPrice:
-                    cumTotal += bar.getTypicalPrice() * bar.getVolume()
-                else:
-                    cumTotal += bar.getPrice() * bar.getVolume()
-                cumVolume += bar.getVolume()
+        super(VWAPEventWindow, self).onNewValue(dateTime, price * volume)
+        self.__volumes.append(volume)
 
-            ret = cumTotal / float(cumVolume)
+        if self.windowFull():
+            # To bound the rounding errors that build up with each update, the sums are recalculated every time
+            # windowSize bars were added. x - x is not 0 for nan and inf, and those can't be removed from the sums.
+            if oldTotal is None or self.__updates >= self.getWindowSize() or \
+                    oldTotal - oldTotal != 0 or oldVolume - oldVolume != 0:
+                self.__cumTotal = float(self.getValues().sum())
+                self.__cumVolume = float(self.__volumes.data().sum())
+                self.__updates = 0
+            else:
+                self.__cumTotal += price * volume - oldTotal
+                self.__cumVolume += volume - oldVolume
+                self.__updates += 1
+
+    def getValue(self):
+        ret = None
+        if self.windowFull():
+            ret = self.__cumTotal / float(self.__cumVolume)
         return ret
 
 
@@ -57,55 +57,112 @@ def intersect(values1, values2, skipNone=False):
 
 
 # Like a collections.deque but using a numpy.array.
+# Values are stored twice, in a ring buffer and in a mirror right after it, so appending is O(1) and the values are
+# always available as a contiguous slice without copying.
 class NumPyDeque(object):
     def __init__(self, maxLen, dtype=float):
         assert maxLen > 0, "Invalid maximum length"
 
-        self.__values = np.empty(maxLen, dtype=dtype)
+        self.__values = np.empty(maxLen * 2, dtype=dtype)
         self.__maxLen = maxLen
-        self.__nextPos = 0
+        # Position of the first value and number of values.
+        self.__start = 0
+        self.__len = 0
 
     def getMaxLen(self):
         return self.__maxLen
 
     def append(self, value):
-        if self.__nextPos < self.__maxLen:
-            self.__values[self.__nextPos] = value
-            self.__nextPos += 1
+        if self.__len < self.__maxLen:
+            pos = self.__len
+            self.__len += 1
         else:
-            # Shift items to the left and put the last value.
-            # I'm not using np.roll to avoid creating a new array.
-            self.__values[0:-1] = self.__values[1:]
-            self.__values[self.__nextPos - 1] = value
+            # Overwrite the first value and move the start forward.
+            pos = self.__start
+            self.__start = pos + 1 if pos + 1 < self.__maxLen else 0
+        self.__values[pos] = value
+        self.__values[pos + self.__maxLen] = value
 
     def data(self):
-        # If all values are not initialized, return a portion of the array.
-        if self.__nextPos < self.__maxLen:
-            ret = self.__values[0:self.__nextPos]
-        else:
-            ret = self.__values
-        return ret
+        # A view on the values. It gets overwritten as values are appended.
+        return self.__values[self.__start:self.__start + self.__len]
 
     def resize(self, maxLen):
         assert maxLen > 0, "Invalid maximum length"
 
         # Create empty, copy last values and swap.
-        values = np.empty(maxLen, dtype=self.__values.dtype)
-        lastValues = self.__values[0:self.__nextPos]
-        values[0:min(maxLen, len(lastValues))] = lastValues[-1*min(maxLen, len(lastValues)):]
+        lastValues = self.data()[-1*min(maxLen, self.__len):]
+        values = np.empty(maxLen * 2, dtype=self.__values.dtype)
+        values[0:len(lastValues)] = lastValues
+        values[maxLen:maxLen + len(lastValues)] = lastValues
         self.__values = values
 
         self.__maxLen = maxLen
-        if self.__nextPos >= self.__maxLen:
-            self.__nextPos = self.__maxLen
+        self.__start = 0
+        self.__len = len(lastValues)
 
     def __len__(self):
-        return self.__nextPos
+        return self.__len
 
     def __getitem__(self, key):
         return self.data()[key]
 
 
+# Like NumPyDeque but each item has a fixed number of columns. Each column is stored in its own mirrored ring buffer,
+# so the values for a column are always available as a contiguous slice without copying.
+class NumPyColumnsDeque(object):
+    def __init__(self, maxLen, columns, dtype=float):
+        assert maxLen > 0, "Invalid maximum length"
+        assert columns > 0, "Invalid number of columns"
+
+        self.__values = np.empty((columns, maxLen * 2), dtype=dtype)
+        self.__maxLen = maxLen
+        self.__start = 0
+        self.__len = 0
+
+    def getMaxLen(self):
+        return self.__maxLen
+
+    def append(self, values):
+        if self.__len < self.__maxLen:
+            pos = self.__len
+            self.__len += 1
+        else:
+            pos = self.__start
+            self.__start = pos + 1 if pos + 1 < self.__maxLen else 0
+        self.__values[:, pos] = values
+        self.__values[:, pos + self.__maxLen] = values
+
+    def setLast(self, values):
+        assert self.__len > 0, "No values"
+        pos = (self.__start + self.__len - 1) % self.__maxLen
+        self.__values[:, pos] = values
+        self.__values[:, pos + self.__maxLen] = values
+
+    def data(self):
+        # A 2D view with one row per column. It gets overwritten as values are appended.
+        return self.__values[:, self.__start:self.__start + self.__len]
+
+    def column(self, column):
+        return self.__values[column, self.__start:self.__start + self.__len]
+
+    def resize(self, maxLen):
+        assert maxLen > 0, "Invalid maximum length"
+
+        lastValues = self.data()[:, -1*min(maxLen, self.__len):] if self.__len else self.data()
+        values = np.empty((self.__values.shape[0], maxLen * 2), dtype=self.__values.dtype)
+        values[:, 0:lastValues.shape[1]] = lastValues
+        values[:, maxLen:maxLen + lastValues.shape[1]] = lastValues
+        self.__values = values
+
+        self.__maxLen = maxLen
+        self.__start = 0
+        self.__len = lastValues.shape[1]
+
+    def __len__(self):
+        return self.__len
+
+
 # I'm not using collections.deque because:
 # 1: Random access is slower.
 # 2: Slicing is not supported.
@@ -65,6 +65,30 @@ class FastDictReader(object):
         return self._next_impl()
 
 
+# Loads a whole CSV file and returns a tuple with the field names and a dictionary that maps each field name to a list
+# with the column values. Empty rows are skipped.
+def read_columns(f, fieldnames=None, delimiter=","):
+    text = f.read()
+    lines = [line for line in text.splitlines() if line]
+    if fieldnames is None and len(lines):
+        fieldnames = next(csv.reader(lines[:1], delimiter=delimiter))
+        lines = lines[1:]
+    fieldnames = fieldnames or []
+    columnCount = len(fieldnames)
+
+    # If there are no quotes we can split all values at once and slice the columns out of the resulting list, which is
+    # a lot faster than using csv.reader.
+    if '"' not in text and all(line.count(delimiter) == columnCount - 1 for line in lines):
+        values = delimiter.join(lines).split(delimiter) if len(lines) else []
+    else:
+        rows = list(csv.reader(lines, delimiter=delimiter))
+        for row in rows:
+            assert len(fieldnames) == len(row), "Expected columns: %s. Actual columns: %s" % (fieldnames, row)
+        values = [value for row in rows for value in row]
+
+    return fieldnames, dict((name, values[i::columnCount]) for i, name in enumerate(fieldnames))
+
+
 def download_csv(url, url_params=None, content_type="text/csv"):
     response = requests.get(url, params=url_params)
 
@@ -54,7 +54,11 @@ def as_utc(dateTime):
 
 def datetime_to_timestamp(dateTime):
     """ Converts a datetime.datetime to a UTC timestamp."""
-    diff = as_utc(dateTime) - epoch_utc
+    if dateTime.tzinfo is None:
+        # Naive datetimes are UTC, so skip localizing.
+        diff = dateTime - epoch_naive
+    else:
+        diff = as_utc(dateTime) - epoch_utc
     return diff.total_seconds()
 
 
@@ -66,6 +70,24 @@ def timestamp_to_datetime(timeStamp, localized=True):
     return ret
 
 
+def datetime_to_microseconds(dateTime):
+    """Converts a datetime.datetime to microseconds since the epoch. Naive datetimes are converted as is and localized
+    datetimes are converted to UTC first."""
+    if not datetime_is_naive(dateTime):
+        dateTime = unlocalize(dateTime.astimezone(pytz.utc))
+    diff = dateTime - epoch_naive
+    return (diff.days * 86400 + diff.seconds) * 1000000 + diff.microseconds
+
+
+def microseconds_to_datetime(microseconds, timeZone=None):
+    """Converts microseconds since the epoch into a datetime.datetime. If timeZone is not None, the microseconds are
+    assumed to be in UTC and the datetime is adjusted to that timezone."""
+    ret = epoch_naive + datetime.timedelta(0, 0, int(microseconds))
+    if timeZone is not None:
+        ret = pytz.utc.localize(ret).astimezone(timeZone)
+    return ret
+
+
 def get_first_monday(year):
     ret = datetime.date(year, 1, 1)
     if ret.weekday() != 0:
@@ -83,3 +105,4 @@ def get_last_monday(year):
 
 
 epoch_utc = as_utc(datetime.datetime(1970, 1, 1))
+epoch_naive = datetime.datetime(1970, 1, 1)
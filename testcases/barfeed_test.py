@@ -24,6 +24,7 @@ from . import common
 
 from pyalgotrade import barfeed
 from pyalgotrade.barfeed import common as bfcommon
+from pyalgotrade.barfeed import membf
 from pyalgotrade import bar
 from pyalgotrade import dispatcher
 
@@ -147,6 +148,65 @@ class OptimizerBarFeedTestCase(common.TestCase):
         self.assertEqual(barFeed.barsHaveAdjClose(), False)
 
 
+class TestMemBarFeed(membf.BarFeed):
+    def barsHaveAdjClose(self):
+        return True
+
+
+class MemBarFeedTestCase(common.TestCase):
+    def testInterleavedInstruments(self):
+        instruments = ["A/USD", "B/USD", "C/USD"]
+        begin = datetime.datetime(2001, 1, 1)
+        barFeed = TestMemBarFeed(bar.Frequency.DAY)
+        for i, instrument in enumerate(instruments):
+            # Every instrument trades on a different subset of days.
+            dateTimes = [begin + datetime.timedelta(days=day) for day in range(i, 30, i + 1)]
+            barFeed.addBarsFromSequence(
+                instrument,
+                [bar.BasicBar(instrument, dt, 1, 1, 1, 1, 1, 1, bar.Frequency.DAY) for dt in dateTimes]
+            )
+
+        self.assertEqual(barFeed.peekDateTime(), begin)
+        count = 0
+        for dateTime, bars in barFeed:
+            count += len(bars.getInstruments())
+            expected = [
+                instrument for i, instrument in enumerate(instruments)
+                if (dateTime - begin).days >= i and ((dateTime - begin).days - i) % (i + 1) == 0
+            ]
+            self.assertEqual([str(b.getInstrument()) for b in bars], expected)
+        self.assertEqual(count, 30 + 15 + 10)
+        self.assertTrue(barFeed.eof())
+        self.assertEqual(barFeed.peekDateTime(), None)
+
+    def testDuplicateBars(self):
+        dateTime = datetime.datetime(2001, 1, 1)
+        barFeed = TestMemBarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromSequence(INSTRUMENT, [
+            bar.BasicBar(INSTRUMENT, dateTime, 1, 1, 1, 1, 1, 1, bar.Frequency.DAY),
+            bar.BasicBar(INSTRUMENT, dateTime, 1, 1, 1, 1, 1, 1, bar.Frequency.DAY),
+        ])
+        with self.assertRaisesRegexp(Exception, "Duplicate bars found for.*"):
+            barFeed.loadAll()
+
+    def testHeapDispatcher(self):
+        barFeed = TestMemBarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromSequence(INSTRUMENT, [
+            bar.BasicBar(INSTRUMENT, datetime.datetime(2001, 1, day), 1, 1, 1, 1, 1, 1, bar.Frequency.DAY)
+            for day in range(1, 11)
+        ])
+        dateTimes = []
+        barFeed.getNewValuesEvent().subscribe(lambda dateTime, bars: dateTimes.append(dateTime))
+
+        d = dispatcher.Dispatcher()
+        d.setUseHeap(True)
+        d.addSubject(barFeed)
+        d.run()
+
+        self.assertEqual(dateTimes, [datetime.datetime(2001, 1, day) for day in range(1, 11)])
+        self.assertEqual(len(barFeed[INSTRUMENT]), 10)
+
+
 class CommonTestCase(common.TestCase):
     def testSanitize(self):
         self.assertEqual(bfcommon.sanitize_ohlc(10, 12, 9, 10), (10, 12, 9, 10))
@@ -0,0 +1,234 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+import os
+
+from . import common
+from . import barfeed_test
+from . import columnar_test
+
+from pyalgotrade.barfeed import binfeed
+from pyalgotrade.barfeed import columnar
+from pyalgotrade.barfeed import csvfeed
+from pyalgotrade.barfeed import ninjatraderfeed
+from pyalgotrade.barfeed import yahoofeed
+from pyalgotrade import bar
+from pyalgotrade import marketsession
+
+
+INSTRUMENT = "ORCL/USD"
+
+
+def load_bars(barFeed, instrument=INSTRUMENT):
+    return [bars[instrument] for _, bars in barFeed if instrument in bars]
+
+
+class BinaryFileTestCase(common.TestCase):
+    def testWriteAndRead(self):
+        expected = columnar_test.load_yahoo_bars(marketsession.USEquities.timezone)
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "orcl.bars")
+            binfeed.write_bar_arrays(columnar.from_bars(INSTRUMENT, bar.Frequency.DAY, expected), path)
+            barArrays = binfeed.read_bar_arrays(path)
+            self.assertEqual(barArrays.getTimeZone(), marketsession.USEquities.timezone)
+            self.assertTrue(barArrays.hasAdjClose())
+            self.assertEqual(len(barArrays), len(expected))
+            for bar1, bar2 in zip(expected, barArrays):
+                columnar_test.assert_bars_equal(self, bar1, bar2)
+
+    def testExtraColumns(self):
+        dateTime = datetime.datetime(2001, 1, 1)
+        expected = [
+            bar.BasicBar(INSTRUMENT, dateTime, 1, 1, 1, 1, 1, None, bar.Frequency.DAY, extra={"a": 1.5}),
+            bar.BasicBar(INSTRUMENT, dateTime + datetime.timedelta(days=1), 1, 1, 1, 1, 1, None, bar.Frequency.DAY),
+        ]
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "orcl.bars")
+            binfeed.write_bar_arrays(columnar.from_bars(INSTRUMENT, bar.Frequency.DAY, expected), path)
+            barArrays = binfeed.read_bar_arrays(path)
+            self.assertFalse(barArrays.hasAdjClose())
+            for bar1, bar2 in zip(expected, barArrays):
+                columnar_test.assert_bars_equal(self, bar1, bar2)
+
+    def testStringExtraColumnsNotSupported(self):
+        barArrays = columnar.from_bars(INSTRUMENT, bar.Frequency.DAY, [
+            bar.BasicBar(INSTRUMENT, datetime.datetime(2001, 1, 1), 1, 1, 1, 1, 1, None, bar.Frequency.DAY, {"a": "b"})
+        ])
+        self.assertFalse(binfeed.can_write(barArrays))
+        with common.TmpDir() as tmpPath:
+            with self.assertRaisesRegexp(Exception, "Only pytz timezones and numeric extra columns are supported"):
+                binfeed.write_bar_arrays(barArrays, os.path.join(tmpPath, "orcl.bars"))
+
+    def testInvalidFile(self):
+        with self.assertRaisesRegexp(Exception, ".* is not a bar file"):
+            binfeed.read_bar_arrays(common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+
+
+class FeedTestCase(common.TestCase):
+    def testWriteBarFeed(self):
+        instrument2 = "SPY/USD"
+        barFeed = yahoofeed.Feed()
+        barFeed.addBarsFromCSV(INSTRUMENT, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        barFeed.addBarsFromCSV(instrument2, common.get_data_file_path("spy-2010-yahoofinance.csv"))
+        expected = columnar_test.load_yahoo_bars()
+
+        with common.TmpDir() as tmpPath:
+            paths = binfeed.write_barfeed(barFeed, tmpPath)
+            self.assertEqual(len(paths), 2)
+
+            barFeed = binfeed.Feed(bar.Frequency.DAY)
+            for path in paths.values():
+                barFeed.addBarsFromFile(path)
+            self.assertTrue(barFeed.barsHaveAdjClose())
+            loaded = []
+            spyCount = 0
+            for dateTime, bars in barFeed:
+                if INSTRUMENT in bars:
+                    loaded.append(bars[INSTRUMENT])
+                spyCount += int(instrument2 in bars)
+
+        self.assertEqual(spyCount, 252)
+        self.assertEqual(len(loaded), len(expected))
+        for bar1, bar2 in zip(expected, loaded):
+            columnar_test.assert_bars_equal(self, bar1, bar2)
+
+    def testBaseBarFeed(self):
+        barFeed = yahoofeed.Feed()
+        barFeed.addBarsFromCSV(INSTRUMENT, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        with common.TmpDir() as tmpPath:
+            paths = binfeed.write_barfeed(barFeed, tmpPath)
+            barFeed = binfeed.Feed(bar.Frequency.DAY)
+            barFeed.addBarsFromFile(paths[INSTRUMENT])
+            barfeed_test.check_base_barfeed(self, barFeed, True)
+
+    def testInvalidFrequency(self):
+        barFeed = yahoofeed.Feed()
+        barFeed.addBarsFromCSV(INSTRUMENT, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        with common.TmpDir() as tmpPath:
+            paths = binfeed.write_barfeed(barFeed, tmpPath)
+            barFeed = binfeed.Feed(bar.Frequency.MINUTE)
+            with self.assertRaisesRegexp(Exception, "Invalid frequency .*"):
+                barFeed.addBarsFromFile(paths[INSTRUMENT])
+
+
+class BarCacheTestCase(common.TestCase):
+    def testYahooFeed(self):
+        csvPath = common.get_data_file_path("orcl-2000-yahoofinance.csv")
+        barFeed = yahoofeed.Feed()
+        barFeed.addBarsFromCSV(INSTRUMENT, csvPath)
+        expected = load_bars(barFeed)
+
+        with common.TmpDir() as tmpPath:
+            barCache = binfeed.BarCache(os.path.join(tmpPath, "cache"))
+            for i in range(2):
+                barFeed = yahoofeed.Feed()
+                barFeed.setBarCache(barCache)
+                barFeed.addBarsFromCSV(INSTRUMENT, csvPath)
+                loaded = load_bars(barFeed)
+                self.assertEqual(len(loaded), len(expected))
+                for bar1, bar2 in zip(expected, loaded):
+                    columnar_test.assert_bars_equal(self, bar1, bar2)
+            self.assertEqual(len(os.listdir(os.path.join(tmpPath, "cache"))), 1)
+
+            # Different settings should not use the same file.
+            barFeed = yahoofeed.Feed(timezone=marketsession.USEquities.timezone)
+            barFeed.setBarCache(barCache)
+            barFeed.addBarsFromCSV(INSTRUMENT, csvPath)
+            self.assertEqual(len(os.listdir(os.path.join(tmpPath, "cache"))), 2)
+            self.assertEqual(load_bars(barFeed)[0].getDateTime().tzinfo.zone, "US/Eastern")
+
+    def testCacheHit(self):
+        with common.TmpDir() as tmpPath:
+            csvPath = os.path.join(tmpPath, "orcl.csv")
+            with open(common.get_data_file_path("orcl-2000-yahoofinance.csv")) as src:
+                with open(csvPath, "w") as dst:
+                    dst.write(src.read())
+            barCache = binfeed.BarCache(os.path.join(tmpPath, "cache"))
+            barFeed = yahoofeed.Feed()
+            barFeed.setBarCache(barCache)
+            barFeed.addBarsFromCSV(INSTRUMENT, csvPath)
+
+            # Rewrite the cached file with a single bar, to check that it gets used.
+            cachedPath = os.path.join(tmpPath, "cache", os.listdir(os.path.join(tmpPath, "cache"))[0])
+            barArrays = binfeed.read_bar_arrays(cachedPath)
+            binfeed.write_bar_arrays(columnar.from_bars(INSTRUMENT, bar.Frequency.DAY, [barArrays[0]]), cachedPath)
+            barFeed = yahoofeed.Feed()
+            barFeed.setBarCache(barCache)
+            barFeed.addBarsFromCSV(INSTRUMENT, csvPath)
+            self.assertEqual(len(load_bars(barFeed)), 1)
+
+            # Touching the source file invalidates the cache.
+            stat = os.stat(csvPath)
+            os.utime(csvPath, (stat.st_atime, stat.st_mtime + 10))
+            barFeed = yahoofeed.Feed()
+            barFeed.setBarCache(barCache)
+            barFeed.addBarsFromCSV(INSTRUMENT, csvPath)
+            self.assertEqual(len(load_bars(barFeed)), 252)
+
+    def testGenericBarFeed(self):
+        instrument = "BTC/USD"
+        csvPath = common.get_data_file_path("30min-bitstampUSD-2.csv")
+        with common.TmpDir() as tmpPath:
+            barCache = binfeed.BarCache(tmpPath)
+            for bulkLoad in (False, True, False):
+                barFeed = csvfeed.GenericBarFeed(bar.Frequency.MINUTE * 30)
+                barFeed.setBarCache(barCache)
+                barFeed.setBulkLoad(bulkLoad)
+                barFeed.addBarsFromCSV(instrument, csvPath)
+                self.assertFalse(barFeed.barsHaveAdjClose())
+                self.assertTrue(len(load_bars(barFeed, instrument)) > 0)
+            # Row and column parsers share cached files.
+            self.assertEqual(len(os.listdir(tmpPath)), 1)
+
+    def testNinjaTraderFeed(self):
+        instrument = "SPY/USD"
+        csvPath = common.get_data_file_path("nt-spy-minute-2011-03.csv")
+        barFeed = ninjatraderfeed.Feed(bar.Frequency.MINUTE)
+        barFeed.addBarsFromCSV(instrument, csvPath)
+        expected = load_bars(barFeed, instrument)
+        with common.TmpDir() as tmpPath:
+            barCache = binfeed.BarCache(tmpPath)
+            for i in range(2):
+                barFeed = ninjatraderfeed.Feed(bar.Frequency.MINUTE)
+                barFeed.setBarCache(barCache)
+                barFeed.addBarsFromCSV(instrument, csvPath)
+                loaded = load_bars(barFeed, instrument)
+                self.assertEqual(len(loaded), len(expected))
+                for bar1, bar2 in zip(expected, loaded):
+                    columnar_test.assert_bars_equal(self, bar1, bar2)
+
+    def testFiltersWithoutKeyAreNotCached(self):
+        class Filter(csvfeed.BarFilter):
+            def includeBar(self, bar_):
+                return True
+
+        with common.TmpDir() as tmpPath:
+            barFeed = yahoofeed.Feed()
+            barFeed.setBarCache(binfeed.BarCache(tmpPath))
+            barFeed.setBarFilter(Filter())
+            barFeed.addBarsFromCSV(INSTRUMENT, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+            self.assertEqual(len(os.listdir(tmpPath)), 0)
+
+            barFeed = yahoofeed.Feed()
+            barFeed.setBarCache(binfeed.BarCache(tmpPath))
+            barFeed.setBarFilter(csvfeed.DateRangeFilter(toDate=datetime.datetime(2000, 6, 1)))
+            barFeed.addBarsFromCSV(INSTRUMENT, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+            self.assertEqual(len(os.listdir(tmpPath)), 1)
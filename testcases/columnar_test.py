@@ -0,0 +1,145 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+
+from . import common
+from . import barfeed_test
+
+from pyalgotrade.barfeed import columnar
+from pyalgotrade.barfeed import yahoofeed
+from pyalgotrade import bar
+from pyalgotrade import marketsession
+
+
+INSTRUMENT = "ORCL/USD"
+
+
+def load_yahoo_bars(timezone=None):
+    feed = yahoofeed.Feed(timezone=timezone)
+    feed.addBarsFromCSV(INSTRUMENT, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+    return [bars[INSTRUMENT] for _, bars in feed]
+
+
+def assert_bars_equal(testCase, bar1, bar2):
+    testCase.assertEqual(bar1.getInstrument(), bar2.getInstrument())
+    testCase.assertEqual(bar1.getDateTime(), bar2.getDateTime())
+    testCase.assertEqual(bar1.getOpen(), bar2.getOpen())
+    testCase.assertEqual(bar1.getHigh(), bar2.getHigh())
+    testCase.assertEqual(bar1.getLow(), bar2.getLow())
+    testCase.assertEqual(bar1.getClose(), bar2.getClose())
+    testCase.assertEqual(bar1.getVolume(), bar2.getVolume())
+    testCase.assertEqual(bar1.getAdjClose(), bar2.getAdjClose())
+    testCase.assertEqual(bar1.getFrequency(), bar2.getFrequency())
+    testCase.assertEqual(bar1.getExtraColumns(), bar2.getExtraColumns())
+
+
+class BarArraysTestCase(common.TestCase):
+    def testTimestampConversions(self):
+        dateTime = datetime.datetime(2001, 2, 3, 4, 5, 6, 7)
+        self.assertEqual(columnar.timestamp_to_datetime(columnar.datetime_to_timestamp(dateTime)), dateTime)
+
+        localized = marketsession.USEquities.timezone.localize(dateTime)
+        timestamp = columnar.datetime_to_timestamp(localized)
+        self.assertEqual(timestamp, columnar.datetime_to_timestamp(datetime.datetime(2001, 2, 3, 9, 5, 6, 7)))
+        self.assertEqual(columnar.timestamp_to_datetime(timestamp, marketsession.USEquities.timezone), localized)
+
+    def testFromBars(self):
+        bars = load_yahoo_bars()
+        barArrays = columnar.from_bars(INSTRUMENT, bar.Frequency.DAY, bars)
+        self.assertEqual(len(barArrays), len(bars))
+        self.assertTrue(barArrays.hasAdjClose())
+        self.assertEqual(barArrays.getMemorySize(), len(bars) * 56)
+        for bar1, bar2 in zip(bars, barArrays):
+            assert_bars_equal(self, bar1, bar2)
+
+    def testFromLocalizedBars(self):
+        bars = load_yahoo_bars(marketsession.USEquities.timezone)
+        barArrays = columnar.from_bars(INSTRUMENT, bar.Frequency.DAY, bars)
+        for bar1, bar2 in zip(bars, barArrays):
+            assert_bars_equal(self, bar1, bar2)
+            self.assertEqual(bar1.getDateTime().utcoffset(), bar2.getDateTime().utcoffset())
+
+    def testExtraColumns(self):
+        dateTime = datetime.datetime(2001, 1, 1)
+        bars = [
+            bar.BasicBar(INSTRUMENT, dateTime, 1, 1, 1, 1, 1, None, bar.Frequency.DAY, extra={"a": 1.5, "b": "x"}),
+            bar.BasicBar(
+                INSTRUMENT, dateTime + datetime.timedelta(days=1), 1, 1, 1, 1, 1, None, bar.Frequency.DAY,
+                extra={"a": 2.5}
+            ),
+        ]
+        barArrays = columnar.from_bars(INSTRUMENT, bar.Frequency.DAY, bars)
+        self.assertFalse(barArrays.hasAdjClose())
+        for bar1, bar2 in zip(bars, barArrays):
+            assert_bars_equal(self, bar1, bar2)
+
+    def testSortAndCheck(self):
+        barArrays = columnar.BarArrays(INSTRUMENT, bar.Frequency.DAY, [2, 1], [2, 1], [2, 1], [2, 1], [2, 1], [2, 1])
+        self.assertEqual(list(barArrays.getClose()), [1, 2])
+        with self.assertRaisesRegexp(Exception, "high < low on .*"):
+            columnar.BarArrays(INSTRUMENT, bar.Frequency.DAY, [1], [1], [1], [2], [1], [1])
+
+    def testMerge(self):
+        bars = load_yahoo_bars()
+        barArrays1 = columnar.from_bars(INSTRUMENT, bar.Frequency.DAY, bars[100:])
+        barArrays2 = columnar.from_bars(INSTRUMENT, bar.Frequency.DAY, bars[:100])
+        merged = barArrays1.merge(barArrays2)
+        self.assertEqual(len(merged), len(bars))
+        for bar1, bar2 in zip(bars, merged):
+            assert_bars_equal(self, bar1, bar2)
+
+
+class BarFeedTestCase(common.TestCase):
+    def testBaseBarFeed(self):
+        barFeed = columnar.BarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromSequence(INSTRUMENT, load_yahoo_bars())
+        barfeed_test.check_base_barfeed(self, barFeed, True)
+
+    def testSameBarsAsListBasedFeed(self):
+        expected = load_yahoo_bars()
+        barFeed = columnar.BarFeed(bar.Frequency.DAY)
+        barFeed.addBarArrays(columnar.from_bars(INSTRUMENT, bar.Frequency.DAY, expected[100:]))
+        barFeed.addBarsFromSequence(INSTRUMENT, expected[:100])
+
+        loaded = [bars[INSTRUMENT] for _, bars in barFeed]
+        self.assertEqual(len(loaded), len(expected))
+        for bar1, bar2 in zip(expected, loaded):
+            assert_bars_equal(self, bar1, bar2)
+        self.assertEqual(len(barFeed[INSTRUMENT]), len(expected))
+
+    def testArraysOnListBasedFeed(self):
+        expected = load_yahoo_bars()
+        barFeed = yahoofeed.Feed()
+        barFeed.addBarsFromSequence(INSTRUMENT, expected[100:])
+        barFeed.addBarArrays(columnar.from_bars(INSTRUMENT, bar.Frequency.DAY, expected[:100]))
+
+        loaded = [bars[INSTRUMENT] for _, bars in barFeed]
+        self.assertEqual(len(loaded), len(expected))
+        for bar1, bar2 in zip(expected, loaded):
+            assert_bars_equal(self, bar1, bar2)
+
+    def testNoAdjClose(self):
+        dateTime = datetime.datetime(2001, 1, 1)
+        barFeed = columnar.BarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromSequence(INSTRUMENT, [
+            bar.BasicBar(INSTRUMENT, dateTime, 1, 1, 1, 1, 1, None, bar.Frequency.DAY)
+        ])
+        barfeed_test.check_base_barfeed(self, barFeed, False)
@@ -21,10 +21,15 @@
 import datetime
 import os
 
+import pytz
+
 from . import common
 from . import feed_test
+from . import columnar_test
 
 from pyalgotrade.feed import csvfeed
+from pyalgotrade.barfeed import csvfeed as barcsvfeed
+from pyalgotrade import bar
 from pyalgotrade import dispatcher
 from pyalgotrade import marketsession
 from pyalgotrade.utils import dt
@@ -112,3 +117,104 @@ class TestCase(common.TestCase):
         self.assertEqual(len(values), len(reloadedValues))
         for i in range(len(values)):
             self.assertEqual(values[i], reloadedValues[i])
+
+
+class GenericBarFeedBulkLoadTestCase(common.TestCase):
+    def __loadBars(self, bulkLoad, path, timezone=None, skipMalformedBars=False):
+        instrument = "BTC/USD"
+        feed = barcsvfeed.GenericBarFeed(bar.Frequency.MINUTE * 30, timezone=timezone)
+        feed.setBulkLoad(bulkLoad)
+        feed.addBarsFromCSV(instrument, path, skipMalformedBars=skipMalformedBars)
+        return feed, [bars[instrument] for _, bars in feed]
+
+    def __assertSameBars(self, path, timezone=None, skipMalformedBars=False):
+        rowFeed, expected = self.__loadBars(False, path, timezone, skipMalformedBars)
+        bulkFeed, loaded = self.__loadBars(True, path, timezone, skipMalformedBars)
+        self.assertEqual(bulkFeed.barsHaveAdjClose(), rowFeed.barsHaveAdjClose())
+        self.assertEqual(len(loaded), len(expected))
+        for bar1, bar2 in zip(expected, loaded):
+            columnar_test.assert_bars_equal(self, bar1, bar2)
+        return loaded
+
+    def testSameBars(self):
+        bars = self.__assertSameBars(common.get_data_file_path("30min-bitstampUSD-2.csv"))
+        self.assertTrue(len(bars) > 0)
+        self.assertEqual(bars[0].getDateTime(), datetime.datetime(2014, 6, 23, 22))
+
+    def testSameBarsWithTimezone(self):
+        bars = self.__assertSameBars(
+            common.get_data_file_path("30min-bitstampUSD-2.csv"), marketsession.USEquities.getTimezone()
+        )
+        self.assertEqual(
+            bars[0].getDateTime(),
+            dt.localize(datetime.datetime(2014, 6, 23, 22), marketsession.USEquities.getTimezone())
+        )
+
+    def testAdjCloseAndExtraColumns(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "bars.csv")
+            with open(path, "w") as f:
+                f.write("Date Time,Open,High,Low,Close,Volume,Adj Close,Number,Text\n")
+                f.write("2014-06-23 22:00:00,585.46,588.5,585.14,586.54,30.6,586,1,a\n")
+                f.write("2014-06-23 22:30:00,588.24,588.5,585.79,588.5,24.7,,2.5,b\n")
+            bars = self.__assertSameBars(path)
+        self.assertEqual(bars[0].getAdjClose(), 586)
+        self.assertEqual(bars[1].getAdjClose(), None)
+        self.assertEqual(bars[1].getExtraColumns(), {"Number": 2.5, "Text": "b"})
+
+    def testSkipMalformedBars(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "bars.csv")
+            with open(path, "w") as f:
+                f.write("Date Time,Open,High,Low,Close,Volume,Adj Close\n")
+                f.write("2014-06-23 22:00:00,585.46,588.5,585.14,586.54,30.6,\n")
+                f.write("2014-06-23 22:30:00,,588.5,585.79,588.5,24.7,\n")
+                f.write("2014-06-23 23:00:00,588.24,580,585.79,588.5,24.7,\n")
+                f.write("2014-06-23 xx:30:00,588.24,588.5,585.79,588.5,24.7,\n")
+                f.write("2014-06-24 00:00:00,588.24,588.5,585.79,588.5,24.7,\n")
+            bars = self.__assertSameBars(path, skipMalformedBars=True)
+            self.assertEqual(len(bars), 2)
+
+            with self.assertRaises(ValueError):
+                self.__loadBars(True, path)
+
+    def testTimezoneOffsetNotOnTheHour(self):
+        # Lord Howe Island shifts 30 minutes at 2AM. On 2014-04-06 1:30 to 2:00 happens twice, and on 2014-10-05
+        # 2:00 to 2:30 doesn't happen.
+        timezone = pytz.timezone("Australia/Lord_Howe")
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "bars.csv")
+            with open(path, "w") as f:
+                f.write("Date Time,Open,High,Low,Close,Volume,Adj Close\n")
+                for dateTime in [
+                    "2014-04-06 01:00:00", "2014-04-06 01:45:00", "2014-04-06 02:00:00",
+                    "2014-10-05 01:00:00", "2014-10-05 02:45:00", "2014-10-05 03:00:00",
+                ]:
+                    f.write("%s,585.46,588.5,585.14,586.54,30.6,\n" % dateTime)
+            bars = self.__assertSameBars(path, timezone)
+        self.assertEqual(
+            [bar_.getDateTime() for bar_ in bars[-2:]],
+            [timezone.localize(datetime.datetime(2014, 10, 5, h, m)) for h, m in [(2, 45), (3, 0)]]
+        )
+
+    def testFastDateTimeFormatIsChecked(self):
+        # NumPy would parse these, but strptime doesn't.
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "bars.csv")
+            with open(path, "w") as f:
+                f.write("Date Time,Open,High,Low,Close,Volume,Adj Close\n")
+                f.write("2014-06-23 22:00:00,585.46,588.5,585.14,586.54,30.6,\n")
+                f.write("2014-06-23T22:30:00,585.46,588.5,585.14,586.54,30.6,\n")
+            bars = self.__assertSameBars(path, skipMalformedBars=True)
+            self.assertEqual(len(bars), 1)
+            for bulkLoad in [False, True]:
+                with self.assertRaises(ValueError):
+                    self.__loadBars(bulkLoad, path)
+
+    def testBarFilterFallsBackToRows(self):
+        feed = barcsvfeed.GenericBarFeed(bar.Frequency.MINUTE * 30)
+        feed.setBulkLoad(True)
+        feed.setBarFilter(barcsvfeed.DateRangeFilter(toDate=datetime.datetime(2014, 6, 24)))
+        feed.addBarsFromCSV("BTC/USD", common.get_data_file_path("30min-bitstampUSD-2.csv"))
+        for dateTime, bars in feed:
+            self.assertTrue(dateTime <= datetime.datetime(2014, 6, 24))
@@ -20,6 +20,8 @@
 
 import datetime
 
+import numpy as np
+import pytz
 from six.moves import xrange
 
 from . import common
@@ -148,6 +150,117 @@ class TestSequenceDataSeries(common.TestCase):
         self.assertEqual(ds[-1], 99)
 
 
+class TestNumericDataSeries(common.TestCase):
+    def testEmpty(self):
+        ds = dataseries.NumericDataSeries()
+        self.assertEqual(len(ds), 0)
+        with self.assertRaises(IndexError):
+            ds[-1]
+        with self.assertRaises(IndexError):
+            ds[0]
+        self.assertEqual(ds[:], [])
+        self.assertEqual(len(ds.asArray()), 0)
+        self.assertEqual(len(ds.asArray(10)), 0)
+        self.assertEqual(ds.getDateTimes(), [])
+
+    def testSeqLikeOps(self):
+        seq = [float(i) for i in xrange(10)]
+        ds = dataseries.NumericDataSeries()
+        for value in seq:
+            ds.append(value)
+
+        for i in xrange(-len(seq), len(seq)):
+            self.assertEqual(ds[i], seq[i])
+        for i in xrange(-len(seq), len(seq)):
+            for step in xrange(1, 3):
+                self.assertEqual(ds[i::step], seq[i::step])
+        self.assertEqual(ds.getDateTimes(), [None] * len(seq))
+
+    def testBounded(self):
+        ds = dataseries.NumericDataSeries(maxLen=3)
+        for i in xrange(100):
+            ds.appendWithDateTime(datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i), i)
+        self.assertEqual(len(ds), 3)
+        self.assertEqual(ds[:], [97, 98, 99])
+        self.assertEqual(ds.asArray().tolist(), [97, 98, 99])
+        self.assertEqual(ds.asArray(2).tolist(), [98, 99])
+        self.assertEqual(ds.asArray(5).tolist(), [97, 98, 99])
+        self.assertEqual(ds.asArray(0).tolist(), [])
+        self.assertEqual(
+            ds.getDateTimes(), [datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i) for i in (97, 98, 99)]
+        )
+
+        ds.setMaxLen(2)
+        self.assertEqual(ds[:], [98, 99])
+        self.assertEqual(len(ds.getDateTimes()), 2)
+        ds.setMaxLen(10)
+        ds.append(100)
+        self.assertEqual(ds[:], [98, 99, 100])
+        self.assertEqual(ds.getDateTimes()[-1], None)
+
+    def testNoneValues(self):
+        ds = dataseries.NumericDataSeries()
+        ds.append(1)
+        ds.append(None)
+        self.assertEqual(ds[-1], None)
+        self.assertEqual(ds[:], [1, None])
+        self.assertTrue(np.isnan(ds.asArray()[-1]))
+
+        ds = dataseries.NumericDataSeries(dtype=np.int64)
+        ds.append(1)
+        with self.assertRaisesRegexp(Exception, "None values are not supported"):
+            ds.append(None)
+
+    def testDTypes(self):
+        for dtype in (np.float64, np.float32, np.int64):
+            ds = dataseries.NumericDataSeries(dtype=dtype)
+            ds.append(1)
+            self.assertEqual(ds.getDType(), dtype)
+            self.assertEqual(ds.asArray().dtype, dtype)
+            self.assertEqual(ds[-1], 1)
+        with self.assertRaisesRegexp(Exception, "Invalid dtype"):
+            dataseries.NumericDataSeries(dtype=np.int8)
+
+    def testZeroCopy(self):
+        ds = dataseries.NumericDataSeries()
+        for i in xrange(10):
+            ds.append(i)
+        values = ds.asArray()
+        self.assertTrue(np.shares_memory(values, ds.asArray(5)))
+        self.assertTrue(values.flags["C_CONTIGUOUS"])
+
+    def testDateTimes(self):
+        ds = dataseries.NumericDataSeries()
+        dateTime = datetime.datetime(2000, 1, 1, 12, 30, 1, 5)
+        ds.appendWithDateTime(dateTime, 1)
+        self.assertEqual(ds.getDateTimes(), [dateTime])
+        self.assertEqual(ds.dateTimesArray().tolist(), [946729801000005])
+        with self.assertRaisesRegexp(Exception, "Invalid datetime"):
+            ds.appendWithDateTime(dateTime - datetime.timedelta(seconds=1), 2)
+        ds.appendWithDateTime(dateTime, 2)
+        self.assertEqual(len(ds), 2)
+
+    def testLocalizedDateTimes(self):
+        timeZone = pytz.timezone("US/Eastern")
+        dateTimes = [
+            timeZone.localize(datetime.datetime(2000, 1, 1, 12)), timeZone.localize(datetime.datetime(2000, 7, 1))
+        ]
+        ds = dataseries.NumericDataSeries()
+        for dateTime in dateTimes:
+            ds.appendWithDateTime(dateTime, 1)
+        self.assertEqual(ds.getDateTimes(), dateTimes)
+        self.assertEqual(ds.getDateTimes()[1].utcoffset(), dateTimes[1].utcoffset())
+        self.assertEqual(ds.dateTimesArray()[0], 946746000000000)
+
+    def testEvents(self):
+        ds = dataseries.NumericDataSeries()
+        events = []
+        ds.getNewValueEvent().subscribe(lambda ds, dateTime, value: events.append((dateTime, value)))
+        ds.append(1)
+        ds.append(None)
+        self.assertEqual(events, [(None, 1), (None, None)])
+
+
 class TestBarDataSeries(common.TestCase):
     def testEmpty(self):
         ds = bards.BarDataSeries(INSTRUMENT)
@@ -234,6 +347,100 @@ class TestBarDataSeries(common.TestCase):
             self.assertEqual(ds[i].getDateTime(), ds.getDateTimes()[i])
             self.assertEqual(ds.getDateTimes()[i], firstDt + datetime.timedelta(seconds=i))
 
+    def __buildBar(self, i, adjClose=3, extra={}):
+        return bar.BasicBar(
+            INSTRUMENT, datetime.datetime(2000, 1, 1) + datetime.timedelta(seconds=i),
+            i + 2, i + 4, i + 1, i + 3, i + 10, adjClose, bar.Frequency.SECOND, extra=extra
+        )
+
+    def testColumnsAreLazy(self):
+        ds = bards.BarDataSeries(INSTRUMENT, maxLen=5)
+        for i in xrange(10):
+            ds.append(self.__buildBar(i))
+
+        # Columns hold the values for all bars, even if requested afterwards.
+        closeDS = ds.getCloseDataSeries()
+        self.assertTrue(ds.getCloseDataSeries() is closeDS)
+        self.assertEqual(len(closeDS), 5)
+        self.assertEqual(closeDS[:], [8, 9, 10, 11, 12])
+        self.assertEqual(closeDS.asArray(2).tolist(), [11, 12])
+        self.assertEqual(closeDS.getDateTimes(), ds.getDateTimes())
+        self.assertEqual(closeDS.getMaxLen(), 5)
+        self.assertEqual(ds.getVolumeDataSeries()[-1], 19)
+
+    def testMissingValues(self):
+        ds = bards.BarDataSeries(INSTRUMENT)
+        ds.append(self.__buildBar(0, adjClose=None, extra={"foo": 1}))
+        ds.append(self.__buildBar(1, adjClose=5))
+        self.assertEqual(ds.getAdjCloseDataSeries()[:], [None, 5])
+        self.assertEqual(ds.getAdjCloseDataSeries()[0], None)
+        # Extra columns only hold the values for the bars that have them.
+        self.assertEqual(ds.getExtraDataSeries("foo")[:], [1])
+        self.assertEqual(ds.getExtraDataSeries("bar")[:], [])
+
+    def testEventsOnlyWhenRequested(self):
+        ds = bards.BarDataSeries(INSTRUMENT)
+        closeDS = ds.getCloseDataSeries()
+        ds.append(self.__buildBar(0))
+
+        events = []
+        closeDS.getNewValueEvent().subscribe(lambda ds, dateTime, value: events.append((ds, dateTime, value)))
+        ds.getExtraDataSeries("foo").getNewValueEvent().subscribe(
+            lambda ds, dateTime, value: events.append((ds, dateTime, value))
+        )
+        ds.append(self.__buildBar(1, extra={"foo": "x"}))
+        self.assertEqual(events, [
+            (closeDS, datetime.datetime(2000, 1, 1, 0, 0, 1), 4),
+            (ds.getExtraDataSeries("foo"), datetime.datetime(2000, 1, 1, 0, 0, 1), "x"),
+        ])
+
+    def testEmitOrder(self):
+        ds = bards.BarDataSeries(INSTRUMENT)
+        events = []
+        # Requested in a different order than the one values are emitted in.
+        for name in ["adjClose", "volume", "low", "high", "close", "open"]:
+            getter = getattr(ds, "get%s%sDataSeries" % (name[0].upper(), name[1:]))
+            getter().getNewValueEvent().subscribe(lambda ds_, dateTime, value, name=name: events.append(name))
+        ds.append(self.__buildBar(0))
+        self.assertEqual(events, ["open", "close", "high", "low", "volume", "adjClose"])
+
+    def testColumnRequestedWhileEmitting(self):
+        ds = bards.BarDataSeries(INSTRUMENT)
+        highs = []
+        ds.getCloseDataSeries().getNewValueEvent().subscribe(
+            lambda ds_, dateTime, value: highs.append(ds.getHighDataSeries()[-1])
+        )
+        ds.append(self.__buildBar(0))
+        ds.append(self.__buildBar(1))
+        self.assertEqual(highs, [4, 5])
+
+    def testProtectedAttributes(self):
+        ds = bards.BarDataSeries(INSTRUMENT)
+        ds.append(self.__buildBar(0, extra={"foo": 1}))
+        self.assertTrue(ds._openDS is ds.getOpenDataSeries())
+        self.assertTrue(ds._closeDS is ds.getCloseDataSeries())
+        self.assertEqual(ds._extraDS["foo"][:], [1])
+
+    def testColumnsInSyncWhenBarsEmitted(self):
+        ds = bards.BarDataSeries(INSTRUMENT, maxLen=2)
+        closes = []
+        ds.getNewValueEvent().subscribe(lambda ds_, dateTime, value: closes.append(ds.getCloseDataSeries()[-1]))
+        for i in xrange(5):
+            ds.append(self.__buildBar(i))
+        self.assertEqual(closes, [3, 4, 5, 6, 7])
+
+    def testResize(self):
+        ds = bards.BarDataSeries(INSTRUMENT, maxLen=10)
+        for i in xrange(10):
+            ds.append(self.__buildBar(i))
+        ds.setMaxLen(3)
+        self.assertEqual(len(ds.getOpenDataSeries()), 3)
+        self.assertEqual(ds.getOpenDataSeries()[:], [9, 10, 11])
+        ds.setMaxLen(5)
+        ds.append(self.__buildBar(10))
+        self.assertEqual(ds.getOpenDataSeries()[:], [9, 10, 11, 12])
+        self.assertEqual(ds.getHighDataSeries()[:], [11, 12, 13, 14])
+
 
 class TestDateAlignedDataSeries(common.TestCase):
     def testNotAligned(self):
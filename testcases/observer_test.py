@@ -225,6 +225,136 @@ class DispatcherTestCase(common.TestCase):
         self.assertTrue(values[0] < values[1])
 
 
+class CountingFeed(NonRealtimeFeed):
+    def __init__(self, datetimes, priority=None):
+        super(CountingFeed, self).__init__(datetimes, priority)
+        self.calls = 0
+
+    def eof(self):
+        self.calls += 1
+        return super(CountingFeed, self).eof()
+
+    def peekDateTime(self):
+        self.calls += 1
+        return super(CountingFeed, self).peekDateTime()
+
+
+class HeapDispatcherTestCase(common.TestCase):
+    def __buildDispatcher(self):
+        ret = dispatcher.Dispatcher()
+        ret.setUseHeap(True)
+        return ret
+
+    def test2NrtFeeds(self):
+        values = []
+        now = datetime.datetime.now()
+        datetimes1 = [now + datetime.timedelta(seconds=i*2) for i in xrange(10)]
+        datetimes2 = [now + datetime.timedelta(seconds=i*2+1) for i in xrange(10)]
+        nrtFeed1 = NonRealtimeFeed(copy.copy(datetimes1))
+        nrtFeed1.getEvent().subscribe(lambda x: values.append(x))
+        nrtFeed2 = NonRealtimeFeed(copy.copy(datetimes2))
+        nrtFeed2.getEvent().subscribe(lambda x: values.append(x))
+
+        disp = self.__buildDispatcher()
+        disp.addSubject(nrtFeed1)
+        disp.addSubject(nrtFeed2)
+        disp.run()
+
+        self.assertEqual(values, sorted(datetimes1 + datetimes2))
+
+    def testSameDateTimeDispatchOrder(self):
+        values = []
+        now = datetime.datetime.now()
+        datetimes = [now + datetime.timedelta(seconds=i) for i in xrange(10)]
+        feed1 = NonRealtimeFeed(copy.copy(datetimes), None)
+        feed2 = NonRealtimeFeed(copy.copy(datetimes), 0)
+        feed1.getEvent().subscribe(lambda x: values.append((1, x)))
+        feed2.getEvent().subscribe(lambda x: values.append((2, x)))
+
+        disp = self.__buildDispatcher()
+        disp.addSubject(feed1)
+        disp.addSubject(feed2)
+        self.assertEqual(disp.getSubjects(), [feed2, feed1])
+        disp.run()
+
+        # Events with the same datetime should be dispatched following subject priorities.
+        expected = []
+        for dateTime in datetimes:
+            expected.append((2, dateTime))
+            expected.append((1, dateTime))
+        self.assertEqual(values, expected)
+
+    def test2Combined(self):
+        values = []
+        now = datetime.datetime.now()
+        datetimes1 = [now + datetime.timedelta(seconds=i) for i in xrange(10)]
+        datetimes2 = [now + datetime.timedelta(seconds=i+len(datetimes1)) for i in xrange(10)]
+        nrtFeed1 = RealtimeFeed(copy.copy(datetimes1))
+        nrtFeed1.getEvent().subscribe(lambda x: values.append(x))
+        nrtFeed2 = NonRealtimeFeed(copy.copy(datetimes2))
+        nrtFeed2.getEvent().subscribe(lambda x: values.append(x))
+
+        disp = self.__buildDispatcher()
+        disp.addSubject(nrtFeed1)
+        disp.addSubject(nrtFeed2)
+        disp.run()
+
+        self.assertEqual(len(values), len(datetimes1) + len(datetimes2))
+        for i in xrange(len(datetimes1)):
+            self.assertEqual(values[i*2], datetimes1[i])
+            self.assertEqual(values[i*2+1], datetimes2[i])
+
+    def testSubjectsScheduledOnlyWhenNeeded(self):
+        now = datetime.datetime.now()
+        feed1 = NonRealtimeFeed([now + datetime.timedelta(seconds=i) for i in xrange(100)])
+        # Hits eof right away and gets polled from then on.
+        feed2 = CountingFeed([now])
+        # Waits until the end.
+        feed3 = CountingFeed([now + datetime.timedelta(seconds=1000)])
+
+        disp = self.__buildDispatcher()
+        disp.addSubject(feed1)
+        disp.addSubject(feed2)
+        disp.addSubject(feed3)
+        disp.run()
+        self.assertTrue(feed2.calls >= 100)
+        self.assertTrue(feed3.calls < 10)
+
+    def testUseHeapIfManySubjects(self):
+        now = datetime.datetime.now()
+        for subjectCount, useHeap in [(dispatcher.HEAP_MIN_SUBJECTS - 1, False), (dispatcher.HEAP_MIN_SUBJECTS, True)]:
+            values = []
+            feeds = [
+                NonRealtimeFeed([now + datetime.timedelta(seconds=i) for i in xrange(100)])
+                for i in xrange(subjectCount - 1)
+            ]
+            waitingFeed = CountingFeed([now + datetime.timedelta(seconds=1000)])
+            feeds.append(waitingFeed)
+            disp = dispatcher.Dispatcher()
+            disp.setUseHeap(None)
+            for feed in feeds:
+                feed.getEvent().subscribe(lambda x: values.append(x))
+                disp.addSubject(feed)
+            disp.run()
+            self.assertEqual(values, sorted(values))
+            self.assertEqual(len(values), (subjectCount - 1) * 100 + 1)
+            self.assertEqual(waitingFeed.calls < 10, useHeap)
+
+    def testDispatchOrder(self):
+        values = []
+        now = datetime.datetime.now()
+        feed1 = NonRealtimeFeed([now], 0)
+        feed2 = RealtimeFeed([now + datetime.timedelta(seconds=1)], None)
+        feed1.getEvent().subscribe(lambda x: values.append(x))
+        feed2.getEvent().subscribe(lambda x: values.append(x))
+
+        disp = self.__buildDispatcher()
+        disp.addSubject(feed2)
+        disp.addSubject(feed1)
+        disp.run()
+        self.assertTrue(values[0] < values[1])
+
+
 class EventTestCase(common.TestCase):
     def testEmitOrder(self):
         handlersData = []
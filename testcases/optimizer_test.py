@@ -20,10 +20,23 @@
 
 import sys
 import logging
+import os
+import pickle
+import signal
+import time
+
+import numpy as np
 
 from . import common
+from . import columnar_test
 
+from pyalgotrade.optimizer import base
+from pyalgotrade.optimizer import journal
 from pyalgotrade.optimizer import local
+from pyalgotrade.optimizer import results
+from pyalgotrade.optimizer import serialization
+from pyalgotrade.optimizer import xmlrpcserver
+from pyalgotrade import bar
 from pyalgotrade import strategy
 from pyalgotrade.barfeed import yahoofeed
 
@@ -44,6 +57,31 @@ class FailingStrategy(strategy.BacktestingStrategy):
         raise Exception("oh no!")
 
 
+class DyingStrategy(sma_crossover.SMACrossOver):
+    def __init__(self, barFeed, instrument, smaPeriod):
+        if smaPeriod == 20:
+            os._exit(1)
+        super(DyingStrategy, self).__init__(barFeed, instrument, smaPeriod)
+
+
+class KilledOnceStrategy(sma_crossover.SMACrossOver):
+    def __init__(self, barFeed, instrument, smaPeriod, markerPath):
+        # The first process that gets smaPeriod 20 gets killed in the middle of the batch.
+        if smaPeriod == 20 and not os.path.exists(markerPath):
+            open(markerPath, "w").close()
+            os.kill(os.getpid(), signal.SIGKILL)
+        super(KilledOnceStrategy, self).__init__(barFeed, instrument, smaPeriod)
+
+
+class ResultCounter(base.ResultSinc):
+    def __init__(self):
+        super(ResultCounter, self).__init__()
+        self.results = 0
+
+    def onNewResult(self, result, parameters):
+        self.results += 1
+
+
 class OptimizerTestCase(common.TestCase):
     def testLocal(self):
         barFeed = yahoofeed.Feed()
@@ -56,6 +94,87 @@ class OptimizerTestCase(common.TestCase):
         self.assertEqual(round(res.getResult(), 2), 1295462.6)
         self.assertEqual(res.getParameters()[1], 20)
 
+    def testLocalWithSharedBars(self):
+        barFeed = yahoofeed.Feed()
+        instrument = "orcl/USD"
+        barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        res = local.run(
+            sma_crossover.SMACrossOver, barFeed, parameters_generator(instrument, 5, 100),
+            logLevel=logging.DEBUG, batchSize=50, shareBars=True
+        )
+        self.assertEqual(round(res.getResult(), 2), 1295462.6)
+        self.assertEqual(res.getParameters()[1], 20)
+
+    def testLocalWithXMLRPC(self):
+        barFeed = yahoofeed.Feed()
+        instrument = "orcl/USD"
+        barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        res = local.run_impl(
+            sma_crossover.SMACrossOver, barFeed, parameters_generator(instrument, 5, 100), 50,
+            logLevel=logging.DEBUG, useXMLRPC=True
+        )
+        self.assertEqual(round(res.getResult(), 2), 1295462.6)
+        self.assertEqual(res.getParameters()[1], 20)
+
+    def testAllResults(self):
+        instrument = "orcl/USD"
+        for useXMLRPC in [False, True]:
+            resultSinc = results.TopResultsSinc(3)
+            barFeed = yahoofeed.Feed()
+            barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+            res = local.run_impl(
+                sma_crossover.SMACrossOver, barFeed, parameters_generator(instrument, 5, 100), 50,
+                resultSinc=resultSinc, useXMLRPC=useXMLRPC
+            )
+            top = resultSinc.getTop()
+            self.assertEqual(len(top), 3)
+            self.assertEqual(top[0][0], res.getResult())
+            self.assertEqual(top[0][1].args[1], 20)
+            self.assertTrue(top[0][0] >= top[1][0] >= top[2][0])
+            self.assertTrue(top[0][2] > 0)
+
+    def testKeywordParameters(self):
+        barFeed = yahoofeed.Feed()
+        instrument = "orcl/USD"
+        barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        res = local.run(
+            sma_crossover.SMACrossOver, barFeed,
+            [base.Parameters(instrument, smaPeriod=sma) for sma in range(5, 101)], batchSize=10
+        )
+        self.assertEqual(round(res.getResult(), 2), 1295462.6)
+
+    def testDyingWorker(self):
+        barFeed = yahoofeed.Feed()
+        instrument = "orcl/USD"
+        barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        resultSinc = ResultCounter()
+        res = local.run_impl(
+            DyingStrategy, barFeed, parameters_generator(instrument, 5, 100), 10, workerCount=2,
+            resultSinc=resultSinc
+        )
+        # The batch with smaPeriod 20 is retried once and then dropped.
+        self.assertTrue(96 - 10 <= resultSinc.results < 96)
+        self.assertNotEqual(res.getParameters()[1], 20)
+
+    def testKilledWorker(self):
+        instrument = "orcl/USD"
+        for workerCount in [1, 2]:
+            with common.TmpDir() as tmpPath:
+                barFeed = yahoofeed.Feed()
+                barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+                markerPath = os.path.join(tmpPath, "killed")
+                resultSinc = ResultCounter()
+                res = local.run_impl(
+                    KilledOnceStrategy, barFeed,
+                    [base.Parameters(instrument, sma, markerPath=markerPath) for sma in range(5, 101)], 5,
+                    workerCount=workerCount, resultSinc=resultSinc
+                )
+                self.assertTrue(os.path.exists(markerPath))
+                # The batch that was running and the ones queued for the worker that was killed run again.
+                self.assertEqual(resultSinc.results, 96)
+                self.assertEqual(round(res.getResult(), 2), 1295462.6)
+                self.assertEqual(res.getParameters()[1], 20)
+
     def testFailingStrategy(self):
         barFeed = yahoofeed.Feed()
         instrument = "orcl/USD"
@@ -64,3 +183,302 @@ class OptimizerTestCase(common.TestCase):
             FailingStrategy, barFeed, parameters_generator(instrument, 5, 100), logLevel=logging.DEBUG
         )
         self.assertIsNone(res)
+
+
+class SharedBarsTestCase(common.TestCase):
+    def loadBars(self):
+        barFeed = yahoofeed.Feed()
+        barFeed.addBarsFromCSV("orcl/USD", common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        barFeed.addBarsFromCSV("spy/USD", common.get_data_file_path("spy-2010-yahoofinance.csv"))
+        loadedBars = [bars for _, bars in barFeed]
+        return barFeed.getKeys(), loadedBars
+
+    def testSharedBars(self):
+        instruments, loadedBars = self.loadBars()
+        sharedBars = local.share_bars(bar.Frequency.DAY, instruments, loadedBars)
+        self.assertIsNotNone(sharedBars)
+        try:
+            # Feeds can be built many times, and also after pickling.
+            for sharedBars in [sharedBars, sharedBars, pickle.loads(pickle.dumps(sharedBars))]:
+                barFeed = sharedBars.buildBarFeed()
+                self.assertEqual(sorted(barFeed.getKeys()), sorted(instruments))
+                self.assertTrue(barFeed.barsHaveAdjClose())
+                sharedLoadedBars = [bars for _, bars in barFeed]
+                self.assertEqual(len(sharedLoadedBars), len(loadedBars))
+                for bars1, bars2 in zip(loadedBars, sharedLoadedBars):
+                    self.assertEqual(sorted(bars1.getInstruments()), sorted(bars2.getInstruments()))
+                    for instrument in bars1.getInstruments():
+                        columnar_test.assert_bars_equal(self, bars1[instrument], bars2[instrument])
+        finally:
+            local.remove_shared_bars(sharedBars)
+        for path in sharedBars.getPaths():
+            self.assertFalse(os.path.exists(path))
+
+    def testCustomBarsAreNotShared(self):
+        class CustomBar(bar.BasicBar):
+            pass
+
+        instruments, loadedBars = self.loadBars()
+        customBar = loadedBars[0]["orcl/USD"]
+        loadedBars[0] = bar.Bars([CustomBar(
+            customBar.getInstrument(), customBar.getDateTime(), customBar.getOpen(), customBar.getHigh(),
+            customBar.getLow(), customBar.getClose(), customBar.getVolume(), customBar.getAdjClose(),
+            customBar.getFrequency()
+        )])
+        self.assertIsNone(local.share_bars(bar.Frequency.DAY, instruments, loadedBars))
+
+
+class BatchSizerTestCase(common.TestCase):
+    def testParameterSourceRemaining(self):
+        paramSource = base.ParameterSource([(i,) for i in range(10)])
+        self.assertEqual(paramSource.getRemaining(), 10)
+        self.assertEqual(len(paramSource.getNext(4)), 4)
+        self.assertEqual(paramSource.getRemaining(), 6)
+        self.assertEqual(len(paramSource.getNext(10)), 6)
+        self.assertEqual(paramSource.getRemaining(), 0)
+        self.assertIsNone(base.ParameterSource(parameters_generator("orcl/USD", 1, 2)).getRemaining())
+
+    def testParameterSourceRemainingReadAhead(self):
+        paramSource = base.ParameterSource(parameters_generator("orcl/USD", 0, 9), skip=set([1]))
+        self.assertIsNone(paramSource.getRemaining(5))
+        self.assertEqual([p.args[1] for p in paramSource.getNext(3)], [0, 2, 3])
+        self.assertIsNone(paramSource.getRemaining(5))
+        self.assertEqual(paramSource.getRemaining(6), 6)
+        self.assertFalse(paramSource.eof())
+        params = paramSource.getNext(4)
+        self.assertEqual([p.args[1] for p in params], [4, 5, 6, 7])
+        self.assertEqual([p.index for p in params], [4, 5, 6, 7])
+        self.assertEqual(paramSource.getRemaining(), 2)
+        self.assertEqual([p.args[1] for p in paramSource.getNext(4)], [8, 9])
+        self.assertEqual(paramSource.getRemaining(), 0)
+        self.assertTrue(paramSource.eof())
+
+    def testBatchSize(self):
+        batchSizer = base.BatchSizer(200, batchDuration=10)
+        self.assertEqual(batchSizer.getBatchSize(), 1)
+        batchSizer.addRuntime(10, 1)
+        self.assertEqual(batchSizer.getParameterRuntime(), 0.1)
+        self.assertEqual(batchSizer.getBatchSize(), 100)
+        self.assertEqual(batchSizer.getBatchSize(remaining=1000, workerCount=4), 100)
+        self.assertEqual(batchSizer.getBatchSize(remaining=10, workerCount=2), 3)
+        self.assertEqual(batchSizer.getBatchSize(remaining=0, workerCount=2), 1)
+        self.assertEqual(batchSizer.getShrinkThreshold(workerCount=2), 800)
+        batchSizer.addRuntime(1000, 0)
+        self.assertEqual(batchSizer.getBatchSize(), 200)
+        batchSizer = base.BatchSizer(200, batchDuration=10)
+        batchSizer.addRuntime(1, 60)
+        self.assertEqual(batchSizer.getBatchSize(), 1)
+
+
+class ServerTestCase(common.TestCase):
+    def testReissueJobs(self):
+        paramSource = base.ParameterSource([("orcl/USD", i) for i in range(3)])
+        resultSinc = ResultCounter()
+        srv = xmlrpcserver.Server(paramSource, resultSinc, None, "localhost", local.find_port(), batchSize=10)
+        try:
+            workerNames = [serialization.dumps("worker%d" % i) for i in range(7)]
+            workerName = workerNames[0]
+            job1 = serialization.loads(srv.getNextJob(workerNames[0]))
+            # There is no runtime estimate yet.
+            self.assertEqual(job1.getNextParameters(), ("orcl/USD", 0))
+            self.assertIsNone(job1.getNextParameters())
+            job2 = serialization.loads(srv.getNextJob(workerNames[1]))
+            self.assertEqual(job2.getNextParameters(), ("orcl/USD", 1))
+            job3 = serialization.loads(srv.getNextJob(workerNames[2]))
+            self.assertEqual(job3.getNextParameters(), ("orcl/USD", 2))
+
+            # Parameters ran out, so pending jobs are handed out again, oldest first, and to up to two workers at the
+            # same time.
+            self.assertEqual(serialization.loads(srv.getNextJob(workerNames[3])).getId(), job1.getId())
+            self.assertEqual(serialization.loads(srv.getNextJob(workerNames[4])).getId(), job2.getId())
+            self.assertEqual(serialization.loads(srv.getNextJob(workerNames[5])).getId(), job3.getId())
+            self.assertIsNone(serialization.loads(srv.getNextJob(workerNames[6])))
+
+            # Only the first results count.
+            for i in range(2):
+                srv.pushJobResults(
+                    serialization.dumps(job1.getId()), serialization.dumps(1), serialization.dumps(("orcl/USD", 0)),
+                    workerName
+                )
+            self.assertEqual(resultSinc.results, 1)
+            self.assertTrue(srv.jobsPending())
+            # worker0 finished job1 and worker3 gave up on it, so both are idle, but job2 and job3 already run twice.
+            self.assertIsNone(serialization.loads(srv.getNextJob(workerNames[3])))
+            # Once worker1 gives up on job2, it can be handed out once more.
+            self.assertEqual(serialization.loads(srv.getNextJob(workerNames[1])).getId(), job2.getId())
+            for job in [job2, job3]:
+                srv.pushJobResults(
+                    serialization.dumps(job.getId()), serialization.dumps(1), serialization.dumps(("orcl/USD", 0)),
+                    workerName
+                )
+            self.assertFalse(srv.jobsPending())
+            self.assertIsNone(serialization.loads(srv.getNextJob(workerName)))
+        finally:
+            srv.server_close()
+
+    def testDeadWorkers(self):
+        paramSource = base.ParameterSource(parameters_generator("orcl/USD", 0, 1))
+        resultSinc = ResultCounter()
+        srv = xmlrpcserver.Server(
+            paramSource, resultSinc, None, "localhost", local.find_port(), batchSize=10, batchDuration=0.01
+        )
+        try:
+            workerNames = [serialization.dumps("worker%d" % i) for i in range(5)]
+            job1 = serialization.loads(srv.getNextJob(workerNames[0]))
+            job2 = serialization.loads(srv.getNextJob(workerNames[1]))
+            self.assertEqual(serialization.loads(srv.getNextJob(workerNames[2])).getId(), job1.getId())
+            self.assertEqual(serialization.loads(srv.getNextJob(workerNames[3])).getId(), job2.getId())
+            self.assertIsNone(serialization.loads(srv.getNextJob(workerNames[4])))
+
+            # Workers that are not seen for a while are considered dead, and the jobs they were running are handed
+            # out again.
+            time.sleep(0.1)
+            self.assertEqual(serialization.loads(srv.getNextJob(workerNames[2])).getId(), job1.getId())
+            self.assertEqual(serialization.loads(srv.getNextJob(workerNames[3])).getId(), job2.getId())
+            self.assertEqual(serialization.loads(srv.getNextJob(workerNames[0])).getId(), job1.getId())
+            self.assertEqual(serialization.loads(srv.getNextJob(workerNames[1])).getId(), job2.getId())
+            self.assertIsNone(serialization.loads(srv.getNextJob(workerNames[4])))
+        finally:
+            srv.server_close()
+
+
+class ResultsTestCase(common.TestCase):
+    def testTopResults(self):
+        resultSinc = results.TopResultsSinc(2)
+        for i, result in enumerate([1, None, 3, 2, 3, 0]):
+            resultSinc.push(result, base.Parameters(i), i * 10)
+        top = resultSinc.getTop()
+        self.assertEqual(
+            [(result, params.args, runtime) for result, params, runtime in top], [(3, (2,), 20), (3, (4,), 40)]
+        )
+        self.assertEqual(resultSinc.getBest()[0], 3)
+
+    def testResultsFile(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "results")
+            resultSinc = results.ResultsFileSinc(path, chunkSize=2)
+            resultSinc.push(1.5, base.Parameters("orcl/USD", 10), 0.5)
+            resultSinc.push(None, base.Parameters("orcl/USD", 20), 0.25)
+            resultSinc.push(2, base.Parameters("orcl/USD", 30, threshold=0.1))
+            self.assertEqual(len(list(results.iter_result_chunks(path))), 1)
+            resultSinc.close()
+            self.assertEqual(resultSinc.getBest()[0], 2)
+
+            # Results are appended.
+            resultSinc = results.ResultsFileSinc(path)
+            resultSinc.push(3, base.Parameters("spy/USD", 40))
+            resultSinc.close()
+
+            self.assertEqual(len(list(results.iter_result_chunks(path))), 3)
+            loaded = results.load_results(path)
+            self.assertEqual(sorted(loaded.keys()), ["arg0", "arg1", "index", "result", "runtime", "threshold"])
+            self.assertEqual(list(loaded["index"]), [-1] * 4)
+            self.assertEqual(list(loaded["arg0"]), ["orcl/USD"] * 3 + ["spy/USD"])
+            self.assertEqual(list(loaded["arg1"]), [10, 20, 30, 40])
+            self.assertEqual(loaded["arg1"].dtype.kind, "i")
+            self.assertEqual(loaded["result"][0], 1.5)
+            self.assertTrue(np.isnan(loaded["result"][1]))
+            self.assertEqual(list(loaded["result"][2:]), [2, 3])
+            self.assertEqual(list(loaded["runtime"][:2]), [0.5, 0.25])
+            self.assertTrue(np.isnan(loaded["runtime"][2]))
+            self.assertEqual(list(loaded["threshold"]), [None, None, 0.1, None])
+
+    def testResultsFileReplay(self):
+        def build_parameters(index, *args, **kwargs):
+            ret = base.Parameters(*args, **kwargs)
+            ret.index = index
+            return ret
+
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "results")
+            resultSinc = results.ResultsFileSinc(path)
+            resultSinc.push(1, build_parameters(0, "orcl/USD", 10), 0.5)
+            resultSinc.push(2, build_parameters(1, "orcl/USD", 10.5, threshold=0.1))
+            resultSinc.close()
+            # Simulate a crash while writing a chunk.
+            with open(path, "ab") as f:
+                f.write(b"\x80\x04garbage")
+
+            # Replayed results are only written if the file doesn't hold a row for the same position.
+            resultSinc = results.ResultsFileSinc(path)
+            resultSinc.replay(2, build_parameters(1, "orcl/USD", 10.5, threshold=0.1))
+            resultSinc.replay(1, build_parameters(0, "orcl/USD", 10), 0.5)
+            resultSinc.replay(1, build_parameters(2, "orcl/USD", 10), 0.5)
+            resultSinc.replay(3, build_parameters(3, "orcl/USD", 30))
+            resultSinc.close()
+            self.assertEqual(resultSinc.getBest()[0], 3)
+            loaded = results.load_results(path)
+            self.assertEqual(list(loaded["index"]), [0, 1, 2, 3])
+            self.assertEqual(list(loaded["arg1"]), [10, 10.5, 10, 30])
+            self.assertEqual(list(loaded["result"]), [1, 2, 1, 3])
+
+
+class JournalTestCase(common.TestCase):
+    def testParameterSourceSkip(self):
+        paramSource = base.ParameterSource([(i,) for i in range(10)], skip=set([0, 3, 4, 20]))
+        self.assertEqual(paramSource.getRemaining(), 7)
+        params = paramSource.getNext(3)
+        self.assertEqual([p.args for p in params], [(1,), (2,), (5,)])
+        self.assertEqual([p.index for p in params], [1, 2, 5])
+        self.assertEqual(paramSource.getRemaining(), 4)
+
+    def testRecordAndReplay(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "journal")
+            j = journal.Journal(path)
+            self.assertEqual(j.getCompleted(), set())
+            j.record([0, 1], [(base.Parameters("a", 1), 10, 0.5), (base.Parameters("a", x=2), None, 0.1)])
+            j.close()
+            # Simulate a crash while writing an entry.
+            with open(path, "ab") as f:
+                f.write(b"\x80\x04garbage")
+
+            j = journal.Journal(path)
+            self.assertEqual(j.getCompleted(), set([0, 1]))
+            j.record([5], [(base.Parameters("a", 5), 20, 0.2)])
+            self.assertEqual(j.getCompleted(), set([0, 1, 5]))
+            resultSinc = ResultCounter()
+            j.replay(resultSinc)
+            j.close()
+            self.assertEqual(resultSinc.results, 3)
+            self.assertEqual(resultSinc.getBest()[0], 20)
+            self.assertEqual(resultSinc.getBest()[1].args, ("a", 5))
+
+    def testResume(self):
+        instrument = "orcl/USD"
+        for useXMLRPC in [False, True]:
+            with common.TmpDir() as tmpPath:
+                path = os.path.join(tmpPath, "journal")
+                for lastSMA in [50, 100]:
+                    barFeed = yahoofeed.Feed()
+                    barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+                    resultSinc = ResultCounter()
+                    res = local.run_impl(
+                        sma_crossover.SMACrossOver, barFeed, parameters_generator(instrument, 5, lastSMA), 10,
+                        resultSinc=resultSinc, journalPath=path, useXMLRPC=useXMLRPC
+                    )
+                # 46 results were replayed and only 50 were evaluated.
+                self.assertEqual(resultSinc.results, 96)
+                j = journal.Journal(path)
+                self.assertEqual(len(j.getCompleted()), 96)
+                j.close()
+                self.assertEqual(round(res.getResult(), 2), 1295462.6)
+                self.assertEqual(res.getParameters()[1], 20)
+
+    def testResumeIntoResultsFile(self):
+        instrument = "orcl/USD"
+        with common.TmpDir() as tmpPath:
+            journalPath = os.path.join(tmpPath, "journal")
+            resultsPath = os.path.join(tmpPath, "results")
+            for lastSMA in [50, 100]:
+                barFeed = yahoofeed.Feed()
+                barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+                resultSinc = results.ResultsFileSinc(resultsPath)
+                res = local.run_impl(
+                    sma_crossover.SMACrossOver, barFeed, parameters_generator(instrument, 5, lastSMA), 10,
+                    resultSinc=resultSinc, journalPath=journalPath
+                )
+                resultSinc.close()
+            loaded = results.load_results(resultsPath)
+            self.assertEqual(sorted(loaded["arg1"]), list(range(5, 101)))
+            self.assertEqual(res.getParameters()[1], 20)
@@ -22,6 +22,8 @@ import datetime
 
 from . import common
 
+from pyalgotrade import bar
+from pyalgotrade import dispatcher
 from pyalgotrade import strategy
 from pyalgotrade import broker
 from pyalgotrade.broker import backtesting
@@ -223,6 +225,41 @@ class StrategyOrderTestCase(StrategyTestCase):
         self.assertEqual(o.getExecutionInfo().getDateTime(), datetime.datetime(2000, 1, 10))
 
 
+class DispatcherTestCase(StrategyTestCase):
+    def testManySubjects(self):
+        allEvents = []
+        for useHeap in [None, False]:
+            strat = self.createStrategy()
+            self.assertIsNone(strat.getDispatcher().getUseHeap())
+            strat.getDispatcher().setUseHeap(useHeap)
+            events = []
+            strat.getFeed().getNewValuesEvent().subscribe(lambda dateTime, bars: events.append((0, dateTime)))
+            for i in range(1, 4):
+                barFeed = self.loadDailyBarFeed()
+                barFeed.getNewValuesEvent().subscribe(lambda dateTime, bars, i=i: events.append((i, dateTime)))
+                strat.getDispatcher().addSubject(barFeed)
+            strat.run()
+            allEvents.append(events)
+        self.assertEqual(len(allEvents[0]), 4 * 252)
+        self.assertEqual(allEvents[0], allEvents[1])
+
+    def testResampledBarFeeds(self):
+        # Resampled bar feeds hit eof until the bar feed they resample dispatches bars.
+        allEvents = []
+        for useHeap in [None, False]:
+            strat = self.createStrategy()
+            strat.getDispatcher().setUseHeap(useHeap)
+            events = []
+            strat.resampleBarFeed(bar.Frequency.DAY, lambda bars: events.append(("day", bars.getDateTime())))
+            strat.resampleBarFeed(bar.Frequency.MONTH, lambda bars: events.append(("month", bars.getDateTime())))
+            self.assertGreaterEqual(len(strat.getDispatcher().getSubjects()), dispatcher.HEAP_MIN_SUBJECTS)
+            strat.run()
+            allEvents.append(events)
+        self.assertEqual(len([event for event in allEvents[0] if event[0] == "month"]), 11)
+        self.assertEqual(len([event for event in allEvents[0] if event[0] == "day"]), 251)
+        self.assertEqual(allEvents[0], allEvents[1])
+
+
 class OptionalOverridesTestCase(StrategyTestCase):
     def testOnStartIdleFinish(self):
         strat = self.createStrategy()
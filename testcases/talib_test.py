@@ -19,12 +19,14 @@
 """
 
 import datetime
+import numpy
 import talib
 
 from six.moves import xrange
 
 from . import common
 
+from pyalgotrade.talibext import filters as filters_
 from pyalgotrade.talibext import indicator
 from pyalgotrade import bar
 from pyalgotrade import dataseries
@@ -239,6 +241,48 @@ class TestCase(common.TestCase):
             seconds += 1
         return ret
 
+    def testMissingValues(self):
+        values = [float(value) for value in CLOSE_VALUES[:30]]
+        values[-5] = float("nan")
+
+        # NaN values are passed to TA-Lib as they are.
+        seqDS = dataseries.SequenceDataSeries()
+        for value in values:
+            seqDS.append(value)
+        self.assertTrue(numpy.isnan(indicator.SMA(seqDS, 30, 10)[-1]))
+
+        # These dataseries return NaN values as None, so they are missing.
+        numericDS = dataseries.NumericDataSeries()
+        barDs = bards.BarDataSeries(INSTRUMENT)
+        for i, value in enumerate(values):
+            numericDS.append(value)
+            barDs.append(bar.BasicBar(
+                INSTRUMENT, datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i), value, value, value, value, 10,
+                None, bar.Frequency.DAY
+            ))
+        self.assertEqual(numericDS[-5], None)
+        self.assertIsNone(indicator.SMA(numericDS, 30, 10))
+        self.assertIsNone(indicator.SMA(barDs.getCloseDataSeries(), 30, 10))
+        self.assertIsNotNone(indicator.SMA(barDs.getCloseDataSeries(), 4, 2))
+        # Bars without an adjusted close.
+        self.assertIsNone(indicator.SMA(barDs.getAdjCloseDataSeries(), 4, 2))
+
+    def testFewerValuesThanCount(self):
+        # All the values are used if the dataseries doesn't hold count values, whatever the dataseries type.
+        seqDS = dataseries.SequenceDataSeries()
+        barDs = bards.BarDataSeries(INSTRUMENT)
+        for i, value in enumerate(CLOSE_VALUES[:50]):
+            seqDS.append(value)
+            barDs.append(bar.BasicBar(
+                INSTRUMENT, datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i), value, value, value, value, 10,
+                None, bar.Frequency.DAY
+            ))
+        expected = indicator.SMA(seqDS, 100, timeperiod=10)
+        self.assertEqual(len(expected), 50)
+        for ds in [barDs.getCloseDataSeries(), barDs.getHighDataSeries()]:
+            numpy.testing.assert_array_equal(indicator.SMA(ds, 100, timeperiod=10), expected)
+        self.assertEqual(len(indicator.SMA(barDs.getCloseDataSeries(), 0, timeperiod=10)), 0)
+
     def assertAmountsAreEqual(self, first, second, precision=2):
         self.assertEqual(round(first, precision), round(second, precision))
 
@@ -722,3 +766,110 @@ class TestCase(common.TestCase):
         self.assertAmountsAreEqual(indicator.WMA(barDs.getCloseDataSeries(), 252, 2)[2], 94.52)
         self.assertAmountsAreEqual(indicator.WMA(barDs.getCloseDataSeries(), 252, 2)[3], 94.86)  # Original value 94.85
         self.assertAmountsAreEqual(indicator.WMA(barDs.getCloseDataSeries(), 252, 2)[-1], 108.16)
+
+
+class FiltersTestCase(common.TestCase):
+    def __buildBars(self):
+        dateTime = datetime.datetime(2000, 1, 1)
+        ret = []
+        for i in xrange(len(OPEN_VALUES)):
+            ret.append(bar.BasicBar(
+                INSTRUMENT, dateTime + datetime.timedelta(days=i), OPEN_VALUES[i], HIGH_VALUES[i], LOW_VALUES[i],
+                CLOSE_VALUES[i], VOLUME_VALUES[i], CLOSE_VALUES[i], bar.Frequency.DAY
+            ))
+        return ret
+
+    def __assertSameLastValues(self, filters, indicatorFuns, barDs):
+        # Add bars one by one and compare with the last value returned by the indicator functions. Those use the
+        # values available until count values are held, while filters wait for their window to be full.
+        for bar_ in self.__buildBars():
+            barDs.append(bar_)
+            for filter_, indicatorFun in zip(filters, indicatorFuns):
+                expected = indicatorFun()
+                if len(barDs) < filter_.getEventWindow().getWindowSize():
+                    self.assertEqual(filter_[-1], None)
+                elif expected is None:
+                    self.assertEqual(filter_[-1], None)
+                elif isinstance(expected, tuple):
+                    if expected[0] is None or numpy.isnan(expected[0][-1]):
+                        self.assertEqual(filter_[-1], None)
+                    else:
+                        self.assertEqual(filter_[-1], tuple(output[-1] for output in expected))
+                elif numpy.isnan(expected[-1]):
+                    self.assertEqual(filter_[-1], None)
+                else:
+                    self.assertEqual(filter_[-1], expected[-1])
+
+    def testValueFilters(self):
+        barDs = bards.BarDataSeries(INSTRUMENT)
+        closeDs = barDs.getCloseDataSeries()
+        filters = [
+            filters_.TALibFilter(closeDs, talib.SMA, 30, {"timeperiod": 20}),
+            filters_.TALibFilter(closeDs, talib.EMA, 50, {"timeperiod": 20}),
+            filters_.TALibFilter(closeDs, talib.BBANDS, 20, {"timeperiod": 20}),
+        ]
+        indicatorFuns = [
+            lambda: indicator.SMA(closeDs, 30, 20),
+            lambda: indicator.EMA(closeDs, 50, 20),
+            lambda: indicator.BBANDS(closeDs, 20, 20),
+        ]
+        self.__assertSameLastValues(filters, indicatorFuns, barDs)
+
+    def testBarFilters(self):
+        barDs = bards.BarDataSeries(INSTRUMENT)
+        filters = [
+            filters_.TALibFilter(barDs, talib.ATR, 30, {"timeperiod": 14}, inputs=["high", "low", "close"]),
+            filters_.TALibFilter(barDs, talib.AD, 10, inputs=["high", "low", "close", "volume"]),
+            filters_.TALibFilter(barDs, talib.CDL3INSIDE, 15, inputs=["open", "high", "low", "close"]),
+        ]
+        indicatorFuns = [
+            lambda: indicator.ATR(barDs, 30, 14),
+            lambda: indicator.AD(barDs, 10),
+            lambda: indicator.CDL3INSIDE(barDs, 15),
+        ]
+        self.__assertSameLastValues(filters, indicatorFuns, barDs)
+
+    def testShortBarDataSeries(self):
+        # The BarDataSeries doesn't hold count values, so they are held in the window.
+        barDs = bards.BarDataSeries(INSTRUMENT)
+        shortBarDs = bards.BarDataSeries(INSTRUMENT, maxLen=10)
+        atr = filters_.TALibFilter(barDs, talib.ATR, 30, {"timeperiod": 14}, inputs=["high", "low", "close"])
+        shortAtr = filters_.TALibFilter(shortBarDs, talib.ATR, 30, {"timeperiod": 14}, inputs=["high", "low", "close"])
+        for bar_ in self.__buildBars():
+            barDs.append(bar_)
+            shortBarDs.append(bar_)
+            self.assertEqual(shortAtr[-1], atr[-1])
+        self.assertNotEqual(atr[-1], None)
+
+    def testPrecompute(self):
+        bars = self.__buildBars()
+        for maxLen in (None, 10):
+            barDs = bards.BarDataSeries(INSTRUMENT, maxLen=maxLen)
+            atr = filters_.TALibFilter(barDs, talib.ATR, 30, {"timeperiod": 14}, inputs=["high", "low", "close"])
+            precomputedBarDs = bards.BarDataSeries(INSTRUMENT, maxLen=maxLen)
+            precomputedAtr = filters_.TALibFilter(
+                precomputedBarDs, talib.ATR, 30, {"timeperiod": 14}, inputs=["high", "low", "close"]
+            )
+            precomputedAtr.precompute(bars)
+            for bar_ in bars:
+                barDs.append(bar_)
+                precomputedBarDs.append(bar_)
+            self.assertEqual(precomputedAtr[:], atr[:])
+            self.assertNotEqual(atr[-1], None)
+
+    def testInvalidInput(self):
+        barDs = bards.BarDataSeries(INSTRUMENT)
+        with self.assertRaises(AssertionError):
+            filters_.TALibFilter(barDs, talib.ATR, 30, inputs=["high", "low", "last"])
+
+    def testLookback(self):
+        self.assertEqual(filters_.get_lookback(talib.SMA, timeperiod=20), 19)
+        self.assertEqual(filters_.get_lookback(talib.ATR, timeperiod=14), 14)
+
+        # lookback + 1 values are enough for the first value.
+        closeDs = dataseries.SequenceDataSeries()
+        count = filters_.get_lookback(talib.SMA, timeperiod=3) + 1
+        sma = filters_.TALibFilter(closeDs, talib.SMA, count, {"timeperiod": 3})
+        for value in [1, 2, 3, 4]:
+            closeDs.append(value)
+        self.assertEqual(sma[:], [None, None, 2, 3])
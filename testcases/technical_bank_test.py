@@ -0,0 +1,119 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import numpy as np
+
+from . import common
+from . import technical_test
+
+from pyalgotrade import dataseries
+from pyalgotrade.technical import bank
+from pyalgotrade.technical import linreg
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import rsi
+
+
+class IndicatorBankTestCase(common.TestCase):
+    def __assertIdentical(self, values1, values2):
+        self.assertEqual(len(values1), len(values2))
+        for value1, value2 in zip(values1, values2):
+            if value1 is None or value2 is None:
+                self.assertEqual(value1, value2)
+            else:
+                self.assertEqual(float(value1).hex(), float(value2).hex())
+
+    def __filter(self, indicatorClass, values, *args):
+        ds = dataseries.SequenceDataSeries()
+        ret = indicatorClass(ds, *args)
+        for value in values:
+            ds.append(value)
+        return ret
+
+    def testFamily(self):
+        values = technical_test.build_values(500)
+        for values_ in (values, np.array(values)):
+            indicatorBank = bank.IndicatorBank(values_)
+            periods = range(2, 60, 3)
+            indicatorBank.addFamily(ma.SMA, periods)
+            indicatorBank.addFamily(ma.EMA, periods)
+            self.assertEqual(len(indicatorBank), 2 * len(periods))
+            for period in periods:
+                expected = self.__filter(ma.SMA, values, period)
+                self.__assertIdentical(indicatorBank.getOutputs(ma.SMA, period), expected[:])
+                expected = self.__filter(ma.EMA, values, period)
+                self.__assertIdentical(indicatorBank.getOutputs(ma.EMA, period), expected[:])
+
+    def testEMAFamily(self):
+        values = technical_test.build_values(300)
+        values[150] = float("nan")
+        indicatorBank = bank.IndicatorBank(values)
+        periods = [2, 3, 3, 50, 299, 300, 301, 500]
+        indicatorBank.addFamily(ma.EMA, periods)
+        for period in periods:
+            expected = self.__filter(ma.EMA, values, period)
+            self.__assertIdentical(indicatorBank.getOutputs(ma.EMA, period), expected[:])
+
+    def testCached(self):
+        indicatorBank = bank.IndicatorBank(technical_test.build_values(100))
+        outputs = indicatorBank.getOutputs(ma.SMA, 10)
+        self.assertIs(indicatorBank.getOutputs(ma.SMA, 10), outputs)
+        self.assertIsNot(indicatorBank.getOutputs(ma.SMA, 11), outputs)
+        self.assertIsNot(indicatorBank.getOutputs(ma.EMA, 10), outputs)
+        self.assertIsNot(indicatorBank.getOutputs(ma.WMA, [1, 2]), outputs)
+        self.assertIs(indicatorBank.getOutputs(ma.WMA, [1, 2]), indicatorBank.getOutputs(ma.WMA, (1, 2)))
+        self.assertEqual(len(indicatorBank), 4)
+
+    def testBuild(self):
+        values = technical_test.build_values(300)
+        indicatorBank = bank.IndicatorBank(values)
+        # Many runs over the same values.
+        for fast, slow in [(5, 20), (10, 20), (5, 30)]:
+            ds = dataseries.SequenceDataSeries()
+            fastSMA = indicatorBank.build(ma.SMA, ds, fast)
+            slowSMA = indicatorBank.build(ma.SMA, ds, slow)
+            rsi_ = indicatorBank.build(rsi.RSI, ds, 14)
+            for value in values:
+                ds.append(value)
+            self.__assertIdentical(fastSMA[:], self.__filter(ma.SMA, values, fast)[:])
+            self.__assertIdentical(slowSMA[:], self.__filter(ma.SMA, values, slow)[:])
+            self.__assertIdentical(rsi_[:], self.__filter(rsi.RSI, values, 14)[:])
+        self.assertEqual(len(indicatorBank), 5)
+
+    def testBuildValuesDiverge(self):
+        values = technical_test.build_values(300)
+        otherValues = values[:100] + technical_test.build_values(200, seed=2)
+        indicatorBank = bank.IndicatorBank(values)
+        ds = dataseries.SequenceDataSeries()
+        sma = indicatorBank.build(ma.SMA, ds, 10)
+        for value in otherValues:
+            ds.append(value)
+        self.__assertIdentical(sma[:], self.__filter(ma.SMA, otherValues, 10)[:])
+
+    def testDateTimes(self):
+        values = technical_test.build_values(100)
+        dateTimes = technical_test.build_datetimes(len(values))
+        indicatorBank = bank.IndicatorBank(values, dateTimes)
+        ds = dataseries.SequenceDataSeries()
+        slope = indicatorBank.build(linreg.Slope, ds, 10)
+        expected = linreg.Slope(dataseries.SequenceDataSeries(), 10)
+        for dateTime, value in zip(dateTimes, values):
+            ds.appendWithDateTime(dateTime, value)
+            expected.getDataSeries().appendWithDateTime(dateTime, value)
+        self.__assertIdentical(slope[:], expected[:])
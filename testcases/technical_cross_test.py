@@ -18,6 +18,8 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import datetime
+
 from . import common
 
 from pyalgotrade.technical import cross
@@ -191,3 +193,49 @@ class TestCase(common.TestCase):
         self.assertEqual(cross.cross_above([0, 0, 0, 1, 2], [1, 1, 1], -3), 1)
         self.assertEqual(cross.cross_above([0, 0, 0, 1, 2], [1, 1], -3), 0)
         self.assertEqual(cross.cross_above([0, 0, 0, 0, 2], [1, 1], -3), 1)
+
+
+class CrossTestCase(common.TestCase):
+    def testMatchesFunctions(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        sma1 = ma.SMA(ds1, 5)
+        sma2 = ma.SMA(ds2, 10)
+        crossSMA = cross.Cross(sma1, sma2)
+        crossValues = cross.Cross(ds1, sma2)
+        values = [100 + (i % 17) - (i % 5) * 2 for i in range(300)]
+        for i, value in enumerate(values):
+            dateTime = datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i)
+            ds1.appendWithDateTime(dateTime, value)
+            ds2.appendWithDateTime(dateTime, 100)
+            self.assertEqual(crossSMA[-1], cross.cross_above(sma1, sma2) - cross.cross_below(sma1, sma2))
+            self.assertEqual(crossValues[-1], cross.cross_above(ds1, sma2) - cross.cross_below(ds1, sma2))
+        self.assertEqual(len(crossSMA), len(values))
+        self.assertIn(1, crossSMA[:])
+        self.assertIn(-1, crossSMA[:])
+
+    def testTouch(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        crossDS = cross.Cross(ds1, ds2)
+        for value1, value2 in [(1, 2), (2, 2), (3, 2), (1, 2), (None, 2), (3, 2)]:
+            ds1.append(value1)
+            ds2.append(value2)
+        # Like cross_above and cross_below with the last 2 values.
+        self.assertEqual(crossDS[:], [0, 0, 0, -1, 0, 0])
+
+    def testAlignedByDateTime(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        crossDS = cross.Cross(ds1, ds2)
+        dateTime = datetime.datetime(2000, 1, 1)
+        day = datetime.timedelta(days=1)
+        ds1.appendWithDateTime(dateTime, 1)
+        ds1.appendWithDateTime(dateTime + day, 1)
+        ds2.appendWithDateTime(dateTime, 2)
+        # There is no value for dateTime + day in ds2.
+        ds2.appendWithDateTime(dateTime + day * 2, 0)
+        self.assertEqual(len(crossDS), 1)
+        ds1.appendWithDateTime(dateTime + day * 2, 3)
+        self.assertEqual(crossDS[:], [0, 1])
+        self.assertEqual(crossDS.getDateTimes(), [dateTime, dateTime + day * 2])
@@ -0,0 +1,152 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+
+import numpy as np
+
+from . import common
+
+from pyalgotrade import bar
+from pyalgotrade.barfeed import columnar
+from pyalgotrade.technical import crosssection
+from pyalgotrade.technical import ma
+
+
+INSTRUMENTS = ["A/USD", "B/USD", "C/USD", "D/USD"]
+
+
+def build_bars(instrument, prices, skip=()):
+    ret = []
+    for i, price in enumerate(prices):
+        if i not in skip:
+            ret.append(bar.BasicBar(
+                instrument, datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i), price, price, price, price,
+                100, None, bar.Frequency.DAY
+            ))
+    return ret
+
+
+def build_prices(count, seed):
+    return (100 + np.random.RandomState(seed).normal(0, 1, count).cumsum()).tolist()
+
+
+class OperationsTestCase(common.TestCase):
+    def testRank(self):
+        np.testing.assert_equal(crosssection.rank([3, 1, np.nan, 2, 2]), [4, 1, np.nan, 2.5, 2.5])
+        np.testing.assert_equal(crosssection.rank([np.nan, np.nan]), [np.nan, np.nan])
+        np.testing.assert_equal(crosssection.percentile([3, 1, np.nan, 2]), [1, 1 / 3.0, np.nan, 2 / 3.0])
+
+    def testDemeanAndZScore(self):
+        values = np.array([1, 2, np.nan, 6])
+        np.testing.assert_equal(crosssection.demean(values), [-2, -1, np.nan, 3])
+        expected = (values - 3) / np.array([1, 2, 6]).std()
+        np.testing.assert_allclose(crosssection.zscore(values), expected)
+        expected = (values - 3) / np.array([1, 2, 6]).std(ddof=1)
+        np.testing.assert_allclose(crosssection.zscore(values, ddof=1), expected)
+        np.testing.assert_equal(crosssection.zscore([1, np.nan], ddof=1), [np.nan, np.nan])
+
+    def testTopK(self):
+        values = [3, 1, np.nan, 5, 3]
+        self.assertEqual(crosssection.top_k(values, 2).tolist(), [3, 0])
+        self.assertEqual(crosssection.top_k(values, 3).tolist(), [3, 0, 4])
+        self.assertEqual(crosssection.top_k(values, 10).tolist(), [3, 0, 4, 1])
+        self.assertEqual(crosssection.top_k(values, 0).tolist(), [])
+
+
+class CrossSectionTestCase(common.TestCase):
+    def __buildFeed(self, prices, skip={}):
+        feed = columnar.BarFeed(bar.Frequency.DAY)
+        for instrument, instrumentPrices in zip(INSTRUMENTS, prices):
+            feed.addBarsFromSequence(instrument, build_bars(instrument, instrumentPrices, skip.get(instrument, ())))
+        return feed
+
+    def testMatchesDataSeries(self):
+        prices = [build_prices(100, seed) for seed in range(len(INSTRUMENTS))]
+        feed = self.__buildFeed(prices)
+        cs = crosssection.CrossSection(feed, INSTRUMENTS, 30)
+        smas = [ma.SMA(feed[instrument].getPriceDataSeries(), 30) for instrument in INSTRUMENTS]
+        for dateTime, bars in feed:
+            self.assertEqual(cs.getDateTime(), dateTime)
+            priceDSs = [feed[instrument].getPriceDataSeries() for instrument in INSTRUMENTS]
+            self.assertEqual(cs.getLastValues().tolist(), [priceDS[-1] for priceDS in priceDSs])
+            self.assertEqual(cs.getValues().tolist(), [priceDS[-30:] for priceDS in priceDSs])
+            if len(priceDSs[0]) > 20:
+                expected = [priceDS[-1] / priceDS[-21] - 1 for priceDS in priceDSs]
+                self.assertEqual(cs.getReturns(20).tolist(), expected)
+            else:
+                self.assertTrue(np.isnan(cs.getReturns(20)).all())
+            if smas[0][-1] is not None:
+                np.testing.assert_allclose(cs.getMeans(30), [sma[-1] for sma in smas], rtol=1e-12)
+            else:
+                self.assertTrue(np.isnan(cs.getMeans(30)).all())
+            np.testing.assert_allclose(cs.getMeans(), [np.mean(priceDS[-30:]) for priceDS in priceDSs], rtol=1e-12)
+        self.assertTrue(cs.windowFull())
+        self.assertEqual(len(cs), 30)
+
+    def testMissingBars(self):
+        prices = [[1, 2, 3], [10, 20, 30], [100, 200, 300], [5, 6, 7]]
+        feed = self.__buildFeed(prices, {"B/USD": [1], "C/USD": [0, 2]})
+        cs = crosssection.CrossSection(feed, INSTRUMENTS, 5)
+        feed.loadAll()
+        np.testing.assert_equal(cs.getValues(), [
+            [1, 2, 3],
+            [10, np.nan, 30],
+            [np.nan, 200, np.nan],
+            [5, 6, 7],
+        ])
+        self.assertEqual(cs.getTop(cs.getLastValues(), 2), ["B/USD", "D/USD"])
+        self.assertEqual(cs.getTop(cs.getReturns(2), 4), ["A/USD", "B/USD", "D/USD"])
+
+    def testValuesUpdatedBeforeNewValuesEvent(self):
+        prices = [build_prices(10, seed) for seed in range(len(INSTRUMENTS))]
+        feed = self.__buildFeed(prices)
+        lastValues = []
+        # Subscribe before the cross section, like strategies do.
+        feed.getNewValuesEvent().subscribe(lambda dateTime, bars: lastValues.append(cs.getLastValues().tolist()))
+        cs = crosssection.CrossSection(feed, INSTRUMENTS, 5)
+        feed.start()
+        while not feed.eof():
+            feed.dispatch()
+        self.assertEqual(lastValues, [[instrumentPrices[i] for instrumentPrices in prices] for i in range(10)])
+
+    def testGetter(self):
+        prices = [build_prices(10, seed) for seed in range(len(INSTRUMENTS))]
+        feed = self.__buildFeed(prices)
+        cs = crosssection.CrossSection(feed, INSTRUMENTS, 5, getter=lambda bar_: bar_.getVolume())
+        feed.loadAll()
+        self.assertEqual(cs.getLastValues().tolist(), [100] * len(INSTRUMENTS))
+
+    def testAccessWhileAddingBars(self):
+        prices = [[1, 2, 3], [10, 20, 30], [100, 200, 300], [5, 6, 7]]
+        feed = self.__buildFeed(prices)
+        cs = crosssection.CrossSection(feed, INSTRUMENTS, 2)
+        # Values are read after the bar for the first instrument was added, and before the rest.
+        partialValues = []
+        feed["A/USD"].getNewValueEvent().subscribe(
+            lambda ds, dateTime, bar_: partialValues.append(cs.getLastValues().tolist())
+        )
+        feed.loadAll()
+        np.testing.assert_equal(partialValues, [
+            [1, np.nan, np.nan, np.nan],
+            [2, np.nan, np.nan, np.nan],
+            [3, np.nan, np.nan, np.nan],
+        ])
+        self.assertEqual(cs.getValues().tolist(), [[2, 3], [20, 30], [200, 300], [6, 7]])
@@ -18,6 +18,8 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import numpy as np
+
 from . import common
 
 from pyalgotrade import dataseries
@@ -33,3 +35,29 @@ class HighLowTestCase(common.TestCase):
             values.append(value)
         self.assertEqual(high[-1], 5)
         self.assertEqual(low[-1], 3)
+
+    def testMatchesNumPy(self):
+        rng = np.random.RandomState(42)
+        inputs = rng.randint(0, 20, size=500).astype(float)
+        inputs[100] = np.nan
+        for period in [1, 2, 5, 20, 252]:
+            values = dataseries.SequenceDataSeries()
+            high = highlow.High(values, period)
+            low = highlow.Low(values, period)
+            for value in inputs:
+                values.append(value)
+            for i in range(len(inputs)):
+                if i < period - 1:
+                    self.assertEqual(high[i], None)
+                    self.assertEqual(low[i], None)
+                else:
+                    window = inputs[i - period + 1:i + 1]
+                    np.testing.assert_equal(high[i], window.max())
+                    np.testing.assert_equal(low[i], window.min())
+
+    def testSkipNone(self):
+        values = dataseries.SequenceDataSeries()
+        high = highlow.High(values, 2)
+        for value in [1, None, 3, None, 2]:
+            values.append(value)
+        self.assertEqual(high[:], [None, None, 3, 3, 3])
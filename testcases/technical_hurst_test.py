@@ -70,3 +70,28 @@ class TestCase(common.TestCase):
         hds = build_hurst(values, num_values - 10, 2, 20)
         self.assertEqual(round(hds[-1], 1), 0)
         self.assertEqual(round(hds[-2], 1), 0)
+
+    def testMatchesHurstExp(self):
+        values = np.cumsum(np.random.RandomState(7).randn(1000) + 0.1) + 1000
+        for period, minLags, maxLags in [(100, 2, 20), (300, 5, 50), (50, 2, 20)]:
+            hds = build_hurst(values, period, minLags, maxLags)
+            logValues = np.log10(values)
+            for i in range(len(values)):
+                if i < period - 1:
+                    self.assertEqual(hds[i], None)
+                else:
+                    expected = hurst.hurst_exp(logValues[i - period + 1:i + 1], minLags, maxLags)
+                    self.assertTrue(np.isclose(hds[i], expected, rtol=1e-9, atol=1e-9))
+
+    def testEvalInterval(self):
+        values = np.cumsum(np.random.RandomState(8).randn(300)) + 1000
+        expected = build_hurst(values, 100, 2, 20)
+        ds = dataseries.SequenceDataSeries()
+        hds = hurst.HurstExponent(ds, 100, 2, 20, evalInterval=10)
+        for value in values:
+            ds.append(value)
+        for i in range(len(values)):
+            if i < 99:
+                self.assertEqual(hds[i], None)
+            else:
+                self.assertEqual(hds[i], expected[99 + (i - 99) // 10 * 10])
@@ -20,10 +20,14 @@
 
 import datetime
 
+import numpy as np
+from scipy import stats
+
 from . import common
 
 from pyalgotrade.technical import linreg
 from pyalgotrade import dataseries
+from pyalgotrade.utils import dt
 
 
 class LeastSquaresRegressionTestCase(common.TestCase):
@@ -79,3 +83,114 @@ class LeastSquaresRegressionTestCase(common.TestCase):
         nextDateTime = nextDateTime + datetime.timedelta(milliseconds=50)
         seqDS.appendWithDateTime(nextDateTime, 5)
         self.assertEqual(round(lsReg[-1], 2), 5)
+
+    def testMatchesLinregress(self):
+        # A random walk far from 0, with timestamps and some gaps between values.
+        rng = np.random.RandomState(5)
+        values = (10000 + rng.normal(0, 1, 1500).cumsum()).tolist()
+        dateTimes = [datetime.datetime(2012, 1, 1)]
+        for gap in rng.randint(1, 5, len(values) - 1):
+            dateTimes.append(dateTimes[-1] + datetime.timedelta(hours=int(gap)))
+
+        for windowSize in [2, 20, 200]:
+            seqDS = dataseries.SequenceDataSeries()
+            lsReg = linreg.LeastSquaresRegression(seqDS, windowSize)
+            slope = linreg.Slope(seqDS, windowSize)
+            window = lsReg.getEventWindow()
+            for i in range(len(values)):
+                seqDS.appendWithDateTime(dateTimes[i], values[i])
+                if i < windowSize - 1:
+                    self.assertEqual(lsReg[-1], None)
+                    self.assertEqual(slope[-1], None)
+                    continue
+
+                timestamps = [dt.datetime_to_timestamp(dateTime) for dateTime in dateTimes[i - windowSize + 1:i + 1]]
+                windowValues = values[i - windowSize + 1:i + 1]
+                expected = stats.linregress(timestamps, windowValues)
+                self.assertTrue(np.isclose(lsReg[-1], expected.slope * timestamps[-1] + expected.intercept, rtol=1e-9))
+                regression = window.getRegression()
+                self.assertTrue(np.isclose(regression.getSlope(), expected.slope, rtol=1e-7, atol=1e-15))
+                self.assertTrue(np.isclose(regression.getRSquared(), expected.rvalue**2, rtol=1e-7, atol=1e-9))
+                expectedSlope = stats.linregress(np.arange(windowSize), windowValues).slope
+                self.assertTrue(np.isclose(slope[-1], expectedSlope, rtol=1e-7, atol=1e-9))
+
+            futureDateTime = dateTimes[-1] + datetime.timedelta(days=1)
+            timestamps = [dt.datetime_to_timestamp(dateTime) for dateTime in dateTimes[-windowSize:]]
+            expected = stats.linregress(timestamps, values[-windowSize:])
+            self.assertTrue(np.isclose(
+                lsReg.getValueAt(futureDateTime),
+                expected.slope * dt.datetime_to_timestamp(futureDateTime) + expected.intercept,
+                rtol=1e-9
+            ))
+
+
+class PairRegressionTestCase(common.TestCase):
+    def __buildPair(self, count):
+        rs = np.random.RandomState(5)
+        values2 = 50 + rs.normal(0, 1, count).cumsum()
+        values1 = 10 + 1.5 * values2 + rs.normal(0, 0.5, count)
+        return values1, values2
+
+    def testMatchesNumPy(self):
+        values1, values2 = self.__buildPair(1000)
+        windowSize = 50
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        pair = linreg.PairRegression(ds1, ds2, windowSize, maxLen=len(values1))
+        for i in range(len(values1)):
+            dateTime = datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i)
+            ds1.appendWithDateTime(dateTime, values1[i])
+            ds2.appendWithDateTime(dateTime, values2[i])
+
+        for outputs in [pair.getBeta(), pair.getAlpha(), pair.getSpread(), pair.getZScore()]:
+            self.assertEqual(len(outputs), len(values1))
+            self.assertEqual(outputs[:windowSize - 1], [None] * (windowSize - 1))
+
+        for i in range(windowSize - 1, len(values1)):
+            window1 = values1[i - windowSize + 1:i + 1]
+            window2 = values2[i - windowSize + 1:i + 1]
+            res = stats.linregress(window2, window1)
+            # The same calculation as in samples/statarb_erniechan.py, with an intercept.
+            spread = window1 - res.slope * window2
+            zScore = (spread[-1] - spread.mean()) / spread.std(ddof=1)
+            self.assertAlmostEqual(pair.getBeta()[i], res.slope, places=9)
+            self.assertAlmostEqual(pair.getAlpha()[i], res.intercept, places=7)
+            self.assertAlmostEqual(pair.getSpread()[i], spread[-1], places=7)
+            self.assertAlmostEqual(pair.getZScore()[i], zScore, places=7)
+
+    def testAlignedAndNone(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        pair = linreg.PairRegression(ds1, ds2, 3)
+        dateTime = datetime.datetime(2000, 1, 1)
+        day = datetime.timedelta(days=1)
+        for i, (value1, value2) in enumerate([(3, 1), (5, 2), (None, 3), (7, 3), (10, 4)]):
+            ds1.appendWithDateTime(dateTime + day * i, value1)
+            ds2.appendWithDateTime(dateTime + day * i, value2)
+        # Only in one of the DataSeries.
+        ds1.appendWithDateTime(dateTime + day * 10, 1)
+
+        self.assertEqual(pair.getBeta()[:3], [None, None, None])
+        self.assertEqual(pair.getBeta().getDateTimes(), [dateTime + day * i for i in range(5)])
+        self.assertAlmostEqual(pair.getBeta()[3], 2)
+        self.assertAlmostEqual(pair.getAlpha()[3], 1)
+        self.assertAlmostEqual(pair.getSpread()[3], 1)
+        # The values are on the regression line.
+        self.assertTrue(np.isnan(pair.getZScore()[3]))
+        res = stats.linregress([2, 3, 4], [5, 7, 10])
+        self.assertAlmostEqual(pair.getBeta()[4], res.slope)
+        self.assertAlmostEqual(pair.getAlpha()[4], res.intercept)
+
+    def testNaN(self):
+        values1, values2 = self.__buildPair(20)
+        values2[5] = np.nan
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        pair = linreg.PairRegression(ds1, ds2, 5)
+        for value1, value2 in zip(values1, values2):
+            ds1.append(value1)
+            ds2.append(value2)
+        for i in range(5, 10):
+            self.assertTrue(np.isnan(pair.getBeta()[i]))
+        res = stats.linregress(values2[10:15], values1[10:15])
+        self.assertAlmostEqual(pair.getBeta()[14], res.slope)
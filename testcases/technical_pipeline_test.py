@@ -0,0 +1,103 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+
+import numpy as np
+
+from . import common
+
+from pyalgotrade import dataseries
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import pipeline
+from pyalgotrade.technical import rsi
+from pyalgotrade.technical import stats
+
+
+def build_values(count, seed=1):
+    return (100 + np.random.RandomState(seed).normal(0, 1, count).cumsum()).tolist()
+
+
+def build_pipeline(ds, keep=[]):
+    # EMA(10) over StdDev(5) over RSI(14).
+    return pipeline.Pipeline(
+        ds, [rsi.RSIEventWindow(14), stats.StdDevEventWindow(5, 0), ma.EMAEventWindow(10)], keep=keep
+    )
+
+
+class PipelineTestCase(common.TestCase):
+    def __buildChained(self, ds):
+        rsi_ = rsi.RSI(ds, 14)
+        stdDev = stats.StdDev(rsi_, 5)
+        return rsi_, stdDev, ma.EMA(stdDev, 10)
+
+    def testMatchesChainedFilters(self):
+        values = build_values(500)
+        dateTimes = [datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i) for i in range(len(values))]
+        ds = dataseries.SequenceDataSeries()
+        rsi_, stdDev, ema = self.__buildChained(ds)
+        pipe = build_pipeline(ds, keep=[0, 1])
+        for dateTime, value in zip(dateTimes, values):
+            ds.appendWithDateTime(dateTime, value)
+
+        self.assertEqual(pipe[:], ema[:])
+        self.assertEqual(pipe.getDateTimes(), ema.getDateTimes())
+        self.assertEqual(pipe.getIntermediate(0)[:], rsi_[:])
+        self.assertEqual(pipe.getIntermediate(1)[:], stdDev[:])
+        self.assertEqual(pipe.getIntermediate(1).getDateTimes(), dateTimes)
+
+    def testIntermediatesNotKept(self):
+        ds = dataseries.SequenceDataSeries()
+        pipe = build_pipeline(ds, keep=[1])
+        with self.assertRaises(AssertionError):
+            pipe.getIntermediate(0)
+        with self.assertRaises(AssertionError):
+            build_pipeline(ds, keep=[2])
+
+    def testPrecompute(self):
+        values = build_values(300)
+        ds = dataseries.SequenceDataSeries()
+        expected = build_pipeline(ds, keep=[0])
+        for value in values:
+            ds.append(value)
+
+        for precompute in (values, np.array(values)):
+            ds = dataseries.SequenceDataSeries()
+            pipe = build_pipeline(ds, keep=[0])
+            pipe.precompute(precompute)
+            for value in values:
+                ds.append(value)
+            self.assertEqual(pipe[:], expected[:])
+            self.assertEqual(pipe.getIntermediate(0)[:], expected.getIntermediate(0)[:])
+
+    def testPrecomputeMismatch(self):
+        values = build_values(300)
+        ds = dataseries.SequenceDataSeries()
+        expected = build_pipeline(ds)
+        for value in values:
+            ds.append(value)
+
+        # Values stop matching halfway, so the windows catch up and values are processed one by one.
+        ds = dataseries.SequenceDataSeries()
+        pipe = build_pipeline(ds)
+        pipe.precompute(values[:150] + build_values(150, seed=2))
+        for value in values:
+            ds.append(value)
+        self.assertEqual(pipe[:], expected[:])
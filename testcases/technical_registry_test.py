@@ -0,0 +1,88 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+from . import common
+
+from pyalgotrade import dataseries
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import registry
+from pyalgotrade.technical import rsi
+
+
+class IndicatorRegistryTestCase(common.TestCase):
+    def testShared(self):
+        reg = registry.IndicatorRegistry()
+        ds = dataseries.SequenceDataSeries()
+        sma1 = reg.acquire(ma.SMA, ds, 3)
+        sma2 = reg.acquire(ma.SMA, ds, 3)
+        self.assertIs(sma1, sma2)
+        self.assertEqual(reg.getRefCount(sma1), 2)
+        self.assertEqual(len(reg), 1)
+
+        # Different class, parameters or DataSeries.
+        self.assertIsNot(reg.acquire(ma.EMA, ds, 3), sma1)
+        self.assertIsNot(reg.acquire(ma.SMA, ds, 4), sma1)
+        self.assertIsNot(reg.acquire(ma.SMA, ds, 3, maxLen=10), sma1)
+        self.assertIsNot(reg.acquire(ma.SMA, dataseries.SequenceDataSeries(), 3), sma1)
+        self.assertEqual(len(reg), 5)
+
+        expected = ma.SMA(ds, 3)
+        for value in [1, 2, 3, 4]:
+            ds.append(value)
+        self.assertEqual(sma1[:], expected[:])
+
+    def testUnhashableParameters(self):
+        reg = registry.IndicatorRegistry()
+        ds = dataseries.SequenceDataSeries()
+        wma1 = reg.acquire(ma.WMA, ds, [1, 2, 3])
+        wma2 = reg.acquire(ma.WMA, ds, [1, 2, 3])
+        self.assertIs(wma1, wma2)
+        self.assertIsNot(reg.acquire(ma.WMA, ds, [3, 2, 1]), wma1)
+
+    def testRelease(self):
+        reg = registry.IndicatorRegistry()
+        ds = dataseries.SequenceDataSeries()
+        rsi1 = reg.acquire(rsi.RSI, ds, 2)
+        reg.acquire(rsi.RSI, ds, 2)
+        ds.append(1)
+
+        reg.release(rsi1)
+        self.assertEqual(reg.getRefCount(rsi1), 1)
+        ds.append(2)
+        self.assertEqual(len(rsi1), 2)
+
+        # Once it is no longer used, it stops filtering values and a new one is built.
+        reg.release(rsi1)
+        self.assertEqual(reg.getRefCount(rsi1), 0)
+        self.assertEqual(len(reg), 0)
+        ds.append(3)
+        self.assertEqual(len(rsi1), 2)
+        self.assertIsNot(reg.acquire(rsi.RSI, ds, 2), rsi1)
+
+        with self.assertRaisesRegexp(Exception, "The indicator was not acquired from this registry"):
+            reg.release(rsi1)
+
+    def testInvalidClass(self):
+        reg = registry.IndicatorRegistry()
+        with self.assertRaises(AssertionError):
+            reg.acquire(dataseries.SequenceDataSeries, dataseries.SequenceDataSeries())
+
+    def testSharedRegistry(self):
+        self.assertIs(registry.get_registry(), registry.get_registry())
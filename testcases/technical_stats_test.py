@@ -77,3 +77,44 @@ class TestCase(common.TestCase):
             if i >= 4:
                 self.assertEqual(round(zscore[-1], 4), round(expected[i], 4))
             i += 1
+
+    def testMatchesNumPy(self):
+        # A random walk far from 0, so the rolling updates would drift without recalculating the sums. Values are
+        # rounded to about 1e-12, and so is numpy.std.
+        values = 10000 + numpy.random.RandomState(3).normal(0, 1, 6000).cumsum()
+        for period in [1, 2, 20, 200, 2000]:
+            for ddof in [0, 1]:
+                seqDS = dataseries.SequenceDataSeries(len(values))
+                stdDev = stats.StdDev(seqDS, period, ddof=ddof, maxLen=len(values))
+                zscore = stats.ZScore(seqDS, max(period, 2), ddof=ddof, maxLen=len(values))
+                for value in values:
+                    seqDS.append(value)
+
+                windows = numpy.lib.stride_tricks.as_strided(
+                    values, shape=(len(values) - period + 1, period), strides=(values.strides[0], values.strides[0])
+                )
+                self.assertEqual(stdDev[:period - 1], [None] * (period - 1))
+                numpy.testing.assert_allclose(
+                    numpy.array(stdDev[period - 1:], dtype=float), windows.std(axis=1, ddof=ddof), rtol=1e-9, atol=1e-11
+                )
+                # The first value is calculated from the values in the window, like numpy does.
+                numpy.testing.assert_equal(stdDev[period - 1], windows[0].std(ddof=ddof))
+
+                if period > 1:
+                    # Errors in the mean get divided by the standard deviation, so compare the distance to the mean.
+                    stdDevs = windows.std(axis=1, ddof=ddof)
+                    expected = (windows[:, -1] - windows.mean(axis=1)) / stdDevs
+                    actual = numpy.array(zscore[period - 1:], dtype=float)
+                    numpy.testing.assert_allclose(actual * stdDevs, expected * stdDevs, rtol=1e-9, atol=1e-11)
+
+    def testStdDevNaN(self):
+        values = [1, 2, float("nan"), 4, 5, 6, 7]
+        seqDS = dataseries.SequenceDataSeries()
+        stdDev = stats.StdDev(seqDS, 3)
+        for value in values:
+            seqDS.append(value)
+        self.assertEqual(stdDev[:2], [None, None])
+        for i in range(2, 5):
+            self.assertTrue(numpy.isnan(stdDev[i]))
+        self.assertEqual(stdDev[5], numpy.array([4, 5, 6]).std())
+        self.assertEqual(stdDev[6], numpy.array([5, 6, 7]).std())
@@ -19,6 +19,7 @@
 """
 
 import datetime
+import random
 
 from six.moves import xrange
 
@@ -168,3 +169,26 @@ class TestCase(common.TestCase):
         stochFilter = stoch.StochasticOscillator(barDS, 2, 2)
         self.__fillBarDataSeries(barDS, closePrices, highPrices, lowPrices)
         self.assertEqual(stochFilter[-1], 0)
+
+    def testMatchesFullWindowScan(self):
+        rng = random.Random(1234)
+        closePrices = []
+        highPrices = []
+        lowPrices = []
+        for i in range(300):
+            closePrice = round(rng.uniform(90, 110), 2)
+            closePrices.append(closePrice)
+            highPrices.append(closePrice + round(rng.uniform(0, 5), 2))
+            lowPrices.append(closePrice - round(rng.uniform(0, 5), 2))
+
+        for period in [2, 14, 100]:
+            barDS = bards.BarDataSeries(INSTRUMENT)
+            stochFilter = stoch.StochasticOscillator(barDS, period)
+            self.__fillBarDataSeries(barDS, closePrices, highPrices, lowPrices)
+            for i in range(len(closePrices)):
+                if i < period - 1:
+                    self.assertEqual(stochFilter[i], None)
+                else:
+                    lowestLow, highestHigh = stoch.get_low_high_values(False, barDS[i - period + 1:i + 1])
+                    expected = (closePrices[i] - lowestLow) / float(highestHigh - lowestLow) * 100
+                    self.assertEqual(stochFilter[i], expected)
@@ -18,10 +18,22 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import datetime
+
+import numpy as np
+
 from . import common
 
 from pyalgotrade import technical
 from pyalgotrade import dataseries
+from pyalgotrade.technical import bollinger
+from pyalgotrade.technical import highlow
+from pyalgotrade.technical import linreg
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import macd
+from pyalgotrade.technical import roc
+from pyalgotrade.technical import rsi
+from pyalgotrade.technical import stats
 
 
 class TestEventWindow(technical.EventWindow):
@@ -68,3 +80,151 @@ class DataSeriesFilterTest(common.TestCase):
         for i in range(0, len(testFilter)):
             self.assertEqual(testFilter[i], ds[i])
             self.assertEqual(testFilter.getDataSeries()[i], ds[i])
+
+
+def build_values(count, seed=1):
+    # A random walk around 100.
+    return (100 + np.random.RandomState(seed).normal(0, 1, count).cumsum()).tolist()
+
+
+def build_datetimes(count):
+    return [datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i) for i in range(count)]
+
+
+class PrecomputeTestCase(common.TestCase):
+    def __assertIdentical(self, values1, values2):
+        self.assertEqual(len(values1), len(values2))
+        for value1, value2 in zip(values1, values2):
+            if value1 is None or value2 is None:
+                self.assertEqual(value1, value2)
+            else:
+                # Compare bits, so -0.0 and 0.0 are different and nan is equal to itself.
+                self.assertEqual(float(value1).hex(), float(value2).hex())
+
+    def __filter(self, filterBuilder, values, dateTimes=None, precompute=None, precomputeDateTimes=None):
+        ds = dataseries.SequenceDataSeries()
+        ret = filterBuilder(ds)
+        if precompute is not None:
+            ret.precompute(precompute, precomputeDateTimes)
+        if dateTimes is None:
+            dateTimes = [None] * len(values)
+        for dateTime, value in zip(dateTimes, values):
+            ds.appendWithDateTime(dateTime, value)
+        return ret
+
+    def __testIdentical(self, filterBuilder, values, dateTimes=None):
+        expected = self.__filter(filterBuilder, values, dateTimes)
+        for precompute in (values, np.array(values)):
+            precomputed = self.__filter(filterBuilder, values, dateTimes, precompute, dateTimes)
+            self.__assertIdentical(precomputed[:], expected[:])
+
+    def testIdentical(self):
+        values = build_values(2000)
+        for period in (1, 2, 7, 8, 9, 20, 150):
+            self.__testIdentical(lambda ds: ma.SMA(ds, period), values)
+            self.__testIdentical(lambda ds: ma.WMA(ds, range(1, period + 1)), values)
+            self.__testIdentical(lambda ds: stats.StdDev(ds, period), values)
+            self.__testIdentical(lambda ds: stats.StdDev(ds, period, ddof=1), values)
+            self.__testIdentical(lambda ds: highlow.High(ds, period), values)
+            self.__testIdentical(lambda ds: highlow.Low(ds, period), values)
+            self.__testIdentical(lambda ds: roc.RateOfChange(ds, period), values)
+        for period in (2, 7, 14, 150):
+            self.__testIdentical(lambda ds: ma.EMA(ds, period), values)
+            self.__testIdentical(lambda ds: stats.ZScore(ds, period), values)
+            self.__testIdentical(lambda ds: rsi.RSI(ds, period), values)
+
+    def testShortInput(self):
+        values = build_values(5)
+        for count in range(len(values) + 1):
+            self.__testIdentical(lambda ds: ma.SMA(ds, 3), values[:count])
+            self.__testIdentical(lambda ds: ma.EMA(ds, 3), values[:count])
+            self.__testIdentical(lambda ds: stats.StdDev(ds, 3), values[:count])
+            self.__testIdentical(lambda ds: rsi.RSI(ds, 3), values[:count])
+
+    def testConstantValues(self):
+        values = [10.0] * 50 + [-0.0] * 50
+        self.__testIdentical(lambda ds: rsi.RSI(ds, 14), values)
+        self.__testIdentical(lambda ds: stats.ZScore(ds, 10), values)
+        self.__testIdentical(lambda ds: stats.StdDev(ds, 10), values)
+
+    def testNonFiniteValues(self):
+        values = build_values(300)
+        values[50] = float("nan")
+        values[120] = float("inf")
+        values[121] = float("-inf")
+        for period in (1, 2, 10):
+            self.__testIdentical(lambda ds: stats.StdDev(ds, period), values)
+            self.__testIdentical(lambda ds: stats.StdDev(ds, period, ddof=1), values)
+        self.__testIdentical(lambda ds: stats.ZScore(ds, 10), values)
+
+    def testNoneValues(self):
+        values = build_values(300)
+        for i in range(0, len(values), 7):
+            values[i] = None
+        self.__testIdentical(lambda ds: ma.SMA(ds, 10), values)
+        self.__testIdentical(lambda ds: ma.EMA(ds, 10), values)
+        self.__testIdentical(lambda ds: rsi.RSI(ds, 10), values)
+
+    def testDateTimes(self):
+        values = build_values(300)
+        dateTimes = build_datetimes(len(values))
+        self.__testIdentical(lambda ds: linreg.Slope(ds, 10), values, dateTimes)
+        self.__testIdentical(lambda ds: ma.SMA(ds, 10), values, dateTimes)
+
+    def testValuesDiverge(self):
+        values = build_values(300)
+        otherValues = values[:100] + build_values(200, seed=2)
+        for filterBuilder in (lambda ds: ma.SMA(ds, 10), lambda ds: ma.EMA(ds, 10), lambda ds: rsi.RSI(ds, 10)):
+            expected = self.__filter(filterBuilder, otherValues)
+            precomputed = self.__filter(filterBuilder, otherValues, precompute=values)
+            self.__assertIdentical(precomputed[:], expected[:])
+
+            # More values than the ones precomputed.
+            expected = self.__filter(filterBuilder, values + otherValues)
+            precomputed = self.__filter(filterBuilder, values + otherValues, precompute=values)
+            self.__assertIdentical(precomputed[:], expected[:])
+
+    def testDateTimesDiverge(self):
+        values = build_values(100)
+        dateTimes = build_datetimes(len(values))
+        otherDateTimes = dateTimes[:50] + [dateTime + datetime.timedelta(hours=1) for dateTime in dateTimes[50:]]
+        expected = self.__filter(lambda ds: ma.SMA(ds, 10), values, otherDateTimes)
+        precomputed = self.__filter(lambda ds: ma.SMA(ds, 10), values, otherDateTimes, values, dateTimes)
+        self.__assertIdentical(precomputed[:], expected[:])
+
+    def testEventWindowCatchesUp(self):
+        values = build_values(100)
+        ds = dataseries.SequenceDataSeries()
+        sma = ma.SMA(ds, 10)
+        sma.precompute(values)
+        for value in values[:50]:
+            ds.append(value)
+        self.assertEqual(sma.getEventWindow().getValues().tolist(), values[40:50])
+        self.assertEqual(sma.getEventWindow().getValue(), sma[-1])
+        for value in values[50:]:
+            ds.append(value)
+        self.__assertIdentical(sma[:], self.__filter(lambda ds: ma.SMA(ds, 10), values)[:])
+
+    def testPrecomputeTooLate(self):
+        ds = dataseries.SequenceDataSeries()
+        sma = ma.SMA(ds, 10)
+        ds.append(1)
+        with self.assertRaises(AssertionError):
+            sma.precompute([1, 2, 3])
+
+    def testMACD(self):
+        values = build_values(500)
+        for precompute in (None, values, np.array(values), values[:200]):
+            expected = self.__filter(lambda ds: macd.MACD(ds, 12, 26, 9), values)
+            precomputed = self.__filter(lambda ds: macd.MACD(ds, 12, 26, 9), values, precompute=precompute)
+            self.__assertIdentical(precomputed[:], expected[:])
+            self.__assertIdentical(precomputed.getSignal()[:], expected.getSignal()[:])
+            self.__assertIdentical(precomputed.getHistogram()[:], expected.getHistogram()[:])
+
+    def testBollingerBands(self):
+        values = build_values(500)
+        expected = self.__filter(lambda ds: bollinger.BollingerBands(ds, 20, 2), values)
+        precomputed = self.__filter(lambda ds: bollinger.BollingerBands(ds, 20, 2), values, precompute=values)
+        self.__assertIdentical(precomputed.getUpperBand()[:], expected.getUpperBand()[:])
+        self.__assertIdentical(precomputed.getMiddleBand()[:], expected.getMiddleBand()[:])
+        self.__assertIdentical(precomputed.getLowerBand()[:], expected.getLowerBand()[:])
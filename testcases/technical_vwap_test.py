@@ -18,12 +18,17 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import datetime
+
+import numpy as np
 from six.moves import xrange
 
 from . import common
 
+from pyalgotrade import bar
 from pyalgotrade.technical import vwap
 from pyalgotrade.barfeed import yahoofeed
+from pyalgotrade.dataseries import bards
 
 
 SYMBOL = "ORCL"
@@ -101,3 +106,36 @@ class VWAPTestCase(common.TestCase):
         outputValues = [14.605005665747331, 14.605416923506045]
         for i in xrange(2):
             self.assertEqual(round(vwap_[i], 4), round(outputValues[i], 4))
+
+    def testMatchesWindowSums(self):
+        for period in [1, 2, 20, 100]:
+            for useTypicalPrice in [False, True]:
+                barFeed = self.__getFeed()
+                bars = barFeed[INSTRUMENT]
+                vwap_ = vwap.VWAP(bars, period, useTypicalPrice)
+                barFeed.loadAll()
+                for i in xrange(period - 1, len(bars)):
+                    window = bars[i - period + 1:i + 1]
+                    if useTypicalPrice:
+                        total = sum(bar.getTypicalPrice() * bar.getVolume() for bar in window)
+                    else:
+                        total = sum(bar.getPrice() * bar.getVolume() for bar in window)
+                    expected = total / float(sum(bar.getVolume() for bar in window))
+                    self.assertAlmostEqual(vwap_[i], expected, places=9)
+
+    def testNaNBar(self):
+        barDs = bards.BarDataSeries(INSTRUMENT)
+        vwap_ = vwap.VWAP(barDs, 3)
+        prices = [10, 11, float("nan"), 12, 13, 14, 15, 16, 17, 18, 19, float("inf"), 20, 21, 22]
+        for i, price in enumerate(prices):
+            barDs.append(bar.BasicBar(
+                INSTRUMENT, datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i), price, price, price, price,
+                10 + i, None, bar.Frequency.DAY
+            ))
+        for i in xrange(2, len(prices)):
+            window = range(i - 2, i + 1)
+            if any(prices[j] - prices[j] != 0 for j in window):
+                self.assertFalse(np.isfinite(vwap_[i]))
+            else:
+                expected = sum(prices[j] * (10 + j) for j in window) / float(sum(10 + j for j in window))
+                self.assertAlmostEqual(vwap_[i], expected, places=9)
@@ -301,6 +301,35 @@ class NumPyDequeTestCase(CollectionTestCaseBase):
             d.append(i)
         self.assertEqual(d[0:3].sum(), 3)
 
+    def testWrapAround(self):
+        for maxLen in (1, 2, 3, 10):
+            d = collections.NumPyDeque(maxLen)
+            for i in xrange(maxLen * 5 + 1):
+                d.append(i)
+                expected = list(range(max(0, i + 1 - maxLen), i + 1))
+                self.assertEqual(d.data().tolist(), expected)
+                self.assertTrue(d.data().flags["C_CONTIGUOUS"])
+                self.assertEqual(d[0], expected[0])
+                self.assertEqual(d[-1], expected[-1])
+
+    def testResizeAfterWrapAround(self):
+        d = collections.NumPyDeque(4)
+        for i in xrange(7):
+            d.append(i)
+        d.resize(3)
+        self.assertEqual(d.data().tolist(), [4, 5, 6])
+        d.resize(5)
+        self.assertEqual(d.data().tolist(), [4, 5, 6])
+        for i in xrange(7, 10):
+            d.append(i)
+        self.assertEqual(d.data().tolist(), [5, 6, 7, 8, 9])
+
+    def testObjects(self):
+        d = collections.NumPyDeque(2, dtype=object)
+        for value in ("a", None, "b"):
+            d.append(value)
+        self.assertEqual(d.data().tolist(), [None, "b"])
+
 
 class ListDequeTestCase(CollectionTestCaseBase):
     def buildCollection(self, maxLen):
@@ -0,0 +1,54 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import os
+import sys
+import timeit
+import argparse
+
+import numpy as np
+
+# So the scripts can be run from any directory without installing pyalgotrade.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+
+def best_of(function, repeat):
+    """Calls function repeat times and returns the lowest elapsed time, in seconds."""
+    ret = None
+    for _ in range(repeat):
+        begin = timeit.default_timer()
+        function()
+        elapsed = timeit.default_timer() - begin
+        if ret is None or elapsed < ret:
+            ret = elapsed
+    return ret
+
+
+def random_walk(size, seed=1234):
+    """Returns size prices following a random walk that starts at 100. The seed is fixed so runs can be compared."""
+    rng = np.random.RandomState(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.001, size)))
+
+
+def build_parser(description, size, repeat=3):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--size", type=int, default=size, help="number of values (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=repeat, help="runs per case, the best one is reported")
+    return parser
@@ -0,0 +1,128 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+
+Compares the memory used by a list of bar.BasicBar against barfeed.columnar.BarArrays, and the time it takes to
+dispatch every bar from membf.BarFeed using each storage.
+
+Usage: python columnar_barfeed.py [--size 200000] [--repeat 3]
+"""
+
+import datetime
+import tracemalloc
+
+import numpy as np
+
+import benchmark
+
+from pyalgotrade import bar
+from pyalgotrade.barfeed import membf
+from pyalgotrade.barfeed import columnar
+
+
+INSTRUMENT = "ORCL/USD"
+FREQUENCY = bar.Frequency.MINUTE
+
+
+class ListBarFeed(membf.BarFeed):
+    def barsHaveAdjClose(self):
+        return True
+
+
+def build_columns(size):
+    close = benchmark.random_walk(size)
+    open_ = np.roll(close, 1)
+    open_[0] = close[0]
+    high = np.maximum(open_, close) * 1.001
+    low = np.minimum(open_, close) * 0.999
+    volume = np.full(size, 1000.0)
+    begin = datetime.datetime(2000, 1, 1)
+    dateTimes = [begin + datetime.timedelta(minutes=i) for i in range(size)]
+    return dateTimes, open_, high, low, close, volume
+
+
+def build_bars(columns):
+    dateTimes, open_, high, low, close, volume = columns
+    return [
+        bar.BasicBar(
+            INSTRUMENT, dateTimes[i], open_.item(i), high.item(i), low.item(i), close.item(i), volume.item(i),
+            close.item(i), FREQUENCY
+        )
+        for i in range(len(dateTimes))
+    ]
+
+
+def build_bar_arrays(columns):
+    # BarArrays keeps the arrays it gets, so copies are passed to count them.
+    dateTimes, open_, high, low, close, volume = [np.array(column) for column in columns]
+    return columnar.BarArrays(
+        INSTRUMENT, FREQUENCY, columnar.datetimes_to_timestamps(dateTimes), open_, high, low, close, volume,
+        adjClose=close.copy()
+    )
+
+
+def traced_size(builder, columns):
+    # Only memory allocated while building, and still in use afterwards, is counted. Datetimes are shared by both, so
+    # they are not counted.
+    tracemalloc.start()
+    try:
+        ret = builder(columns)
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return ret, size
+
+
+def dispatch_all(feed):
+    feed.start()
+    while not feed.eof():
+        feed.dispatch()
+    feed.stop()
+    feed.join()
+
+
+def main():
+    args = benchmark.build_parser("Columnar bar storage benchmark.", 200000).parse_args()
+    columns = build_columns(args.size)
+
+    bars, barsSize = traced_size(build_bars, columns)
+    barArrays, arraysSize = traced_size(build_bar_arrays, columns)
+    print("%d minute bars" % args.size)
+    print("Memory per bar (tracemalloc)")
+    print("  list of BasicBar   %8.1f bytes" % (barsSize / float(args.size)))
+    print("  BarArrays          %8.1f bytes (getMemorySize: %.1f)" % (
+        arraysSize / float(args.size), barArrays.getMemorySize() / float(args.size)
+    ))
+
+    def run_list():
+        feed = ListBarFeed(FREQUENCY, maxLen=1)
+        feed.addBarsFromSequence(INSTRUMENT, bars)
+        dispatch_all(feed)
+
+    def run_arrays():
+        feed = columnar.BarFeed(FREQUENCY, maxLen=1)
+        feed.addBarArrays(barArrays)
+        dispatch_all(feed)
+
+    print("Dispatching every bar, best of %d" % args.repeat)
+    print("  list of BasicBar   %8.3f s" % benchmark.best_of(run_list, args.repeat))
+    print("  BarArrays          %8.3f s" % benchmark.best_of(run_arrays, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
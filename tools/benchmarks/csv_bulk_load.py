@@ -0,0 +1,76 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+
+Compares how fast csvfeed.GenericBarFeed loads a CSV file with minute bars using the row parser and using bulk
+loading (GenericBarFeed.setBulkLoad).
+
+Usage: python csv_bulk_load.py [--size 500000] [--repeat 3]
+"""
+
+import os
+import datetime
+import tempfile
+
+import benchmark
+
+from pyalgotrade import bar
+from pyalgotrade.barfeed import csvfeed
+
+
+INSTRUMENT = "ORCL/USD"
+
+
+def write_csv(path, size):
+    close = benchmark.random_walk(size)
+    begin = datetime.datetime(2000, 1, 1)
+    with open(path, "w") as f:
+        f.write("Date Time,Open,High,Low,Close,Volume,Adj Close\n")
+        open_ = close[0]
+        for i in range(size):
+            high = max(open_, close[i]) * 1.001
+            low = min(open_, close[i]) * 0.999
+            dateTime = begin + datetime.timedelta(minutes=i)
+            f.write("%s,%.6f,%.6f,%.6f,%.6f,%d,%.6f\n" % (
+                dateTime.strftime("%Y-%m-%d %H:%M:%S"), open_, high, low, close[i], 1000, close[i]
+            ))
+            open_ = close[i]
+
+
+def load(path, bulkLoad):
+    feed = csvfeed.GenericBarFeed(bar.Frequency.MINUTE)
+    feed.setBulkLoad(bulkLoad)
+    feed.addBarsFromCSV(INSTRUMENT, path)
+
+
+def main():
+    args = benchmark.build_parser("CSV bulk loading benchmark.", 500000).parse_args()
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    try:
+        write_csv(path, args.size)
+        print("%d minute bars, best of %d" % (args.size, args.repeat))
+        for name, bulkLoad in (("row parser", False), ("bulk load", True)):
+            elapsed = benchmark.best_of(lambda: load(path, bulkLoad), args.repeat)
+            print("  %-12s %8.3f s %10.0f rows/s" % (name, elapsed, args.size / elapsed))
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
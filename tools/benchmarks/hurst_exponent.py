@@ -0,0 +1,98 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+
+Compares the HurstExponent event window, that updates per-lag rolling sums, against the previous version, that called
+hurst.hurst_exp over the whole window on every value. Times are for onNewValue + getValue, and the largest absolute
+difference between both is reported.
+
+Usage: python hurst_exponent.py [--size 3000] [--repeat 3]
+"""
+
+import numpy as np
+
+import benchmark
+
+from pyalgotrade import technical
+from pyalgotrade.technical import hurst
+
+
+# The previous event window.
+class HurstExpEventWindow(technical.EventWindow):
+    def __init__(self, period, minLags, maxLags):
+        super(HurstExpEventWindow, self).__init__(period)
+        self.__minLags = minLags
+        self.__maxLags = maxLags
+
+    def onNewValue(self, dateTime, value):
+        if value is not None:
+            value = np.log10(value)
+        super(HurstExpEventWindow, self).onNewValue(dateTime, value)
+
+    def getValue(self):
+        ret = None
+        if self.windowFull():
+            ret = hurst.hurst_exp(self.getValues(), self.__minLags, self.__maxLags)
+        return ret
+
+
+def time_event_window(eventWindowFactory, values, repeat):
+    outputs = []
+
+    def run():
+        eventWindow = eventWindowFactory()
+        del outputs[:]
+        for value in values:
+            eventWindow.onNewValue(None, value)
+            outputs.append(eventWindow.getValue())
+
+    ret = benchmark.best_of(run, repeat)
+    return ret / len(values), outputs
+
+
+def max_difference(expected, actual):
+    return max(abs(a - b) for a, b in zip(expected, actual) if a is not None)
+
+
+def main():
+    args = benchmark.build_parser("Hurst exponent benchmark.", 3000).parse_args()
+    values = benchmark.random_walk(args.size).tolist()
+    minLags = 2
+
+    print("onNewValue + getValue, %d values, minLags=%d, best of %d" % (args.size, minLags, args.repeat))
+    print("%8s %8s %13s %12s %12s %10s" % ("period", "maxLags", "evalInterval", "before", "after", "max diff"))
+    for period, maxLags, evalInterval in ((100, 20, 1), (1000, 100, 1), (1000, 100, 10)):
+        before, expected = time_event_window(
+            lambda: HurstExpEventWindow(period, minLags, maxLags), values, args.repeat
+        )
+        after, actual = time_event_window(
+            lambda: hurst.HurstExponentEventWindow(period, minLags, maxLags, evalInterval=evalInterval),
+            values, args.repeat
+        )
+        # With evalInterval > 1 the last value is repeated in between evaluations, so values are not compared.
+        if evalInterval == 1:
+            diff = "%.2e" % max_difference(expected, actual)
+        else:
+            diff = "-"
+        print("%8d %8d %13d %9.2f us %9.2f us %10s" % (
+            period, maxLags, evalInterval, before * 1e6, after * 1e6, diff
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+
+Compares the cost of appending to a full utils.collections.NumPyDeque against the previous implementation, that
+shifted the whole array on every append once full.
+
+Usage: python numpy_deque.py [--size 100000] [--repeat 3]
+"""
+
+import numpy as np
+
+import benchmark
+
+from pyalgotrade.utils import collections
+
+
+# The previous NumPyDeque, only with the methods used here.
+class ShiftingNumPyDeque(object):
+    def __init__(self, maxLen, dtype=float):
+        self.__values = np.empty(maxLen, dtype=dtype)
+        self.__maxLen = maxLen
+        self.__nextPos = 0
+
+    def append(self, value):
+        if self.__nextPos < self.__maxLen:
+            self.__values[self.__nextPos] = value
+            self.__nextPos += 1
+        else:
+            # Shift items to the left and put the last value.
+            self.__values[0:-1] = self.__values[1:]
+            self.__values[self.__nextPos - 1] = value
+
+    def data(self):
+        if self.__nextPos < self.__maxLen:
+            return self.__values[0:self.__nextPos]
+        return self.__values
+
+
+def time_appends(dequeClass, windowSize, values, repeat):
+    deque = dequeClass(windowSize)
+    for value in values[:windowSize]:
+        deque.append(value)
+
+    def append_all():
+        for value in values:
+            deque.append(value)
+
+    ret = benchmark.best_of(append_all, repeat)
+    return ret, deque.data().copy()
+
+
+def main():
+    args = benchmark.build_parser("NumPyDeque append benchmark.", 100000).parse_args()
+    values = benchmark.random_walk(args.size).tolist()
+
+    print("Append to a full deque, %d appends, best of %d" % (args.size, args.repeat))
+    print("%8s %12s %12s" % ("window", "before", "after"))
+    for windowSize in (10, 100, 500, 2000, 10000):
+        before, beforeValues = time_appends(ShiftingNumPyDeque, windowSize, values, args.repeat)
+        after, afterValues = time_appends(collections.NumPyDeque, windowSize, values, args.repeat)
+        # Both must end up with the same values.
+        assert np.array_equal(beforeValues, afterValues)
+        print("%8d %9.0f ns %9.0f ns" % (windowSize, before / args.size * 1e9, after / args.size * 1e9))
+
+
+if __name__ == "__main__":
+    main()
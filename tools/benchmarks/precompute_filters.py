@@ -0,0 +1,94 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+
+Compares filtering values as they get appended to a SequenceDataSeries against calling precompute first, for the
+filters that implement EventWindow.computeBatch. Outputs are checked to be identical.
+
+Usage: python precompute_filters.py [--size 100000] [--repeat 3]
+"""
+
+import benchmark
+
+from pyalgotrade import dataseries
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import stats
+from pyalgotrade.technical import rsi
+from pyalgotrade.technical import highlow
+from pyalgotrade.technical import macd
+from pyalgotrade.technical import bollinger
+
+
+CASES = [
+    ("SMA(20)", lambda ds: ma.SMA(ds, 20)),
+    ("EMA(20)", lambda ds: ma.EMA(ds, 20)),
+    ("WMA(20)", lambda ds: ma.WMA(ds, range(1, 21))),
+    ("StdDev(20)", lambda ds: stats.StdDev(ds, 20)),
+    ("ZScore(20)", lambda ds: stats.ZScore(ds, 20)),
+    ("RSI(14)", lambda ds: rsi.RSI(ds, 14)),
+    ("High(20)", lambda ds: highlow.High(ds, 20)),
+    ("MACD(12,26,9)", lambda ds: macd.MACD(ds, 12, 26, 9)),
+    ("Bollinger(20,2)", lambda ds: bollinger.BollingerBands(ds, 20, 2)),
+]
+
+
+def get_outputs(filter_):
+    if isinstance(filter_, bollinger.BollingerBands):
+        filter_ = filter_.getMiddleBand()
+    return list(filter_)
+
+
+def run(values, factory, precompute):
+    ds = dataseries.SequenceDataSeries(maxLen=len(values))
+    filter_ = factory(ds)
+    if precompute:
+        filter_.precompute(values)
+    for value in values:
+        ds.append(value)
+    return filter_
+
+
+def main():
+    args = benchmark.build_parser("Precomputed technical filters benchmark.", 100000).parse_args()
+    values = benchmark.random_walk(args.size).tolist()
+
+    def append_only():
+        ds = dataseries.SequenceDataSeries(maxLen=len(values))
+        for value in values:
+            ds.append(value)
+
+    print("%d values, best of %d" % (args.size, args.repeat))
+    print("Appending to a SequenceDataSeries alone: %.3f s" % benchmark.best_of(append_only, args.repeat))
+    print("%-16s %10s %12s %8s %10s" % ("filter", "streaming", "precompute", "speedup", "batch"))
+    for name, factory in CASES:
+        streaming = benchmark.best_of(lambda: run(values, factory, False), args.repeat)
+        precomputed = benchmark.best_of(lambda: run(values, factory, True), args.repeat)
+        assert get_outputs(run(values, factory, False)) == get_outputs(run(values, factory, True)), name
+
+        # The batch pass alone, for the filters that have an event window.
+        batch = "-"
+        filter_ = factory(dataseries.SequenceDataSeries())
+        if hasattr(filter_, "getEventWindow"):
+            eventWindow = filter_.getEventWindow()
+            batch = "%.3f s" % benchmark.best_of(lambda: eventWindow.computeBatch(None, values), args.repeat)
+
+        print("%-16s %8.3f s %10.3f s %7.1fx %10s" % (name, streaming, precomputed, streaming / precomputed, batch))
+
+
+if __name__ == "__main__":
+    main()
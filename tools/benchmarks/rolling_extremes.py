@@ -0,0 +1,111 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+
+Compares the High and StochasticOscillator event windows, that track extremes with highlow.RollingExtreme, against
+the previous versions, that reduced the whole window on every value. Times are for onNewValue + getValue.
+
+Usage: python rolling_extremes.py [--size 20000] [--repeat 3]
+"""
+
+import datetime
+
+import benchmark
+
+from pyalgotrade import bar
+from pyalgotrade import technical
+from pyalgotrade.technical import highlow
+from pyalgotrade.technical import stoch
+
+
+# The previous event windows.
+class ReducingHighEventWindow(technical.EventWindow):
+    def getValue(self):
+        ret = None
+        if self.windowFull():
+            ret = self.getValues().max()
+        return ret
+
+
+class ScanningSOEventWindow(technical.EventWindow):
+    def __init__(self, period):
+        super(ScanningSOEventWindow, self).__init__(period, dtype=object)
+
+    def getValue(self):
+        ret = None
+        if self.windowFull():
+            lowestLow, highestHigh = stoch.get_low_high_values(False, self.getValues())
+            currentClose = self.getValues()[-1].getClose(False)
+            closeDelta = currentClose - lowestLow
+            if closeDelta:
+                ret = closeDelta / float(highestHigh - lowestLow) * 100
+            else:
+                ret = 0.0
+        return ret
+
+
+def build_bars(values):
+    ret = []
+    begin = datetime.datetime(2000, 1, 1)
+    open_ = values[0]
+    for i, close in enumerate(values):
+        ret.append(bar.BasicBar(
+            "ORCL/USD", begin + datetime.timedelta(minutes=i), open_, max(open_, close) * 1.001,
+            min(open_, close) * 0.999, close, 1000, None, bar.Frequency.MINUTE
+        ))
+        open_ = close
+    return ret
+
+
+def time_event_window(eventWindowFactory, values, repeat):
+    outputs = []
+
+    def run():
+        eventWindow = eventWindowFactory()
+        del outputs[:]
+        for value in values:
+            eventWindow.onNewValue(None, value)
+            outputs.append(eventWindow.getValue())
+
+    ret = benchmark.best_of(run, repeat)
+    return ret / len(values), outputs
+
+
+def main():
+    args = benchmark.build_parser("Rolling highs and lows benchmark.", 20000).parse_args()
+    values = benchmark.random_walk(args.size).tolist()
+    bars = build_bars(values)
+
+    print("onNewValue + getValue, %d values, best of %d" % (args.size, args.repeat))
+    print("%8s %14s %12s %20s %12s" % ("window", "High before", "after", "Stochastic before", "after"))
+    for windowSize in (20, 252, 1000):
+        highBefore, before = time_event_window(lambda: ReducingHighEventWindow(windowSize), values, args.repeat)
+        highAfter, after = time_event_window(
+            lambda: highlow.HighLowEventWindow(windowSize, False), values, args.repeat
+        )
+        assert before == after
+        soBefore, before = time_event_window(lambda: ScanningSOEventWindow(windowSize), bars, args.repeat)
+        soAfter, after = time_event_window(lambda: stoch.SOEventWindow(windowSize, False), bars, args.repeat)
+        assert before == after
+        print("%8d %11.2f us %9.2f us %17.2f us %9.2f us" % (
+            windowSize, highBefore * 1e6, highAfter * 1e6, soBefore * 1e6, soAfter * 1e6
+        ))
+
+
+if __name__ == "__main__":
+    main()
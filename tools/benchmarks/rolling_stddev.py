@@ -0,0 +1,99 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+
+Compares the StdDev and ZScore event windows, that use stats.RollingMeanVariance, against the previous versions, that
+called numpy's std and mean over the whole window on every value. Both onNewValue + getValue and computeBatch are
+timed, and the largest relative difference with numpy.std is reported.
+
+Usage: python rolling_stddev.py [--size 100000] [--repeat 3]
+"""
+
+import numpy as np
+
+import benchmark
+
+from pyalgotrade import technical
+from pyalgotrade.technical import stats
+
+
+# The previous event windows.
+class NumPyStdDevEventWindow(technical.EventWindow):
+    def getValue(self):
+        ret = None
+        if self.windowFull():
+            ret = self.getValues().std()
+        return ret
+
+    def computeBatch(self, dateTimes, values):
+        ret = [None] * min(len(values), self.getWindowSize() - 1)
+        ret.extend(technical.apply_rolling(values, self.getWindowSize(), lambda windows: windows.std(axis=1)))
+        return ret
+
+
+class NumPyZScoreEventWindow(technical.EventWindow):
+    def getValue(self):
+        ret = None
+        if self.windowFull():
+            values = self.getValues()
+            ret = (values[-1] - values.mean()) / float(values.std())
+        return ret
+
+
+def time_event_window(eventWindow, values, repeat):
+    def run():
+        for value in values:
+            eventWindow.onNewValue(None, value)
+            eventWindow.getValue()
+    return benchmark.best_of(run, repeat) / len(values)
+
+
+def main():
+    args = benchmark.build_parser("Rolling standard deviation benchmark.", 100000).parse_args()
+    # Far from 0, where precision is harder to keep.
+    values = benchmark.random_walk(args.size) * 100
+    valuesList = values.tolist()
+
+    print("%d values around 10000, best of %d" % (args.size, args.repeat))
+    print("onNewValue + getValue")
+    print("%8s %16s %10s %16s %10s" % ("window", "StdDev before", "after", "ZScore before", "after"))
+    for windowSize in (20, 200, 2000):
+        print("%8d %13.2f us %7.2f us %13.2f us %7.2f us" % (
+            windowSize,
+            time_event_window(NumPyStdDevEventWindow(windowSize), valuesList, args.repeat) * 1e6,
+            time_event_window(stats.StdDevEventWindow(windowSize, 0), valuesList, args.repeat) * 1e6,
+            time_event_window(NumPyZScoreEventWindow(windowSize), valuesList, args.repeat) * 1e6,
+            time_event_window(stats.ZScoreEventWindow(windowSize, 0), valuesList, args.repeat) * 1e6,
+        ))
+
+    print("StdDev computeBatch")
+    print("%8s %12s %10s %18s" % ("window", "numpy.std", "rolling", "max rel. diff"))
+    for windowSize in (20, 200, 2000):
+        before = NumPyStdDevEventWindow(windowSize)
+        after = stats.StdDevEventWindow(windowSize, 0)
+        beforeTime = benchmark.best_of(lambda: before.computeBatch(None, values), args.repeat)
+        afterTime = benchmark.best_of(lambda: after.computeBatch(None, values), args.repeat)
+        expected = np.array(before.computeBatch(None, values)[windowSize - 1:])
+        actual = np.array(after.computeBatch(None, values)[windowSize - 1:])
+        print("%8d %10.3f s %8.3f s %18.2e" % (
+            windowSize, beforeTime, afterTime, np.max(np.abs(actual - expected) / expected)
+        ))
+
+
+if __name__ == "__main__":
+    main()